@@ -0,0 +1,54 @@
+"""Time how long `strictly_equal` takes to compare common hook dependencies.
+
+Run with `hatch run python:benchmark`, or with `python scripts/benchmark_strictly_equal.py`
+from an environment where ReactPy is installed.
+"""
+
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from reactpy.core.hooks import _try_to_infer_closure_values, strictly_equal
+
+NUMBER = 100_000
+REPEAT = 5
+
+
+def make_callback(value: int) -> Callable[[], int]:
+    def callback() -> int:
+        return value + 1
+
+    return callback
+
+
+def separately_compiled_lambdas() -> tuple[Any, Any]:
+    source = "def make():\n    return lambda: 'text'\n"
+    namespaces: list[dict[str, Any]] = [{}, {}]
+    for namespace in namespaces:
+        exec(compile(source, "<benchmark>", "exec"), namespace)  # noqa: S102
+    return namespaces[0]["make"](), namespaces[1]["make"]()
+
+
+def main() -> None:
+    callback = make_callback(1)
+    other_callback = make_callback(1)
+    lambda_x, lambda_y = separately_compiled_lambdas()
+    # Equal ints which are not the same object
+    int_x, int_y = 100_000, int("100000")
+    cases: dict[str, Callable[[], Any]] = {
+        "same object": lambda: strictly_equal(callback, callback),
+        "equal ints": lambda: strictly_equal(int_x, int_y),
+        "local functions from one statement": lambda: strictly_equal(
+            callback, other_callback
+        ),
+        "separately compiled lambdas": lambda: strictly_equal(lambda_x, lambda_y),
+        "inferring closure values": lambda: _try_to_infer_closure_values(callback, ...),
+    }
+    for name, case in cases.items():
+        # The fastest run is the one least disturbed by other processes.
+        seconds = min(timeit.repeat(case, number=NUMBER, repeat=REPEAT))
+        print(f"{name}: {seconds / NUMBER * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
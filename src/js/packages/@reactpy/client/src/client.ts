@@ -41,6 +41,12 @@ export abstract class BaseReactPyClient implements ReactPyClientInterface {
       return;
     }
 
+    if (message.type === "layout-batch") {
+      // the updates are applied in order, and rendered together
+      message.updates.forEach((update: any) => this.handleIncoming(update));
+      return;
+    }
+
     const messageHandlers: ((m: any) => void)[] | undefined =
       this.handlers[message.type];
     if (!messageHandlers) {
@@ -79,6 +85,15 @@ export class ReactPyClient
     });
   }
 
+  protected handleIncoming(message: any): void {
+    if (message.type === "session-token") {
+      // reconnect with the token to resume the session rather than start a new one
+      this.urls.componentUrl.searchParams.set("session", message.token);
+      return;
+    }
+    super.handleIncoming(message);
+  }
+
   sendMessage(message: any): void {
     if (
       this.socket.current &&
@@ -7,7 +7,13 @@ import {
   type JSX,
   type TargetedEvent,
 } from "preact";
-import { useContext, useEffect, useRef, useState } from "preact/hooks";
+import {
+  useContext,
+  useEffect,
+  useLayoutEffect,
+  useRef,
+  useState,
+} from "preact/hooks";
 import {
   HANDLER_DEBOUNCE,
   HANDLER_MARKER,
@@ -21,6 +27,7 @@ import type {
   ReactPyVdom,
 } from "./types";
 import { createAttributes, createChildren, loadImportSource } from "./vdom";
+import { applyLayoutPatch } from "./patch";
 import type { ReactPyClient } from "./client";
 
 const ClientContext = createContext<ReactPyClient>(null as any);
@@ -136,11 +143,17 @@ function debounceHandler(
   return wrapped;
 }
 
-export function Layout(props: { client: ReactPyClient }): JSX.Element {
-  const currentModel: ReactPyVdom = useState({ tagName: "" })[0];
+export function Layout(props: {
+  client: ReactPyClient;
+  initialModel?: ReactPyVdom;
+}): JSX.Element {
+  const currentModel: ReactPyVdom = useState(
+    props.initialModel || { tagName: "" },
+  )[0];
   const forceUpdate = useForceUpdate();
 
-  useEffect(
+  // Layout effects subscribe synchronously, so no update is missed when hydrating.
+  useLayoutEffect(
     () =>
       props.client.onMessage("layout-update", ({ path, model }) => {
         if (path === "") {
@@ -153,6 +166,15 @@ export function Layout(props: { client: ReactPyClient }): JSX.Element {
     [currentModel, props.client],
   );
 
+  useLayoutEffect(
+    () =>
+      props.client.onMessage("layout-patch", ({ path, changes }) => {
+        applyLayoutPatch(currentModel, path, changes);
+        forceUpdate();
+      }),
+    [currentModel, props.client],
+  );
+
   return (
     <ClientContext.Provider value={props.client}>
       <Element model={currentModel} />
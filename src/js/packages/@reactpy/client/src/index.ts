@@ -2,6 +2,7 @@ export * from "./client";
 export * from "./components";
 export * from "./handler";
 export * from "./mount";
+export * from "./patch";
 export * from "./types";
 export * from "./vdom";
 export * from "./websocket";
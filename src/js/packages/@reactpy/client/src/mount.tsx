@@ -1,4 +1,4 @@
-import { render } from "preact";
+import { hydrate, render } from "preact";
 import { ReactPyClient } from "./client";
 import { Layout } from "./components";
 import type { MountProps } from "./types";
@@ -17,6 +17,11 @@ export function mountReactPy(props: MountProps) {
     componentUrl.searchParams.append("qs", window.location.search);
   }
 
+  // Connect to the layout which rendered the model embedded in the page
+  if (props.sessionToken) {
+    componentUrl.searchParams.set("session", props.sessionToken);
+  }
+
   // Configure a new ReactPy client
   const client = new ReactPyClient({
     urls: {
@@ -32,6 +37,32 @@ export function mountReactPy(props: MountProps) {
     mountElement: props.mountElement,
   });
 
+  if (props.initialModel) {
+    // The server embedded its first render, so there is no need to wait for it.
+    const layout = (
+      <Layout client={client} initialModel={props.initialModel} />
+    );
+    if (props.mountElement.hasChildNodes()) {
+      hydrate(layout, props.mountElement);
+    } else {
+      render(layout, props.mountElement);
+    }
+    return;
+  }
+
+  if (props.mountElement.hasChildNodes()) {
+    // The server prerendered the component. Keep showing that until the first update
+    // arrives, then hydrate it with the model the update contains.
+    const stopWaiting = client.onMessage("layout-update", ({ model }) => {
+      stopWaiting();
+      hydrate(
+        <Layout client={client} initialModel={model} />,
+        props.mountElement,
+      );
+    });
+    return;
+  }
+
   // Start rendering the component
   render(<Layout client={client} />, props.mountElement);
 }
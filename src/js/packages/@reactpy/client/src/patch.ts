@@ -0,0 +1,60 @@
+import { get as getJsonPointer, parse as parseJsonPointer } from "json-pointer";
+import type { LayoutPatchOperation, ReactPyVdom } from "./types";
+
+/**
+ * Apply the changes of a ``layout-patch`` message to a model in place.
+ *
+ * The path of each change is relative to ``path``. Array indices are spliced so that
+ * ``add``, ``remove``, and ``move`` operations shift later siblings rather than
+ * overwrite them.
+ */
+export function applyLayoutPatch(
+  model: ReactPyVdom,
+  path: string,
+  changes: LayoutPatchOperation[],
+): void {
+  for (const change of changes) {
+    const tokens = parseJsonPointer(path + change.path);
+    if (tokens.length === 0) {
+      // Replacing the root model must keep the same object for the layout to see it.
+      for (const key of Object.keys(model)) {
+        delete (model as any)[key];
+      }
+      Object.assign(model, change.value);
+      continue;
+    }
+
+    const lastToken = tokens.pop() as string;
+    const parent = tokens.length ? getJsonPointer(model, tokens) : model;
+    let value = change.value;
+    if (change.op === "move") {
+      // moves carry no value, it is taken from its old location
+      value = removeValue(model, parseJsonPointer(path + change.from));
+    }
+    if (Array.isArray(parent)) {
+      const index = lastToken === "-" ? parent.length : Number(lastToken);
+      if (change.op === "add" || change.op === "move") {
+        parent.splice(index, 0, value);
+      } else if (change.op === "remove") {
+        parent.splice(index, 1);
+      } else {
+        parent[index] = value;
+      }
+    } else if (change.op === "remove") {
+      delete parent[lastToken];
+    } else {
+      parent[lastToken] = value;
+    }
+  }
+}
+
+function removeValue(model: ReactPyVdom, tokens: string[]): any {
+  const lastToken = tokens.pop() as string;
+  const parent = tokens.length ? getJsonPointer(model, tokens) : model;
+  if (Array.isArray(parent)) {
+    return parent.splice(Number(lastToken), 1)[0];
+  }
+  const value = parent[lastToken];
+  delete parent[lastToken];
+  return value;
+}
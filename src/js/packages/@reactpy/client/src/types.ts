@@ -40,6 +40,8 @@ export type MountProps = {
   reconnectMaxInterval?: number;
   reconnectMaxRetries?: number;
   reconnectBackoffMultiplier?: number;
+  initialModel?: ReactPyVdom;
+  sessionToken?: string;
 };
 
 // #### COMPONENT TYPES ####
@@ -110,13 +112,40 @@ export type LayoutUpdateMessage = {
   model: ReactPyVdom;
 };
 
+export type LayoutPatchOperation = {
+  op: "add" | "remove" | "replace" | "move";
+  path: string;
+  value?: any;
+  from?: string;
+};
+
+export type LayoutPatchMessage = {
+  type: "layout-patch";
+  path: string;
+  changes: LayoutPatchOperation[];
+};
+
+export type LayoutBatchMessage = {
+  type: "layout-batch";
+  updates: (LayoutUpdateMessage | LayoutPatchMessage)[];
+};
+
+export type SessionTokenMessage = {
+  type: "session-token";
+  token: string;
+};
+
 export type LayoutEventMessage = {
   type: "layout-event";
   target: string;
   data: any;
 };
 
-export type IncomingMessage = LayoutUpdateMessage;
+export type IncomingMessage =
+  | LayoutUpdateMessage
+  | LayoutPatchMessage
+  | LayoutBatchMessage
+  | SessionTokenMessage;
 export type OutgoingMessage = LayoutEventMessage;
 export type Message = IncomingMessage | OutgoingMessage;
 
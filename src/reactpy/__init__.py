@@ -9,6 +9,7 @@ from reactpy.core.hooks import (
     use_callback,
     use_connection,
     use_context,
+    use_context_selector,
     use_debug_value,
     use_effect,
     use_location,
@@ -45,6 +46,7 @@ __all__ = [
     "use_callback",
     "use_connection",
     "use_context",
+    "use_context_selector",
     "use_debug_value",
     "use_effect",
     "use_location",
@@ -3,7 +3,7 @@ from __future__ import annotations
 from collections.abc import Sequence
 from typing import ClassVar, overload
 
-from reactpy.core.vdom import Vdom
+from reactpy.core.vdom import Vdom, static
 from reactpy.types import (
     EventHandlerDict,
     VdomAttributes,
@@ -279,7 +279,10 @@ class HtmlConstructor:
     underscore character (eg. `html.del_` for `<del>`).
 
     If trying to create an element with dashes in the name, you can replace the dashes
-    with underscores (eg. `html.data_table` for `<data-table>`)."""
+    with underscores (eg. `html.data_table` for `<data-table>`).
+
+    Subtrees which never change can be wrapped in `html.static` so that re-renders
+    skip them."""
 
     # ruff: noqa: N815
     __cache__: ClassVar[dict[str, VdomConstructor]] = {
@@ -288,6 +291,7 @@ class HtmlConstructor:
         "svg": SvgConstructor(),
     }
     __call__ = __cache__["fragment"].__call__
+    static = staticmethod(static)
 
     def __getattr__(self, value: str) -> VdomConstructor:
         value = value.rstrip("_").replace("_", "-")
@@ -138,3 +138,111 @@ REACTPY_MAX_QUEUE_SIZE = Option(
     validator=int,
 )
 """The maximum size for internal queues used by ReactPy"""
+
+REACTPY_DIFF_UPDATES = Option(
+    "REACTPY_DIFF_UPDATES",
+    default=False,
+    mutable=True,
+    validator=boolean,
+)
+"""Whether to send fine-grained ``layout-patch`` messages when a component re-renders.
+
+By default, the entire re-rendered model of a component is sent to the client. When
+enabled, the new model is instead compared with the previous one and only the changes
+between them are sent. This reduces the size of each message to the size of the
+change, rather than the size of the component."""
+
+REACTPY_RENDER_BATCH_WINDOW = Option(
+    "REACTPY_RENDER_BATCH_WINDOW",
+    default=0,
+    mutable=True,
+    validator=int,
+)
+"""The time in milliseconds during which completed renders are sent as one message.
+
+Renders which complete within this window of each other are combined into a single
+``layout-batch`` message. By default (``0``), only renders which complete within the
+same tick of the event loop are combined, for example, those caused by several state
+updates made in one event handler."""
+
+REACTPY_RENDER_SLICE_MS = Option(
+    "REACTPY_RENDER_SLICE_MS",
+    default=0,
+    mutable=True,
+    validator=int,
+)
+"""The longest time in milliseconds a render may run before yielding to the event loop.
+
+Large renders otherwise block the event loop until they complete, which delays events
+and the renders of every other session served by the same process. By default (``0``),
+renders are not split up this way."""
+
+REACTPY_MAX_CONCURRENT_RENDERS = Option(
+    "REACTPY_MAX_CONCURRENT_RENDERS",
+    default=0,
+    mutable=True,
+    validator=int,
+)
+"""The most components a layout renders concurrently when rendering asynchronously.
+
+When many separate parts of a layout need to render at once, for example because of a
+burst of state updates, a limited number of workers render them in turn rather than each
+getting a task of its own. By default (``0``), there is no limit."""
+
+REACTPY_SESSION_RESUME_TIMEOUT = Option(
+    "REACTPY_SESSION_RESUME_TIMEOUT",
+    default=0,
+    mutable=True,
+    validator=float,
+)
+"""The time in seconds a session is kept alive after its websocket disconnects.
+
+A client which reconnects within this time resumes its session, and is sent the current
+model of its layout instead of the layout being mounted and rendered again from scratch.
+This avoids every client re-running its mount effects at once when connections drop,
+for example during a deploy. By default (``0``), sessions end when they disconnect."""
+
+REACTPY_SESSION_HIBERNATE_TIMEOUT = Option(
+    "REACTPY_SESSION_HIBERNATE_TIMEOUT",
+    default=0,
+    mutable=True,
+    validator=float,
+)
+"""The time in seconds a session may be idle before it hibernates.
+
+A session is idle while it neither receives events, runs event handlers, nor sends
+updates. A hibernating session's ``use_state`` and ``use_ref`` values are saved, and its
+layout is unmounted to free the memory it holds, which includes stopping its effects.
+The next event restores the saved state into a new layout, which is then rendered and
+sent to the client before the event is delivered. Sessions whose state cannot be pickled
+do not hibernate. By default (``0``), sessions do not hibernate."""
+
+REACTPY_SESSION_HANDOFF_TIMEOUT = Option(
+    "REACTPY_SESSION_HANDOFF_TIMEOUT",
+    default=10,
+    mutable=True,
+    validator=float,
+)
+"""The time in seconds a layout started during an HTTP request waits for its websocket.
+
+Pages which embed their first render start the layout that rendered it, and hand that
+layout to the websocket the page then opens. If the websocket does not connect within
+this time, for example because the page was fetched by a crawler, the layout is
+unmounted."""
+
+REACTPY_LAYOUT_PROCESSES = Option(
+    "REACTPY_LAYOUT_PROCESSES",
+    default=0,
+    mutable=True,
+    validator=int,
+)
+"""The number of worker processes which host layouts served over websockets.
+
+Each new websocket is handed to the worker serving the fewest sessions, and the server's
+own process only forwards messages between the websocket and that worker. This spreads
+rendering across CPU cores. Root components must be importable by their dotted path
+within the workers, and ``use_connection().carrier`` is ``None`` there. Sessions are not
+resumed, hibernated, or handed off from a page's first render while workers are used.
+The workers are started and stopped with the ASGI lifespan, or when the first websocket
+connects if the webserver doesn't send lifespan events, and a worker which exits is
+restarted. By default (``0``), layouts are hosted in the server's own process."""
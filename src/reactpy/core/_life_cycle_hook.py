@@ -1,16 +1,17 @@
 from __future__ import annotations
 
 import logging
-from asyncio import Event, Task, create_task, gather
+from asyncio import Event, Task, create_task, gather, get_running_loop
 from collections.abc import Callable
 from contextvars import ContextVar, Token
-from typing import Any, Protocol, TypeVar
+from typing import Any, Protocol, TypeAlias, TypeVar
+from weakref import WeakKeyDictionary
 
 from anyio import Semaphore
 
 from reactpy.core._thread_local import ThreadLocal
 from reactpy.types import Component, Context, ContextProvider
-from reactpy.utils import Singleton
+from reactpy.utils import Ref, Singleton
 
 T = TypeVar("T")
 
@@ -19,8 +20,31 @@ class EffectFunc(Protocol):
     async def __call__(self, stop: Event) -> None: ...
 
 
+class Effect(Protocol):
+    """An effect which is kept across renders and applied again when it changes"""
+
+    def run(self) -> None:
+        """Clean up after the effect's previous run, if any, and apply it"""
+
+    def stop(self) -> Task[None] | None:
+        """Clean up after the effect, returning a task if that is not done yet"""
+
+
+class ContextSubscription(Protocol):
+    """Decides whether a change to a context's value affects a subscribed component"""
+
+    def changed(self, value: Any) -> bool:
+        """Whether the component should render given the context's new value"""
+        ...
+
+
 logger = logging.getLogger(__name__)
 
+_ContextSubscribers: TypeAlias = (
+    "WeakKeyDictionary[LifeCycleHook, set[ContextSubscription] | None]"
+)
+"""Subscribed hooks, and their subscriptions, or ``None`` for any change to the value"""
+
 
 class _HookStack(Singleton):  # nocov
     """A singleton object which manages the current component tree's hooks.
@@ -134,12 +158,18 @@ class LifeCycleHook:
     __slots__ = (
         "__weakref__",
         "_context_providers",
+        "_context_subscribers",
+        "_context_subscriptions",
         "_current_state_index",
         "_effect_funcs",
         "_effect_stops",
         "_effect_tasks",
+        "_effects",
+        "_parent",
+        "_pending_effects",
         "_render_access",
         "_rendered_atleast_once",
+        "_restored_state",
         "_schedule_render_callback",
         "_scheduled_render",
         "_state",
@@ -153,14 +183,20 @@ class LifeCycleHook:
         schedule_render: Callable[[], None],
     ) -> None:
         self._context_providers: dict[Context[Any], ContextProvider[Any]] = {}
+        self._context_subscribers: dict[Context[Any], _ContextSubscribers] | None = None
+        self._context_subscriptions: list[_ContextSubscribers] = []
+        self._parent: LifeCycleHook | None = None
         self._schedule_render_callback = schedule_render
         self._scheduled_render = False
         self._rendered_atleast_once = False
         self._current_state_index = 0
         self._state: list = []
+        self._restored_state: dict[int, Any] | None = None
         self._effect_funcs: list[EffectFunc] = []
         self._effect_tasks: list[Task[None]] = []
         self._effect_stops: list[Event] = []
+        self._effects: dict[Effect, None] = {}
+        self._pending_effects: dict[Effect, None] = {}
         self._render_access = Semaphore(1)  # ensure only one render at a time
 
     def schedule_render(self) -> None:
@@ -174,6 +210,11 @@ class LifeCycleHook:
         else:
             self._scheduled_render = True
 
+    @property
+    def render_scheduled(self) -> bool:
+        """Whether this hook's component is waiting to be re-rendered"""
+        return self._scheduled_render
+
     def use_state(self, function: Callable[[], T]) -> T:
         """Add state to this hook
 
@@ -191,6 +232,32 @@ class LifeCycleHook:
         self._current_state_index += 1
         return result
 
+    def restore_state(self, values: dict[int, Any]) -> None:
+        """Restore state saved by :meth:`save_state` from an earlier hook
+
+        The values are used in place of the initial values of the state at the same
+        index when the component first renders.
+        """
+        self._restored_state = values
+
+    def restored_state(self, default: T) -> T:
+        """Get the restored value of the state that is being added, if there is one"""
+        if self._restored_state is None:
+            return default
+        return self._restored_state.get(self._current_state_index, default)
+
+    def save_state(self) -> dict[int, Any]:
+        """Get the values of this hook's ``use_state`` and ``use_ref`` state by index"""
+        from reactpy.core.hooks import _CurrentState
+
+        values: dict[int, Any] = {}
+        for index, state in enumerate(self._state):
+            if isinstance(state, _CurrentState):
+                values[index] = state.value
+            elif type(state) is Ref and hasattr(state, "current"):
+                values[index] = state.current
+        return values
+
     def add_effect(self, effect_func: EffectFunc) -> None:
         """Add an effect to this hook
 
@@ -201,13 +268,37 @@ class LifeCycleHook:
         """
         self._effect_funcs.append(effect_func)
 
+    def schedule_effect(self, effect: Effect) -> None:
+        """Run an effect once the layout is done rendering
+
+        Unlike the functions given to :meth:`add_effect`, no task is kept for the
+        effect while it is applied. It is run again each time it is scheduled, and
+        stopped when the component will be unmounted.
+        """
+        self._pending_effects[effect] = None
+
     def set_context_provider(self, provider: ContextProvider[Any]) -> None:
         """Set a context provider for this hook
 
         The context provider will be used to provide state to any child components
         of this hook's component which request a context provider of the same type.
+        If its value changed, the components subscribed to it are scheduled to render.
         """
+        from reactpy.core.hooks import strictly_equal
+
+        old_provider = self._context_providers.get(provider.type)
         self._context_providers[provider.type] = provider
+        if (
+            old_provider is not None
+            and self._context_subscribers
+            and not strictly_equal(old_provider.value, provider.value)
+        ):
+            subscribers = self._context_subscribers.get(provider.type, {})
+            for hook, subscriptions in list(subscribers.items()):
+                if subscriptions is None or any(
+                    s.changed(provider.value) for s in subscriptions
+                ):
+                    hook.schedule_render()
 
     def get_context_provider(self, context: Context[T]) -> ContextProvider[T] | None:
         """Get a context provider for this hook of the given type
@@ -215,12 +306,65 @@ class LifeCycleHook:
         The context provider will have been set by a parent component. If no provider
         is found, ``None`` is returned.
         """
-        return self._context_providers.get(context)
+        provider_hook = self._find_context_provider_hook(context)
+        if provider_hook is None:
+            return None
+        return provider_hook._context_providers[context]
+
+    def subscribe_to_context(
+        self,
+        context: Context[T],
+        subscription: ContextSubscription | None = None,
+    ) -> ContextProvider[T] | None:
+        """Get a context provider like :meth:`get_context_provider`, and schedule this
+        hook's component to render whenever the provider's value changes.
+
+        If a subscription is given, the component is only scheduled to render if it
+        (or another of the component's subscriptions) says that the change affects it.
+        Subscriptions last until the component renders again or is unmounted, so they
+        must be renewed on each render.
+        """
+        provider_hook = self._find_context_provider_hook(context)
+        if provider_hook is None:
+            return None
+        if provider_hook._context_subscribers is None:
+            provider_hook._context_subscribers = {}
+        subscribers = provider_hook._context_subscribers.get(context)
+        if subscribers is None:
+            subscribers = provider_hook._context_subscribers[context] = (
+                WeakKeyDictionary()
+            )
+        if self not in subscribers:
+            self._context_subscriptions.append(subscribers)
+        if subscription is None:
+            subscribers[self] = None
+        elif self not in subscribers:
+            subscribers[self] = {subscription}
+        elif (subscriptions := subscribers[self]) is not None:
+            subscriptions.add(subscription)
+        return provider_hook._context_providers[context]
+
+    def _unsubscribe_from_contexts(self) -> None:
+        for subscribers in self._context_subscriptions:
+            subscribers.pop(self, None)
+        self._context_subscriptions.clear()
+
+    def _find_context_provider_hook(
+        self, context: Context[Any]
+    ) -> LifeCycleHook | None:
+        hook: LifeCycleHook | None = self
+        while hook is not None:
+            if context in hook._context_providers:
+                return hook
+            hook = hook._parent
+        return None
 
     async def affect_component_will_render(self, component: Component) -> None:
         """The component is about to render"""
         await self._render_access.acquire()
         self._scheduled_render = False
+        # the contexts used by this render subscribe it again
+        self._unsubscribe_from_contexts()
         self.component = component
         self.set_current()
 
@@ -228,28 +372,63 @@ class LifeCycleHook:
         """The component completed a render"""
         self.unset_current()
         self._rendered_atleast_once = True
+        self._restored_state = None
         self._current_state_index = 0
         self._render_access.release()
         del self.component
 
     async def affect_layout_did_render(self) -> None:
         """The layout completed a render"""
-        stop = Event()
-        self._effect_stops.append(stop)
-        self._effect_tasks.extend(create_task(e(stop)) for e in self._effect_funcs)
-        self._effect_funcs.clear()
+        if self._pending_effects:
+            # Like the tasks below, run them once the update has been sent
+            get_running_loop().call_soon(self._run_pending_effects)
+        if self._effect_funcs:
+            stop = Event()
+            self._effect_stops.append(stop)
+            self._effect_tasks.extend(create_task(e(stop)) for e in self._effect_funcs)
+            self._effect_funcs.clear()
 
     async def affect_component_will_unmount(self) -> None:
         """The component is about to be removed from the layout"""
-        for stop in self._effect_stops:
-            stop.set()
-        self._effect_stops.clear()
         try:
-            await gather(*self._effect_tasks)
+            await gather(*self.stop_effects())
         except Exception:
             logger.exception("Error in effect")
-        finally:
-            self._effect_tasks.clear()
+
+    def stop_effects(self) -> list[Task[None]]:
+        """Start cleaning up this hook's effects before the component is unmounted
+
+        The component's context subscriptions are removed as well. Returns the tasks
+        which must be awaited for the clean-up to finish. A layout unmounting many
+        components can stop all of their effects before awaiting any.
+        """
+        self._unsubscribe_from_contexts()
+        self._run_pending_effects()
+        tasks = self._effect_tasks
+        self._effect_tasks = []
+        for effect in self._effects:
+            try:
+                task = effect.stop()
+            except Exception:
+                logger.exception("Error in effect")
+            else:
+                if task is not None:
+                    tasks.append(task)
+        self._effects.clear()
+        for stop in self._effect_stops:
+            stop.set()
+        self._effect_stops.clear()
+        return tasks
+
+    def _run_pending_effects(self) -> None:
+        effects = list(self._pending_effects)
+        self._pending_effects.clear()
+        for effect in effects:
+            self._effects[effect] = None
+            try:
+                effect.run()
+            except Exception:
+                logger.exception("Error in effect")
 
     def set_current(self) -> None:
         """Set this hook as the active hook in this thread
@@ -259,8 +438,8 @@ class LifeCycleHook:
         """
         hook_stack = HOOK_STACK.get()
         if hook_stack:
-            parent = hook_stack[-1]
-            self._context_providers.update(parent._context_providers)
+            # A component rendered on its own keeps the parent it was last rendered by
+            self._parent = hook_stack[-1]
         hook_stack.append(self)
 
     def unset_current(self) -> None:
@@ -0,0 +1,332 @@
+"""
+Compute and apply fine-grained changes between two rendered VDOM models.
+
+The changes follow the shape of `JSON Patch <https://datatracker.ietf.org/doc/html/rfc6902>`__
+operations, with paths given as JSON Pointers relative to the model being diffed.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Any
+
+from reactpy.types import LayoutPatchOperation
+
+# Mapping-like fields of a model which are diffed key-by-key.
+_MAPPING_FIELDS = ("attributes", "eventHandlers", "inlineJavaScript")
+
+# Scalar fields of a model which are replaced as a whole when they change.
+_SCALAR_FIELDS = ("error",)
+
+_EMPTY_KEYS: Mapping[int, Any] = {}
+
+
+def diff_models(
+    old: Any, new: Any, keys: Mapping[int, Any] | None = None
+) -> list[LayoutPatchOperation]:
+    """Return the operations which transform the ``old`` model into the ``new`` one.
+
+    Elements whose ``tagName``, ``key``, or ``importSource`` differ are replaced as a
+    whole since the client would need to re-create them anyway.
+
+    Parameters:
+        old: The model as it was last sent.
+        new: The model to send now.
+        keys:
+            Keys for models which don't have one in their attributes (such as those of
+            keyed components), by the ``id()`` of the model.
+    """
+    changes: list[LayoutPatchOperation] = []
+    _diff_model(old, new, "", changes, _EMPTY_KEYS if keys is None else keys)
+    return changes
+
+
+def apply_model_changes(
+    model: Any, changes: list[LayoutPatchOperation], base_path: str = ""
+) -> Any:
+    """Apply the given operations to ``model`` in place and return the result.
+
+    The paths of each change are taken to be relative to the given ``base_path``. A new
+    object is returned only when an operation replaces the model itself.
+    """
+    for change in changes:
+        path = base_path + change["path"]
+        if not path:
+            model = _change_value(change)
+            continue
+        *parent_tokens, last_token = _parse_pointer(path)
+        parent = _resolve_tokens(model, parent_tokens)
+        if change["op"] == "move":
+            if "from" not in change:
+                msg = f"Move operation at {change['path']!r} has no 'from' path"
+                raise ValueError(msg)
+            *from_parent_tokens, from_token = _parse_pointer(base_path + change["from"])
+            from_parent = _resolve_tokens(model, from_parent_tokens)
+            value = from_parent.pop(
+                int(from_token) if isinstance(from_parent, list) else from_token
+            )
+            _insert_value(parent, last_token, value)
+        elif change["op"] == "add":
+            _insert_value(parent, last_token, _change_value(change))
+        elif change["op"] == "remove":
+            del parent[int(last_token) if isinstance(parent, list) else last_token]
+        elif isinstance(parent, list):
+            parent[int(last_token)] = _change_value(change)
+        else:
+            parent[last_token] = _change_value(change)
+    return model
+
+
+def copy_model(model: Any) -> Any:
+    """Return a deep copy of a JSON-like model"""
+    if isinstance(model, dict):
+        return {k: copy_model(v) for k, v in model.items()}
+    if isinstance(model, list):
+        return [copy_model(v) for v in model]
+    return model
+
+
+def escape_pointer_token(token: str) -> str:
+    """Escape a single JSON Pointer reference token"""
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _change_value(change: LayoutPatchOperation) -> Any:
+    if "value" not in change:
+        msg = (
+            f"{change['op'].capitalize()} operation at {change['path']!r} has no value"
+        )
+        raise ValueError(msg)
+    return change["value"]
+
+
+def _diff_model(
+    old: Any,
+    new: Any,
+    path: str,
+    changes: list[LayoutPatchOperation],
+    keys: Mapping[int, Any],
+) -> None:
+    if old is new:
+        return None
+
+    if not (
+        isinstance(old, dict)
+        and isinstance(new, dict)
+        and old.get("tagName") == new.get("tagName")
+        and old.get("importSource") == new.get("importSource")
+        and _model_key(old, keys) == _model_key(new, keys)
+    ):
+        if old != new:
+            changes.append({"op": "replace", "path": path, "value": new})
+        return None
+
+    for field in _SCALAR_FIELDS:
+        _diff_value(old.get(field), new.get(field), f"{path}/{field}", changes)
+
+    for field in _MAPPING_FIELDS:
+        old_mapping, new_mapping = old.get(field), new.get(field)
+        field_path = f"{path}/{field}"
+        if old_mapping is None or new_mapping is None:
+            _diff_value(old_mapping, new_mapping, field_path, changes)
+        else:
+            _diff_mapping(old_mapping, new_mapping, field_path, changes)
+
+    old_children, new_children = old.get("children"), new.get("children")
+    if old_children is None or new_children is None:
+        _diff_value(old_children, new_children, f"{path}/children", changes)
+    else:
+        _diff_children(old_children, new_children, f"{path}/children", changes, keys)
+
+    return None
+
+
+def _diff_value(
+    old: Any, new: Any, path: str, changes: list[LayoutPatchOperation]
+) -> None:
+    if old is None:
+        if new is not None:
+            changes.append({"op": "add", "path": path, "value": new})
+    elif new is None:
+        changes.append({"op": "remove", "path": path})
+    elif old != new:
+        changes.append({"op": "replace", "path": path, "value": new})
+
+
+def _diff_mapping(
+    old: dict[str, Any],
+    new: dict[str, Any],
+    path: str,
+    changes: list[LayoutPatchOperation],
+) -> None:
+    for name in old.keys() - new.keys():
+        changes.append({"op": "remove", "path": f"{path}/{escape_pointer_token(name)}"})
+    for name, value in new.items():
+        if name not in old:
+            changes.append(
+                {
+                    "op": "add",
+                    "path": f"{path}/{escape_pointer_token(name)}",
+                    "value": value,
+                }
+            )
+        elif old[name] != value:
+            changes.append(
+                {
+                    "op": "replace",
+                    "path": f"{path}/{escape_pointer_token(name)}",
+                    "value": value,
+                }
+            )
+
+
+def _diff_children(
+    old: list[Any],
+    new: list[Any],
+    path: str,
+    changes: list[LayoutPatchOperation],
+    keys: Mapping[int, Any],
+) -> None:
+    old_keys, new_keys = _children_keys(old, keys), _children_keys(new, keys)
+    if old_keys is not None and new_keys is not None and set(old_keys) & set(new_keys):
+        _diff_keyed_children(
+            old, new, path, changes, keys, old_keys=old_keys, new_keys=new_keys
+        )
+        return None
+
+    common = min(len(old), len(new))
+    for index in range(common):
+        _diff_model(old[index], new[index], f"{path}/{index}", changes, keys)
+    for index in range(common, len(new)):
+        changes.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+    for index in reversed(range(common, len(old))):
+        changes.append({"op": "remove", "path": f"{path}/{index}"})
+
+    return None
+
+
+def _diff_keyed_children(
+    old: list[Any],
+    new: list[Any],
+    path: str,
+    changes: list[LayoutPatchOperation],
+    keys: Mapping[int, Any],
+    *,
+    old_keys: list[Any],
+    new_keys: list[Any],
+) -> None:
+    """Match children by key so that reordered children are moved, not re-sent"""
+    new_key_set = set(new_keys)
+    for index in reversed(range(len(old))):
+        if old_keys[index] not in new_key_set:
+            changes.append({"op": "remove", "path": f"{path}/{index}"})
+
+    current = [key for key in old_keys if key in new_key_set]
+    current_index_by_key = {key: index for index, key in enumerate(current)}
+
+    # Children whose order relative to each other is unchanged stay where they are.
+    # Every other child is moved (or added) directly before its next sibling, going
+    # from last to first, so that each of those siblings is already in place.
+    stable_keys = {
+        current[index]
+        for index in _longest_increasing_subsequence(
+            [current_index_by_key[k] for k in new_keys if k in current_index_by_key]
+        )
+    }
+    for new_index in reversed(range(len(new_keys))):
+        key = new_keys[new_index]
+        if key in stable_keys:
+            continue
+        if key in current_index_by_key:
+            from_index = current.index(key)
+            del current[from_index]
+        else:
+            from_index = None
+        to_index = (
+            current.index(new_keys[new_index + 1])
+            if new_index + 1 < len(new_keys)
+            else len(current)
+        )
+        current.insert(to_index, key)
+        if from_index is None:
+            changes.append(
+                {"op": "add", "path": f"{path}/{to_index}", "value": new[new_index]}
+            )
+        elif from_index != to_index:
+            changes.append(
+                {
+                    "op": "move",
+                    "from": f"{path}/{from_index}",
+                    "path": f"{path}/{to_index}",
+                }
+            )
+
+    old_by_key = dict(zip(old_keys, old, strict=True))
+    for new_index, key in enumerate(new_keys):
+        if key in current_index_by_key:
+            _diff_model(
+                old_by_key[key], new[new_index], f"{path}/{new_index}", changes, keys
+            )
+
+
+def _children_keys(children: list[Any], keys: Mapping[int, Any]) -> list[Any] | None:
+    """The keys of the given children, or ``None`` unless each has a unique key"""
+    children_keys = [
+        _model_key(child, keys) if isinstance(child, dict) else None
+        for child in children
+    ]
+    if None in children_keys or len(set(children_keys)) != len(children_keys):
+        return None
+    return children_keys
+
+
+def _longest_increasing_subsequence(values: list[int]) -> list[int]:
+    """Return the values of a longest strictly increasing subsequence"""
+    # tails[i] is the index of the smallest value that ends an increasing run of i + 1
+    tails: list[int] = []
+    tail_values: list[int] = []
+    previous: list[int | None] = []
+    for index, value in enumerate(values):
+        position = bisect_left(tail_values, value)
+        previous.append(tails[position - 1] if position else None)
+        if position == len(tails):
+            tails.append(index)
+            tail_values.append(value)
+        else:
+            tails[position] = index
+            tail_values[position] = value
+
+    result: list[int] = []
+    index_or_none = tails[-1] if tails else None
+    while index_or_none is not None:
+        result.append(values[index_or_none])
+        index_or_none = previous[index_or_none]
+    result.reverse()
+    return result
+
+
+def _model_key(model: dict[str, Any], keys: Mapping[int, Any]) -> Any:
+    attributes = model.get("attributes")
+    if attributes and "key" in attributes:
+        return attributes["key"]
+    return keys.get(id(model))
+
+
+def _insert_value(parent: Any, token: str, value: Any) -> None:
+    if isinstance(parent, list):
+        parent.insert(len(parent) if token == "-" else int(token), value)
+    else:
+        parent[token] = value
+
+
+def _parse_pointer(pointer: str) -> list[str]:
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]
+    ]
+
+
+def _resolve_tokens(model: Any, tokens: list[str]) -> Any:
+    for token in tokens:
+        model = model[int(token)] if isinstance(model, list) else model[token]
+    return model
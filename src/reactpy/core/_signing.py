@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import hmac
+import pickle
+from hashlib import sha256
+from io import BytesIO
+
+SIGNATURE_SIZE = sha256().digest_size
+"""The number of bytes a signature adds to the data it signs"""
+
+
+class SignedUnpickler(pickle.Unpickler):
+    """Unpickles data only if it was signed with the given key
+
+    Unpickling may run arbitrary code, so the data must have come from a process which
+    knows the key.
+    """
+
+    def __init__(self, key: bytes, signed_data: bytes) -> None:
+        signature = signed_data[:SIGNATURE_SIZE]
+        data = signed_data[SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, hmac.digest(key, data, sha256)):
+            msg = "Data has an invalid signature"
+            raise pickle.UnpicklingError(msg)
+        super().__init__(BytesIO(data))
+
+
+def sign(key: bytes, data: bytes) -> bytes:
+    """Prefix the data with its signature, for loading with :class:`SignedUnpickler`"""
+    return hmac.digest(key, data, sha256) + data
@@ -3,30 +3,68 @@ from __future__ import annotations
 import inspect
 from collections.abc import Callable
 from functools import wraps
-from typing import Any
+from typing import Any, Literal, overload
 
-from reactpy.types import Component, VdomDict
+from reactpy.types import Component, PropsComparator, VdomDict
+
+_RenderFunc = Callable[..., Component | VdomDict | str | None]
+
+
+@overload
+def component(function: _RenderFunc) -> Callable[..., Component]: ...
+
+
+@overload
+def component(
+    function: None = None,
+    *,
+    memo: bool | PropsComparator = ...,
+    offload: Literal["thread"] | None = ...,
+) -> Callable[[_RenderFunc], Callable[..., Component]]: ...
 
 
 def component(
-    function: Callable[..., Component | VdomDict | str | None],
-) -> Callable[..., Component]:
+    function: _RenderFunc | None = None,
+    *,
+    memo: bool | PropsComparator = False,
+    offload: Literal["thread"] | None = None,
+) -> Callable[..., Component] | Callable[[_RenderFunc], Callable[..., Component]]:
     """A decorator for defining a new component.
 
     Parameters:
         function: The component's :meth:`reactpy.core.proto.ComponentType.render` function.
+        memo:
+            Skip re-rendering this component when its parent re-renders with the same
+            props. If ``True``, each prop is compared with
+            :func:`~reactpy.core.hooks.strictly_equal`. Otherwise, a function which
+            accepts the old and new props (as dictionaries of bound arguments) and
+            returns whether they are equal.
+        offload:
+            Where to run the render function instead of the event loop. With
+            ``"thread"``, it runs in a worker thread, so that slow renders do not hold
+            up the rest of the server. Hooks may be used as usual, but the render
+            function must not touch anything belonging to the event loop.
     """
-    sig = inspect.signature(function)
+    if offload not in (None, "thread"):
+        msg = f"Unsupported offload {offload!r} - expected 'thread' or None"
+        raise ValueError(msg)
+
+    def decorator(function: _RenderFunc) -> Callable[..., Component]:
+        sig = inspect.signature(function)
+
+        if "key" in sig.parameters and sig.parameters["key"].kind in (
+            inspect.Parameter.KEYWORD_ONLY,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        ):
+            msg = f"Component render function {function} uses reserved parameter 'key'"
+            raise TypeError(msg)
 
-    if "key" in sig.parameters and sig.parameters["key"].kind in (
-        inspect.Parameter.KEYWORD_ONLY,
-        inspect.Parameter.POSITIONAL_OR_KEYWORD,
-    ):
-        msg = f"Component render function {function} uses reserved parameter 'key'"
-        raise TypeError(msg)
+        @wraps(function)
+        def constructor(*args: Any, key: Any | None = None, **kwargs: Any) -> Component:
+            return Component(
+                function, key, args, kwargs, sig, memo=memo, offload=offload
+            )
 
-    @wraps(function)
-    def constructor(*args: Any, key: Any | None = None, **kwargs: Any) -> Component:
-        return Component(function, key, args, kwargs, sig)
+        return constructor
 
-    return constructor
+    return decorator(function) if function is not None else decorator
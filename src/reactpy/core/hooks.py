@@ -5,7 +5,7 @@ import contextlib
 import inspect
 from collections.abc import Callable, Coroutine, Sequence
 from logging import getLogger
-from types import FunctionType
+from types import CodeType, FunctionType
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -16,6 +16,7 @@ from typing import (
     cast,
     overload,
 )
+from weakref import WeakKeyDictionary
 
 from reactpy.config import REACTPY_DEBUG
 from reactpy.core._life_cycle_hook import HOOK_STACK
@@ -49,6 +50,7 @@ __all__ = [
 logger = getLogger(__name__)
 
 _Type = TypeVar("_Type")
+_Selected = TypeVar("_Selected")
 
 
 @overload
@@ -77,6 +79,9 @@ def use_state(initial_value: _Type | Callable[[], _Type]) -> State[_Type]:
     return State(current_state.value, current_state.dispatch)  # type: ignore
 
 
+_NOT_RESTORED: Any = object()
+
+
 class _CurrentState(Generic[_Type]):
     __slots__ = "dispatch", "value"
 
@@ -84,8 +89,11 @@ class _CurrentState(Generic[_Type]):
         self,
         initial_value: _Type | Callable[[], _Type],
     ) -> None:
-        self.value = initial_value() if callable(initial_value) else initial_value
         hook = HOOK_STACK.current_hook()
+        value = hook.restored_state(_NOT_RESTORED)
+        if value is _NOT_RESTORED:
+            value = initial_value() if callable(initial_value) else initial_value
+        self.value = value
 
         def dispatch(new: _Type | Callable[[_Type], _Type]) -> None:
             next_value = new(self.value) if callable(new) else new  # type: ignore
@@ -145,7 +153,7 @@ def use_effect(
     hook = HOOK_STACK.current_hook()
     dependencies = _try_to_infer_closure_values(function, dependencies)
     memoize = use_memo(dependencies=dependencies)
-    cleanup_func: Ref[_EffectCleanFunc | None] = use_ref(None)
+    effect: _SyncEffect = _use_const(_SyncEffect)
 
     def decorator(func: _SyncEffectFunc) -> None:
         if inspect.iscoroutinefunction(func):
@@ -154,20 +162,11 @@ def use_effect(
                 "Use `use_async_effect` instead."
             )
 
-        async def effect(stop: asyncio.Event) -> None:
-            run_effect_cleanup(cleanup_func)
-
-            # Execute the effect and store the clean-up function
-            cleanup_func.current = func()
-
-            # Wait until we get the signal to stop this effect
-            await stop.wait()
+        def schedule() -> None:
+            effect.function = func
+            hook.schedule_effect(effect)
 
-            # Run the clean-up function when the effect is stopped,
-            # if it hasn't been run already by a new effect
-            run_effect_cleanup(cleanup_func)
-
-        return memoize(lambda: hook.add_effect(effect))
+        return memoize(schedule)
 
     # Handle decorator usage
     if function:
@@ -227,62 +226,14 @@ def use_async_effect(
     hook = HOOK_STACK.current_hook()
     dependencies = _try_to_infer_closure_values(function, dependencies)
     memoize = use_memo(dependencies=dependencies)
-    cleanup_func: Ref[_EffectCleanFunc | None] = use_ref(None)
-    pending_task: Ref[asyncio.Task[_EffectCleanFunc | None] | None] = use_ref(None)
+    effect: _AsyncEffect = _use_const(lambda: _AsyncEffect(shield))
 
     def decorator(func: _AsyncEffectFunc) -> None:
-        async def effect(stop: asyncio.Event) -> None:
-            # Make sure we always clean up the previous effect's resources
-            if pending_task.current:
-                previous_task = pending_task.current
-                if not shield:
-                    previous_task.cancel()
-                with contextlib.suppress(asyncio.CancelledError):
-                    await previous_task
-                if pending_task.current is previous_task:
-                    pending_task.current = None
-
-            run_effect_cleanup(cleanup_func)
-
-            # Execute the effect and store the clean-up function.
-            # We run this in a task so it can be cancelled if the stop signal
-            # is set before the effect completes.
-            task = asyncio.create_task(func())
-            pending_task.current = task
-
-            # Wait for either the effect to complete or the stop signal
-            stop_task = asyncio.create_task(stop.wait())
-            done, _ = await asyncio.wait(
-                [task, stop_task],
-                return_when=asyncio.FIRST_COMPLETED,
-            )
+        def schedule() -> None:
+            effect.function = func
+            hook.schedule_effect(effect)
 
-            # If the effect completed first, store the cleanup function
-            if task in done:
-                pending_task.current = None
-                with contextlib.suppress(asyncio.CancelledError):
-                    cleanup_func.current = task.result()
-                # Cancel the stop task since we don't need it anymore
-                stop_task.cancel()
-                with contextlib.suppress(asyncio.CancelledError):
-                    await stop_task
-                # Now wait for the stop signal to run cleanup
-                await stop.wait()
-            # Stop signal came first - cancel the effect task
-            else:
-                # Prevent task cancellation if the user enabled shielding
-                if not shield:
-                    task.cancel()
-                with contextlib.suppress(asyncio.CancelledError):
-                    cleanup_func.current = await task
-                if pending_task.current is task:
-                    pending_task.current = None
-
-            # Run the clean-up function when the effect is stopped,
-            # if it hasn't been run already by a new effect
-            run_effect_cleanup(cleanup_func)
-
-        return memoize(lambda: hook.add_effect(effect))
+        return memoize(schedule)
 
     # Handle decorator usage
     if function:
@@ -348,8 +299,38 @@ def use_context(context: Context[_Type]) -> _Type:
     See the full :ref:`Use Context` docs for more information.
     """
     hook = HOOK_STACK.current_hook()
-    provider = hook.get_context_provider(context)
+    return _context_value(context, hook.subscribe_to_context(context))
+
+
+def use_context_selector(
+    context: Context[_Type], selector: Callable[[_Type], _Selected]
+) -> _Selected:
+    """Get part of the current value for the given context type.
+
+    Unlike :func:`use_context`, a change to the context's value only causes the
+    component to render if the part returned by ``selector`` changed too, as determined
+    by :func:`strictly_equal`.
+
+    Parameters:
+        context:
+            The context type, as returned by :func:`create_context`.
+        selector:
+            Gets the part of the context's value which the component uses.
+
+    Returns:
+        The selected part of the current value.
+    """
+    hook = HOOK_STACK.current_hook()
+    selection: _ContextSelection[_Type, _Selected] = _use_const(_ContextSelection)
+    provider = hook.subscribe_to_context(context, selection)
+    selection.selector = selector
+    selection.value = selector(_context_value(context, provider))
+    return selection.value
+
 
+def _context_value(
+    context: Context[_Type], provider: ContextProvider[_Type] | None
+) -> _Type:
     if provider is None:
         # same assertions but with normal exceptions
         if not isinstance(context, FunctionType):
@@ -363,6 +344,22 @@ def use_context(context: Context[_Type]) -> _Type:
     return provider.value
 
 
+class _ContextSelection(Generic[_Type, _Selected]):
+    """The part of a context's value which a ``use_context_selector`` hook selected"""
+
+    __slots__ = ("selector", "value")
+
+    selector: Callable[[_Type], _Selected]
+    value: _Selected
+
+    def changed(self, value: _Type) -> bool:
+        try:
+            return not strictly_equal(self.selector(value), self.value)
+        except Exception:
+            # let the error surface when the component renders
+            return True
+
+
 # backend implementations should establish this context at the root of an app
 ConnectionContext: Context[Connection[Any] | None] = create_context(None)
 
@@ -565,7 +562,76 @@ def use_ref(initial_value: _Type) -> Ref[_Type]:
     Returns:
         A :class:`Ref` object.
     """
-    return _use_const(lambda: Ref(initial_value))
+    return _use_const(
+        lambda: Ref(HOOK_STACK.current_hook().restored_state(initial_value))
+    )
+
+
+class _SyncEffect:
+    """The current run of a ``use_effect`` hook, which is applied without a task"""
+
+    __slots__ = ("cleanup_func", "function")
+
+    def __init__(self) -> None:
+        self.function: _SyncEffectFunc | None = None
+        self.cleanup_func: Ref[_EffectCleanFunc | None] = Ref(None)
+
+    def run(self) -> None:
+        run_effect_cleanup(self.cleanup_func)
+        if self.function is not None:
+            self.cleanup_func.current = self.function()
+
+    def stop(self) -> None:
+        run_effect_cleanup(self.cleanup_func)
+
+
+class _AsyncEffect:
+    """The current run of a ``use_async_effect`` hook
+
+    Each run is a task which ends once the effect has been applied. The task of the next
+    run, or of stopping the effect, first cancels and awaits it, then cleans up.
+    """
+
+    __slots__ = ("cleanup_func", "function", "shield", "task")
+
+    def __init__(self, shield: bool) -> None:
+        self.shield = shield
+        self.function: _AsyncEffectFunc | None = None
+        self.cleanup_func: Ref[_EffectCleanFunc | None] = Ref(None)
+        self.task: asyncio.Task[None] | None = None
+
+    def run(self) -> None:
+        self.task = asyncio.create_task(self._apply(self.task, self.function))
+
+    def stop(self) -> asyncio.Task[None] | None:
+        if self.task is None or self.task.done():
+            self.task = None
+            run_effect_cleanup(self.cleanup_func)
+            return None
+        self.task = asyncio.create_task(self._apply(self.task, None))
+        return self.task
+
+    async def _apply(
+        self,
+        previous: asyncio.Task[None] | None,
+        function: _AsyncEffectFunc | None,
+    ) -> None:
+        if previous is not None and not previous.done():
+            if not self.shield:
+                previous.cancel()
+            try:
+                await previous
+            except asyncio.CancelledError:
+                # only the previous run was cancelled, unless this one was too
+                task = asyncio.current_task()
+                if task is not None and task.cancelling():
+                    raise
+        try:
+            run_effect_cleanup(self.cleanup_func)
+            if function is not None:
+                self.cleanup_func.current = await function()
+        except Exception:
+            logger.exception("Error in effect")
 
 
 def _use_const(function: Callable[[], _Type]) -> _Type:
@@ -600,39 +666,24 @@ def strictly_equal(x: Any, y: Any) -> bool:
     - ``bytes``
     - ``bytearray``
     - ``memoryview``
+
+    Lambdas and local functions are equal if they have the same code.
     """
+    if x is y:
+        # NaN is the only value of these types which is not equal to itself
+        return type(x) not in _SELF_UNEQUAL_TYPES or x == y
+
     # Return early if the objects are not the same type
     if type(x) is not type(y):
         return False
 
-    # Compare the source code of lambda and local functions
-    if (
-        getattr(x, "__qualname__", "")
-        and getattr(y, "__qualname__", "")
-        and ("<lambda>" in x.__qualname__ or "<locals>" in x.__qualname__)
-        and ("<lambda>" in y.__qualname__ or "<locals>" in y.__qualname__)
-        and hasattr(x, "__code__")
-        and hasattr(y, "__code__")
-    ):
+    # Compare the code of lambda and local functions
+    if _is_local_function(x) and _is_local_function(y):
         if x.__qualname__ != y.__qualname__:
             return False
-
-        return all(
-            getattr(x.__code__, attr) == getattr(y.__code__, attr)
-            for attr in dir(x.__code__)
-            if attr.startswith("co_")
-            and attr
-            not in {
-                "co_positions",
-                "co_linetable",
-                "co_lines",
-                "co_lnotab",
-                "co_branches",
-                "co_firstlineno",
-                "co_end_lineno",
-                "co_col_offset",
-                "co_end_col_offset",
-            }
+        # Functions defined by the same statement share their code object
+        return x.__code__ is y.__code__ or (
+            _code_fingerprint(x.__code__) == _code_fingerprint(y.__code__)
         )
 
     # Check via the `==` operator if possible
@@ -644,6 +695,54 @@ def strictly_equal(x: Any, y: Any) -> bool:
     return x is y  # nocov
 
 
+_SELF_UNEQUAL_TYPES = (float, complex)
+"""Types with a value, NaN, which is not equal to itself"""
+
+
+def _is_local_function(value: Any) -> bool:
+    if not callable(value):
+        return False
+    qualname = getattr(value, "__qualname__", "")
+    return (
+        bool(qualname)
+        and ("<lambda>" in qualname or "<locals>" in qualname)
+        and hasattr(value, "__code__")
+    )
+
+
+_CODE_FINGERPRINT_ATTRS = tuple(
+    sorted(
+        attr
+        for attr in dir(CodeType)
+        if attr.startswith("co_")
+        and attr
+        not in {
+            "co_positions",
+            "co_linetable",
+            "co_lines",
+            "co_lnotab",
+            "co_branches",
+            "co_firstlineno",
+            "co_end_lineno",
+            "co_col_offset",
+            "co_end_col_offset",
+        }
+    )
+)
+"""Attributes of code objects which are compared, leaving out where the code is"""
+
+_code_fingerprints: WeakKeyDictionary[CodeType, tuple[Any, ...]] = WeakKeyDictionary()
+
+
+def _code_fingerprint(code: CodeType) -> tuple[Any, ...]:
+    fingerprint = _code_fingerprints.get(code)
+    if fingerprint is None:
+        fingerprint = _code_fingerprints[code] = tuple(
+            getattr(code, attr) for attr in _CODE_FINGERPRINT_ATTRS
+        )
+    return fingerprint
+
+
 def run_effect_cleanup(cleanup_func: Ref[_EffectCleanFunc | None]) -> None:
     if cleanup_func.current:
         cleanup_func.current()
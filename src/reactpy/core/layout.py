@@ -1,21 +1,29 @@
 from __future__ import annotations
 
 from asyncio import (
-    FIRST_COMPLETED,
     CancelledError,
+    Future,
+    Lock,
     Queue,
+    QueueEmpty,
     Task,
     create_task,
     current_task,
+    gather,
     get_running_loop,
     sleep,
+    to_thread,
     wait,
+    wait_for,
 )
 from collections import Counter
-from collections.abc import Callable
+from collections.abc import Callable, Iterator, Mapping
 from contextlib import AsyncExitStack, suppress
+from contextvars import ContextVar
+from itertools import count
 from logging import getLogger
-from types import TracebackType
+from time import monotonic
+from types import MappingProxyType, TracebackType
 from typing import (
     Any,
     Generic,
@@ -25,20 +33,23 @@ from typing import (
     TypeVar,
     cast,
 )
-from uuid import uuid4
 from weakref import ref as weakref
 
-from anyio import Semaphore
-
 from reactpy.config import (
     REACTPY_ASYNC_RENDERING,
     REACTPY_CHECK_VDOM_SPEC,
     REACTPY_DEBUG,
+    REACTPY_DIFF_UPDATES,
+    REACTPY_MAX_CONCURRENT_RENDERS,
     REACTPY_MAX_QUEUE_SIZE,
+    REACTPY_RENDER_BATCH_WINDOW,
+    REACTPY_RENDER_SLICE_MS,
 )
 from reactpy.core._life_cycle_hook import HOOK_STACK, LifeCycleHook
+from reactpy.core._model_diff import copy_model, diff_models
 from reactpy.core.vdom import validate_vdom_json
 from reactpy.types import (
+    BaseEventHandler,
     BaseLayout,
     Component,
     Context,
@@ -46,42 +57,59 @@ from reactpy.types import (
     Event,
     EventHandlerDict,
     Key,
+    LayoutBatchMessage,
     LayoutEventMessage,
+    LayoutPatchMessage,
     LayoutUpdateMessage,
+    StaticVdomDict,
     VdomChild,
     VdomJson,
 )
-from reactpy.utils import Ref
 
 logger = getLogger(__name__)
 
+# The task running an event handler, if any. Renders scheduled by event handlers
+# respond directly to the user, so they take priority over any others. Tasks which a
+# handler spawns inherit this, so they compare it with themselves to tell them apart.
+_HANDLING_EVENT: ContextVar[Task[Any] | None] = ContextVar(
+    "handling_event", default=None
+)
+
+_MAX_URGENT_BATCHES = 8
+"""The most batches in a row which may defer renders not scheduled by event handlers"""
+
 
 class Layout(BaseLayout):
-    def __init__(self, root: Component | Context[Any] | ContextProvider[Any]) -> None:
+    def __init__(
+        self,
+        root: Component | Context[Any] | ContextProvider[Any],
+        saved_state: dict[str, dict[int, Any]] | None = None,
+    ) -> None:
         super().__init__()
         if not isinstance(root, Component):
             msg = f"Expected a ReactPy component, not {type(root)!r}."
             raise TypeError(msg)
         self.root = root
+        # State from Layout.save_state, given to each component when it first renders.
+        # It is kept until then, however many renders later that is.
+        self._saved_state = dict(saved_state) if saved_state else {}
 
     async def __aenter__(self) -> Layout:
         # create attributes here to avoid access before entering context manager
-        self._event_handlers: EventHandlerDict = {}
+        self._event_handlers = _EventHandlers()
         self._event_queues: dict[str, Queue[LayoutEventMessage | dict[str, Any]]] = {}
         self._event_processing_tasks: dict[str, Task[None]] = {}
-        self._render_tasks: set[Task[LayoutUpdateMessage]] = set()
-        self._render_tasks_by_id: dict[
-            _LifeCycleStateId, Task[LayoutUpdateMessage]
-        ] = {}
-        self._render_tasks_ready: Semaphore = Semaphore(0)
-        # Maps a running render task back to the component it belongs to.
-        # Used by the stale-render detection in `_parallel_render` to drop
-        # out-of-order completions when async rendering is enabled and a
-        # newer render for the same component has already been scheduled.
-        self._render_task_to_lcs_id: dict[
-            Task[LayoutUpdateMessage], _LifeCycleStateId
-        ] = {}
+        # IDs of components with a scheduled render. Whether a component still needs
+        # to render is tracked by its hook, so it is fine for an ID to linger here after
+        # an ancestor has already re-rendered the component.
         self._rendering_queue: _ThreadSafeQueue[_LifeCycleStateId] = _ThreadSafeQueue()
+        # IDs of components whose render was scheduled while handling an event. These
+        # are rendered ahead of any other scheduled renders.
+        self._urgent_render_ids: set[_LifeCycleStateId] = set()
+        # How many batches in a row have deferred renders to perform urgent ones
+        self._urgent_batches = 0
+        # IDs of the components still to render in the current batch, if any
+        self._batch_render_ids: set[_LifeCycleStateId] | None = None
         # Per-target event sequence tracking. Each incoming layout-event
         # may carry an optional ``seq`` field (assigned by the client)
         # which the server records here so it can be echoed back to the
@@ -90,30 +118,50 @@ class Layout(BaseLayout):
         # processed all keystrokes without relying on a time-based
         # debounce window.
         self._last_event_seq_by_target: dict[str, int] = {}
-        root_model_state = _new_root_model_state(self.root, self._schedule_render_task)
+        # Targets whose handler the current render removed. Their sequence numbers are
+        # only forgotten once it's done, in case an element which remounted in the same
+        # place adds a handler for the target back.
+        self._removed_event_targets: set[str] = set()
+        self._diff_updates = REACTPY_DIFF_UPDATES.current
+        self._render_slice_end: float | None = None
+        root_model_state = _new_root_model_state(self.root, self._schedule_render)
         self._root_life_cycle_state_id = root_id = root_model_state.life_cycle_state.id
         self._model_states_by_life_cycle_state_id = {root_id: root_model_state}
-        self._schedule_render_task(root_id)
+        root_model_state.life_cycle_state.hook.schedule_render()
+        # Rendered updates are numbered by the batch they came from, so that those which
+        # a resync already covers can be skipped.
+        self._rendered_updates: Queue[
+            tuple[int, list[LayoutUpdateMessage | LayoutPatchMessage]]
+        ] = Queue(REACTPY_MAX_QUEUE_SIZE.current)
+        self._render_lock = Lock()
+        self._rendering_batch = False
+        self._render_count = 0
+        self._resynced_render_count = 0
+        self._render_loop_task = create_task(self._render_loop())
 
         return self
 
     async def __aexit__(
         self, exc_type: type[Exception], exc_value: Exception, traceback: TracebackType
     ) -> None:
-        root_csid = self._root_life_cycle_state_id
-        root_model_state = self._model_states_by_life_cycle_state_id[root_csid]
-
-        for t in self._render_tasks:
-            t.cancel()
-            with suppress(CancelledError):
-                await t
+        # Wait rather than await so the cancellation isn't re-raised here. Its traceback
+        # would otherwise keep this frame, and so the model states, alive.
+        self._render_loop_task.cancel()
+        await wait([self._render_loop_task])
 
-        for t in self._event_processing_tasks.values():
+        for t in list(self._event_processing_tasks.values()):
             t.cancel()
             with suppress(CancelledError):
                 await t
 
-        await self._unmount_model_states([root_model_state])
+        # A render cut short above can leave the model tree referring to components it
+        # already unmounted. Every mounted component is still found here though.
+        await self._stop_effects(
+            [
+                model_state.life_cycle_state
+                for model_state in self._model_states_by_life_cycle_state_id.values()
+            ]
+        )
         await self._rendering_queue.close()
 
         # delete attributes here to avoid access after exiting context manager
@@ -121,11 +169,15 @@ class Layout(BaseLayout):
         del self._event_queues
         del self._event_processing_tasks
         del self._rendering_queue
-        del self._render_tasks_by_id
-        del self._render_task_to_lcs_id
+        del self._urgent_render_ids
+        del self._urgent_batches
+        del self._rendered_updates
+        del self._render_lock
+        del self._render_loop_task
         del self._root_life_cycle_state_id
         del self._model_states_by_life_cycle_state_id
         del self._last_event_seq_by_target
+        del self._removed_event_targets
 
     async def deliver(self, event: LayoutEventMessage | dict[str, Any]) -> None:
         """Dispatch an event to the targeted handler"""
@@ -134,16 +186,17 @@ class Layout(BaseLayout):
         # events if the element and the handler exist in the backend. Otherwise
         # we just ignore the event.
         target = event["target"]
-        if target not in self._event_queues:
-            self._event_queues[target] = cast(
+        queue = self._event_queues.get(target)
+        if queue is None:
+            queue = self._event_queues[target] = cast(
                 "Queue[LayoutEventMessage | dict[str, Any]]",
                 Queue(REACTPY_MAX_QUEUE_SIZE.current),
             )
             self._event_processing_tasks[target] = create_task(
-                self._process_event_queue(target, self._event_queues[target])
+                self._process_event_queue(target, queue)
             )
 
-        await self._event_queues[target].put(event)
+        await queue.put(event)
 
         # In test environments, we yield to the event loop to let the processing tasks run.
         if REACTPY_DEBUG.current:
@@ -152,35 +205,45 @@ class Layout(BaseLayout):
     async def _process_event_queue(
         self, target: str, queue: Queue[LayoutEventMessage | dict[str, Any]]
     ) -> None:
+        # The queue and this task only exist while there are events to process, so
+        # that targets which are no longer used, or whose elements have unmounted, do
+        # not each keep an idle task around for the life of the layout.
         while True:
-            event = await queue.get()
-
-            # Record the client-assigned event sequence number (if any)
-            # so we can echo it back as ``ackSeq`` on the originating
-            # element. The client uses this to decide whether the
-            # server has caught up to the latest keystrokes.
-            seq = event.get("seq")
-            if isinstance(seq, int) and seq >= 0:
-                prev = self._last_event_seq_by_target.get(target, -1)
-                if seq > prev:
-                    self._last_event_seq_by_target[target] = seq
-
-            # Retry a few times to handle potential re-render race conditions where
-            # the handler is temporarily removed and then re-added.
-            handler = self._event_handlers.get(target)
-            if handler is None:
-                for _ in range(3):
-                    await sleep(0.01)
-                    handler = self._event_handlers.get(target)
-                    if handler is not None:
-                        break
+            if queue.empty():
+                # Let any delivery which was waiting for room in the queue add its event
+                await sleep(0)
+                if queue.empty():
+                    del self._event_queues[target]
+                    del self._event_processing_tasks[target]
+                    return None
+            event = queue.get_nowait()
+
+            # The handler may be missing because a render in progress has removed it
+            # and is yet to add it back, so wait a moment for it to be registered.
+            handler = await self._event_handlers.wait_for(
+                target, rendering=self._render_lock.locked()
+            )
 
             if handler is not None:
+                # Record the client-assigned event sequence number (if any)
+                # so we can echo it back as ``ackSeq`` on the originating
+                # element. The client uses this to decide whether the
+                # server has caught up to the latest keystrokes.
+                seq = event.get("seq")
+                if isinstance(seq, int) and seq >= 0:
+                    prev = self._last_event_seq_by_target.get(target, -1)
+                    if seq > prev:
+                        self._last_event_seq_by_target[target] = seq
+
                 try:
                     data = [
                         Event(d) if isinstance(d, dict) else d for d in event["data"]
                     ]
-                    await handler.function(data)
+                    token = _HANDLING_EVENT.set(current_task())
+                    try:
+                        await handler.function(data)
+                    finally:
+                        _HANDLING_EVENT.reset(token)
                 except Exception:
                     logger.exception(f"Failed to execute event handler {handler}")
             else:
@@ -189,46 +252,240 @@ class Layout(BaseLayout):
                     "does not exist or its component unmounted"
                 )
 
-    async def render(self) -> LayoutUpdateMessage:
-        if REACTPY_ASYNC_RENDERING.current:
-            return await self._parallel_render()
-        else:  # nocov
-            return await self._serial_render()
+    @property
+    def scheduled_renders(self) -> int:
+        """The number of components waiting for the render loop to render them
+
+        This is the depth of the layout's render queue, which may be monitored to tell
+        whether renders are being scheduled faster than they can be performed.
+        """
+        return len(self._rendering_queue)
+
+    @property
+    def updates_pending(self) -> bool:
+        """Whether any renders are scheduled or running, or their updates are waiting to
+        be returned by :meth:`render`"""
+        return (
+            bool(self._rendering_queue)
+            or self._rendering_batch
+            or not self._rendered_updates.empty()
+        )
+
+    @property
+    def handling_events(self) -> bool:
+        """Whether any delivered events are still waiting for, or running, a handler"""
+        return bool(self._event_processing_tasks)
+
+    async def wait_for_events(self) -> None:
+        """Wait until every event delivered so far has been handled"""
+        while self._event_processing_tasks:
+            await wait(list(self._event_processing_tasks.values()))
 
-    async def _serial_render(self) -> LayoutUpdateMessage:  # nocov
-        """Await the next available render. This will block until a component is updated"""
+    async def render(
+        self,
+    ) -> LayoutUpdateMessage | LayoutPatchMessage | LayoutBatchMessage:
+        while True:
+            render_count, messages = await self._rendered_updates.get()
+            if render_count <= self._resynced_render_count:
+                continue
+            if len(messages) == 1:
+                return messages[0]
+            elif messages:
+                return {"type": "layout-batch", "updates": messages}
+
+    async def resync(self) -> LayoutUpdateMessage | None:
+        """Describe the whole current model instead of the updates not yet rendered.
+
+        This brings a client which missed updates, for example because it reconnected,
+        up to date without re-rendering anything. Updates which were already rendered,
+        but have not been returned by :meth:`render`, are discarded. Returns ``None`` if
+        the first render has not completed yet.
+        """
+        async with self._render_lock:
+            root_model_state = self._model_states_by_life_cycle_state_id[
+                self._root_life_cycle_state_id
+            ]
+            if not hasattr(root_model_state, "model"):
+                return None
+            self._resynced_render_count = self._render_count
+            return {
+                "type": "layout-update",
+                "path": "",
+                "model": _copy_changing_model(root_model_state),
+            }
+
+    def save_state(self) -> dict[str, dict[int, Any]]:
+        """Get the state of every component, which a new layout may be given to restore.
+
+        Only the values of ``use_state`` and ``use_ref`` hooks are saved. They are
+        indexed by the key path of their component, then by the order of the hooks.
+        Restored state which no component has mounted to take yet is saved again.
+        """
+        return {
+            **self._saved_state,
+            **{
+                model_state.key_path: saved
+                for model_state in self._model_states_by_life_cycle_state_id.values()
+                if (saved := model_state.life_cycle_state.hook.save_state())
+            },
+        }
+
+    async def _render_loop(self) -> None:
+        """Render scheduled components in the background as soon as possible"""
         while True:
-            model_state_id = await self._rendering_queue.get()
             try:
-                model_state = self._model_states_by_life_cycle_state_id[model_state_id]
-            except KeyError:
-                logger.debug(
-                    "Did not render component with model state ID "
-                    f"{model_state_id!r} - component already unmounted"
-                )
+                updates = await self._render_batch()
+            except Exception:
+                logger.exception(f"Failed to render {self}")
             else:
-                return await self._create_layout_update(model_state)
+                if updates:
+                    await self._rendered_updates.put((self._render_count, updates))
+            self._rendering_batch = False
 
-    async def _parallel_render(self) -> LayoutUpdateMessage:
-        """Await to fetch the first completed render within our asyncio task group."""
-        while True:
-            await self._render_tasks_ready.acquire()
+    async def _render_batch(
+        self,
+    ) -> list[LayoutUpdateMessage | LayoutPatchMessage]:
+        """Await scheduled renders and perform them, along with any others scheduled
+        within the batch window, from the top of the layout down.
+
+        If any of those renders were scheduled while handling an event, only they are
+        performed and the rest are deferred to the next batch. So that a steady stream
+        of events can't defer them forever, every render is performed once
+        :data:`_MAX_URGENT_BATCHES` batches in a row have deferred some.
+        """
+        lcs_ids = {await self._rendering_queue.get()}
+        self._rendering_batch = True
+
+        # give renders scheduled alongside the first a chance to be queued
+        await sleep(REACTPY_RENDER_BATCH_WINDOW.current / 1000)
+        with suppress(QueueEmpty):
+            while True:
+                lcs_ids.add(self._rendering_queue.get_nowait())
+
+        urgent_ids = lcs_ids & self._urgent_render_ids
+        self._urgent_render_ids -= lcs_ids
+        if (
+            urgent_ids
+            and urgent_ids != lcs_ids
+            and self._urgent_batches < _MAX_URGENT_BATCHES
+        ):
+            for lcs_id in lcs_ids - urgent_ids:
+                self._rendering_queue.put(lcs_id)
+            lcs_ids = urgent_ids
+            self._urgent_batches += 1
+        else:
+            self._urgent_batches = 0
 
-            if not self._render_tasks:  # nocov
-                continue
+        async with self._render_lock:
+            try:
+                return await self._render_scheduled(lcs_ids)
+            finally:
+                self._render_count += 1
+                self._event_handlers.stop_waiting_for_removed()
+                self._forget_removed_event_targets()
+
+    async def _render_scheduled(
+        self, lcs_ids: set[_LifeCycleStateId]
+    ) -> list[LayoutUpdateMessage | LayoutPatchMessage]:
+        """Render the given components, from the top of the layout down
+
+        Components whose render is scheduled by an ancestor while it renders, such as
+        the subscribers of a context provider whose value changed, join the batch.
+        """
+        self._start_render_slice()
+        updates: list[LayoutUpdateMessage | LayoutPatchMessage | None] = []
+        self._batch_render_ids = lcs_ids
+        try:
+            while lcs_ids:
+                model_states = self._get_scheduled_model_states(lcs_ids)
+                # Rendering a component renders its descendants as well, which clears
+                # any render they had scheduled. So only components without a scheduled
+                # ancestor are rendered now. Each of those is the root of a separate
+                # subtree.
+                top_states = [
+                    state
+                    for state in model_states
+                    if not any(
+                        ancestor.life_cycle_state.id in lcs_ids
+                        for ancestor in _iter_component_ancestors(state)
+                    )
+                ]
+                lcs_ids.difference_update(s.life_cycle_state.id for s in top_states)
+                if REACTPY_ASYNC_RENDERING.current:
+                    updates.extend(await self._create_layout_updates(top_states))
+                else:  # nocov
+                    for state in top_states:
+                        updates.append(await self._create_layout_update(state))
+        finally:
+            self._batch_render_ids = None
 
-            done, _ = await wait(self._render_tasks, return_when=FIRST_COMPLETED)
-            update_task: Task[LayoutUpdateMessage] = done.pop()
-            self._render_tasks.discard(update_task)
+        return [u for u in updates if u is not None]
 
-            try:
-                return update_task.result()
-            except CancelledError:  # nocov
-                continue
+    async def _create_layout_updates(
+        self, model_states: list[_ModelState]
+    ) -> list[LayoutUpdateMessage | LayoutPatchMessage | None]:
+        """Re-render the given components concurrently, in a bounded pool of workers"""
+        limit = REACTPY_MAX_CONCURRENT_RENDERS.current
+        if not limit or len(model_states) <= limit:
+            return await gather(*map(self._create_layout_update, model_states))
+
+        logger.debug(
+            f"Rendering {len(model_states)} components with {limit} workers "
+            f"({len(self._rendering_queue)} more scheduled)"
+        )
+        updates: list[LayoutUpdateMessage | LayoutPatchMessage | None] = [None] * len(
+            model_states
+        )
+        indices = iter(range(len(model_states)))
+
+        async def render_next() -> None:
+            for index in indices:
+                updates[index] = await self._create_layout_update(model_states[index])
+
+        await gather(*(render_next() for _ in range(limit)))
+        return updates
+
+    def _start_render_slice(self) -> None:
+        slice_ms = REACTPY_RENDER_SLICE_MS.current
+        self._render_slice_end = monotonic() + slice_ms / 1000 if slice_ms else None
+
+    async def _end_render_slice_if_expired(self) -> None:
+        """Yield to the event loop if the current render slice ran out of time"""
+        if self._render_slice_end is not None and monotonic() >= self._render_slice_end:
+            await sleep(0)
+            self._start_render_slice()
+
+    def _get_scheduled_model_states(
+        self, lcs_ids: set[_LifeCycleStateId]
+    ) -> list[_ModelState]:
+        """Get the model states of the given components which still need to render.
+
+        Components which unmounted, or were re-rendered by an ancestor, since being
+        scheduled are discarded from ``lcs_ids``. The rest are returned in tree order.
+        """
+        model_states: list[_ModelState] = []
+        for lcs_id in list(lcs_ids):
+            model_state = self._model_states_by_life_cycle_state_id.get(lcs_id)
+            if model_state is None:
+                logger.debug(
+                    "Did not render component with model state ID "
+                    f"{lcs_id!r} - component already unmounted"
+                )
+                lcs_ids.discard(lcs_id)
+            elif not model_state.life_cycle_state.hook.render_scheduled:
+                lcs_ids.discard(lcs_id)
+            else:
+                model_states.append(model_state)
+        model_states.sort(key=lambda state: _tree_order_key(state.patch_path))
+        return model_states
 
     async def _create_layout_update(
         self, old_state: _ModelState
-    ) -> LayoutUpdateMessage:
+    ) -> LayoutUpdateMessage | LayoutPatchMessage | None:
+        """Re-render the given component and describe the change to its model.
+
+        Returns ``None`` if diffing updates and the model did not change.
+        """
         token = HOOK_STACK.initialize()
         try:
             component = old_state.life_cycle_state.component
@@ -236,6 +493,8 @@ class Layout(BaseLayout):
                 parent: _ModelState | None = old_state.parent
             except AttributeError:
                 parent = None
+            # there is no model before the first render
+            old_model = getattr(old_state, "model", None)
 
             async with AsyncExitStack() as exit_stack:
                 new_state = await self._render_component(
@@ -248,25 +507,26 @@ class Layout(BaseLayout):
                 )
 
             if parent is not None:
-                parent.children_by_key[new_state.key] = new_state
-                old_parent_model = parent.model.current
-                old_parent_children = old_parent_model.setdefault("children", [])
-                parent.model.current = {
-                    **old_parent_model,
-                    "children": [
-                        *old_parent_children[: new_state.index],
-                        new_state.model.current,
-                        *old_parent_children[new_state.index + 1 :],
-                    ],
-                }
+                parent.set_child_state(new_state.key, new_state)
+                # Update the parent's model in place so this costs the same regardless
+                # of how many siblings there are. Ancestor models which contain the
+                # parent's model stay up to date this way as well.
+                parent_model = cast(dict[str, Any], parent.model)
+                parent_model["children"][new_state.index] = new_state.model
 
             if REACTPY_CHECK_VDOM_SPEC.current:
-                validate_vdom_json(new_state.model.current)
+                validate_vdom_json(new_state.model)
 
+            if self._diff_updates:
+                return _create_layout_patch(
+                    old_model,
+                    new_state,
+                    {} if old_model is None else _component_keys(old_state, new_state),
+                )
             return {
                 "type": "layout-update",
                 "path": new_state.patch_path,
-                "model": new_state.model.current,
+                "model": _copy_changing_model(new_state),
             }
         finally:
             HOOK_STACK.reset(token)
@@ -282,7 +542,7 @@ class Layout(BaseLayout):
     ) -> _ModelState:
         if old_state is None:
             new_state = _make_component_model_state(
-                parent, index, key, component, self._schedule_render_task
+                parent, index, key, component, self._schedule_render
             )
         elif (
             old_state.is_component_state
@@ -290,13 +550,13 @@ class Layout(BaseLayout):
         ):
             await self._unmount_model_states([old_state])
             new_state = _make_component_model_state(
-                parent, index, key, component, self._schedule_render_task
+                parent, index, key, component, self._schedule_render
             )
             old_state = None
         elif not old_state.is_component_state:
             await self._unmount_model_states([old_state])
             new_state = _make_component_model_state(
-                parent, index, key, component, self._schedule_render_task
+                parent, index, key, component, self._schedule_render
             )
             old_state = None
         elif parent is None:
@@ -304,43 +564,42 @@ class Layout(BaseLayout):
             new_state.life_cycle_state = _update_life_cycle_state(
                 old_state.life_cycle_state, component
             )
+        elif _can_reuse_memoized_state(old_state, component):
+            # the subtree of a memoized component is kept as is, only its place changes
+            old_state.set_parent(parent, index)
+            return old_state
         else:
             new_state = _update_component_model_state(
-                old_state, parent, index, component, self._schedule_render_task
+                old_state, parent, index, component, self._schedule_render
             )
 
         life_cycle_state = new_state.life_cycle_state
         life_cycle_hook = life_cycle_state.hook
 
         self._model_states_by_life_cycle_state_id[life_cycle_state.id] = new_state
-
-        # If this component is scheduled to render, we can cancel that task since we
-        # are rendering it now.  We keep the cancelled task in ``_render_tasks`` so
-        # the semaphore token that ``_schedule_render_task`` released is still
-        # paired with an entry the consumer can pick up.  ``asyncio.wait`` returns
-        # cancelled tasks in the done set, and the ``CancelledError`` catch in
-        # ``_parallel_render`` drains the token naturally.
-        if life_cycle_state.id in self._render_tasks_by_id:
-            task = self._render_tasks_by_id[life_cycle_state.id]
-            if task is not current_task():
-                del self._render_tasks_by_id[life_cycle_state.id]
-                self._render_task_to_lcs_id.pop(task, None)
-                task.cancel()
+        if self._saved_state:
+            saved_state = self._saved_state.pop(new_state.key_path, None)
+            if saved_state is not None:
+                life_cycle_hook.restore_state(saved_state)
 
         await life_cycle_hook.affect_component_will_render(component)
         exit_stack.push_async_callback(life_cycle_hook.affect_layout_did_render)
         try:
-            raw_model = component.render()
+            if component.offload == "thread":
+                # The thread runs in a copy of this context, so it shares the hook stack
+                raw_model = await to_thread(component.render)
+            else:
+                raw_model = component.render()
             # wrap the model in a fragment (i.e. tagName="") to ensure components have
             # a separate node in the model state tree. This could be removed if this
             # components are given a node in the tree some other way
-            new_state.model.current = {"tagName": ""}
+            new_state.model = {"tagName": ""}
             await self._render_model_children(
                 exit_stack, old_state, new_state, [raw_model]
             )
         except Exception as error:
             logger.exception(f"Failed to render {component}")
-            new_state.model.current = {
+            new_state.model = {
                 "tagName": "",
                 "error": (
                     f"{type(error).__name__}: {error}" if REACTPY_DEBUG.current else ""
@@ -360,6 +619,11 @@ class Layout(BaseLayout):
         key: Any,
         raw_model: Any,
     ) -> _ModelState:
+        if isinstance(raw_model, StaticVdomDict):
+            return await self._render_static_model(
+                old_state, parent, index, key, raw_model
+            )
+
         if old_state is None:
             new_state = _make_element_model_state(parent, index, key)
         elif old_state.is_component_state:
@@ -370,7 +634,7 @@ class Layout(BaseLayout):
             new_state = _update_element_model_state(old_state, parent, index)
 
         try:
-            new_state.model.current = {"tagName": raw_model["tagName"]}
+            new_state.model = {"tagName": raw_model["tagName"]}
         except Exception as e:  # nocov
             msg = f"Expected a VDOM element dict, not {raw_model}"
             raise ValueError(msg) from e
@@ -378,13 +642,33 @@ class Layout(BaseLayout):
         if key is not None:
             new_state.key = key
         if "importSource" in raw_model:
-            new_state.model.current["importSource"] = raw_model["importSource"]
+            new_state.model["importSource"] = raw_model["importSource"]
         self._render_model_attributes(old_state, new_state, raw_model)
         await self._render_model_children(
             exit_stack, old_state, new_state, raw_model.get("children", [])
         )
         return new_state
 
+    async def _render_static_model(
+        self,
+        old_state: _ModelState | None,
+        parent: _ModelState,
+        index: int,
+        key: Any,
+        raw_model: StaticVdomDict,
+    ) -> _ModelState:
+        # Static subtrees hold no state, so anything which did is unmounted. Otherwise
+        # the model is shared as is, which also lets diffs skip over it.
+        if old_state is not None and (
+            old_state.is_component_state
+            or old_state.children_by_key
+            or old_state.targets_by_event
+        ):
+            await self._unmount_model_states([old_state])
+        new_state = _make_element_model_state(parent, index, key)
+        new_state.model = raw_model.model
+        return new_state
+
     def _render_model_attributes(
         self,
         old_state: _ModelState | None,
@@ -396,11 +680,11 @@ class Layout(BaseLayout):
 
         if "attributes" in raw_model:
             attrs = raw_model["attributes"].copy()
-            new_state.model.current["attributes"] = attrs
+            new_state.model["attributes"] = attrs
 
         if "inlineJavaScript" in raw_model:
             inline_javascript = raw_model["inlineJavaScript"].copy()
-            new_state.model.current["inlineJavaScript"] = inline_javascript
+            new_state.model["inlineJavaScript"] = inline_javascript
 
         if old_state is None:
             self._render_model_event_handlers_without_old_state(
@@ -410,21 +694,20 @@ class Layout(BaseLayout):
             return None
 
         for old_event in set(old_state.targets_by_event).difference(handlers_by_event):
-            old_target = old_state.targets_by_event[old_event]
-            del self._event_handlers[old_target]
+            self._remove_event_handler(old_state.targets_by_event[old_event])
 
         if not handlers_by_event:
             self._inject_event_ack_seq(new_state, raw_model.get("tagName"))
             return None
 
-        model_event_handlers = new_state.model.current["eventHandlers"] = {}
+        model_event_handlers = new_state.model["eventHandlers"] = {}
         for event, handler in handlers_by_event.items():
             if handler.target is not None:
                 target = handler.target
             else:
                 target = f"{new_state.key_path}:{event}"
 
-            new_state.targets_by_event[event] = target
+            new_state.set_event_target(event, target)
             self._event_handlers[target] = handler
             model_event_handlers[event] = self._serialize_event_handler(handler, target)
 
@@ -457,7 +740,7 @@ class Layout(BaseLayout):
                 max_ack = ack
         if max_ack is None:
             return
-        attrs = new_state.model.current.get("attributes")
+        attrs = new_state.model.get("attributes")
         if not isinstance(attrs, dict):
             return
         # Never let ackSeq leak into the user's attributes (it's not a
@@ -473,14 +756,14 @@ class Layout(BaseLayout):
         if not handlers_by_event:
             return None
 
-        model_event_handlers = new_state.model.current["eventHandlers"] = {}
+        model_event_handlers = new_state.model["eventHandlers"] = {}
         for event, handler in handlers_by_event.items():
             if handler.target is not None:
                 target = handler.target
             else:
                 target = f"{new_state.key_path}:{event}"
 
-            new_state.targets_by_event[event] = target
+            new_state.set_event_target(event, target)
             self._event_handlers[target] = handler
             model_event_handlers[event] = self._serialize_event_handler(handler, target)
 
@@ -535,8 +818,9 @@ class Layout(BaseLayout):
                 )
 
         if raw_children:
-            new_state.model.current["children"] = []
+            new_state.model["children"] = []
             for index, (child, child_type, key) in enumerate(children_info):
+                await self._end_render_slice_if_expired()
                 old_child_state = (
                     old_state.children_by_key.get(key)
                     if old_state is not None
@@ -557,48 +841,210 @@ class Layout(BaseLayout):
                     new_child_state = child
 
                 if isinstance(new_child_state, _ModelState):
-                    new_state.append_child(new_child_state.model.current)
-                    new_state.children_by_key[key] = new_child_state
+                    new_state.append_child(new_child_state.model)
+                    new_state.set_child_state(key, new_child_state)
                 else:
                     new_state.append_child(new_child_state)
 
     async def _unmount_model_states(self, old_states: list[_ModelState]) -> None:
+        unmounted: list[_LifeCycleState] = []
         to_unmount = old_states[::-1]  # unmount in reversed order of rendering
         while to_unmount:
             model_state = to_unmount.pop()
 
             for target in model_state.targets_by_event.values():
-                del self._event_handlers[target]
+                self._remove_event_handler(target)
 
             if model_state.is_component_state:
                 life_cycle_state = model_state.life_cycle_state
                 del self._model_states_by_life_cycle_state_id[life_cycle_state.id]
-                await life_cycle_state.hook.affect_component_will_unmount()
+                unmounted.append(life_cycle_state)
 
             to_unmount.extend(model_state.children_by_key.values())
 
-    def _schedule_render_task(self, lcs_id: _LifeCycleStateId) -> None:
-        if not REACTPY_ASYNC_RENDERING.current:
-            self._rendering_queue.put(lcs_id)
+        await self._stop_effects(unmounted)
+
+    async def _stop_effects(self, life_cycle_states: list[_LifeCycleState]) -> None:
+        # Every effect is stopped before any of them is awaited, so their clean-up runs
+        # concurrently rather than one at a time.
+        teardowns = [
+            (life_cycle_state.component, task)
+            for life_cycle_state in life_cycle_states
+            for task in life_cycle_state.hook.stop_effects()
+        ]
+        if not teardowns:
             return None
-        try:
-            model_state = self._model_states_by_life_cycle_state_id[lcs_id]
-        except KeyError:
-            logger.debug(
-                "Did not render component with model state ID "
-                f"{lcs_id!r} - component already unmounted"
-            )
-        else:
-            task = create_task(self._create_layout_update(model_state))
-            self._render_task_to_lcs_id[task] = lcs_id
-            self._render_tasks.add(task)
-            self._render_tasks_by_id[lcs_id] = task
-            self._render_tasks_ready.release()
+        results = await gather(*(task for _, task in teardowns), return_exceptions=True)
+        for (component, _), result in zip(teardowns, results, strict=True):
+            if isinstance(result, Exception):
+                logger.error(f"Error in effect of {component}", exc_info=result)
+        return None
+
+    def _remove_event_handler(self, target: str) -> None:
+        del self._event_handlers[target]
+        self._removed_event_targets.add(target)
+
+    def _forget_removed_event_targets(self) -> None:
+        # A handler which was added back for the same target, for example by an input
+        # which remounted in the same place, keeps the events it acknowledged. The
+        # client's pending changes were made against them.
+        for target in self._removed_event_targets:
+            if target not in self._event_handlers:
+                self._last_event_seq_by_target.pop(target, None)
+        self._removed_event_targets.clear()
+
+    def _schedule_render(self, lcs_id: _LifeCycleStateId) -> None:
+        if self._batch_render_ids is not None and self._rendering_ancestor_of(lcs_id):
+            self._batch_render_ids.add(lcs_id)
+            return None
+        if _handling_event():
+            self._urgent_render_ids.add(lcs_id)
+        self._rendering_queue.put(lcs_id)
+
+    def _rendering_ancestor_of(self, lcs_id: _LifeCycleStateId) -> bool:
+        """Whether the component now rendering is an ancestor of the given one"""
+        hook_stack = HOOK_STACK.get()
+        model_state = self._model_states_by_life_cycle_state_id.get(lcs_id)
+        if not hook_stack or model_state is None:
+            return False
+        return any(
+            ancestor.life_cycle_state.hook is hook_stack[-1]
+            for ancestor in _iter_component_ancestors(model_state)
+        )
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.root})"
 
 
+def _create_layout_patch(
+    old_model: VdomJson | dict[str, Any] | None,
+    new_state: _ModelState,
+    keys: dict[int, Any],
+) -> LayoutUpdateMessage | LayoutPatchMessage | None:
+    path = new_state.patch_path
+    if old_model is None:
+        # the client has nothing to diff against on the first render
+        return {
+            "type": "layout-update",
+            "path": path,
+            "model": _copy_changing_model(new_state),
+        }
+    changes = diff_models(old_model, new_state.model, keys)
+    if not changes:
+        return None
+    for change in changes:
+        if "value" in change:
+            change["value"] = _copy_changing_value(
+                new_state, change["path"], change["value"]
+            )
+    return {"type": "layout-patch", "path": path, "changes": changes}
+
+
+def _copy_changing_model(model_state: _ModelState) -> Any:
+    """Copy the parts of a model which later renders change before it is sent
+
+    A component which renders again replaces its model in its parent's children in
+    place, so those children are copied along with every model above them. Anything
+    else stays as it was rendered, static subtrees included, and is shared.
+    """
+    children = _copy_changing_children(model_state)
+    if children is None:
+        return model_state.model
+    return {**model_state.model, "children": children}
+
+
+def _copy_changing_children(model_state: _ModelState) -> list[Any] | None:
+    copied_children: dict[int, Any] = {}
+    for child in model_state.children_by_key.values():
+        child_model = _copy_changing_model(child)
+        if child.is_component_state or child_model is not child.model:
+            copied_children[child.index] = child_model
+    if not copied_children:
+        return None
+    children = list(cast(dict[str, Any], model_state.model)["children"])
+    for index, child_model in copied_children.items():
+        children[index] = child_model
+    return children
+
+
+def _copy_changing_value(model_state: _ModelState, path: str, value: Any) -> Any:
+    # find the model state the changed value belongs to from its path
+    tokens = path.split("/")[1:]
+    while len(tokens) > 1 and tokens[0] == "children" and tokens[1].isdigit():
+        index = int(tokens[1])
+        for child in model_state.children_by_key.values():
+            if child.index == index:
+                model_state = child
+                break
+        else:
+            break
+        tokens = tokens[2:]
+    else:
+        if not tokens and value is model_state.model:
+            return _copy_changing_model(model_state)
+        if tokens == ["children"] and value is model_state.model.get("children"):
+            return _copy_changing_children(model_state) or value
+    # only models and their children are changed in place
+    if isinstance(value, (dict, list)) and tokens[:1] == ["children"]:
+        return copy_model(value)
+    return value
+
+
+def _component_keys(old_state: _ModelState, new_state: _ModelState) -> dict[int, Any]:
+    # The models of keyed components don't include their key, so the model differ is
+    # told them separately to be able to follow those components when reordered. The
+    # differ skips models which are the same before and after, so subtrees which did
+    # not render again, such as memoized or static ones, aren't searched.
+    keys: dict[int, Any] = {}
+    _add_component_key(keys, old_state)
+    _add_component_key(keys, new_state)
+    to_visit = [(old_state, new_state)]
+    while to_visit:
+        old, new = to_visit.pop()
+        for child in old.children_by_key.values():
+            _add_component_key(keys, child)
+        for key, child in new.children_by_key.items():
+            _add_component_key(keys, child)
+            old_child = old.children_by_key.get(key)
+            if old_child is not None and old_child.model is not child.model:
+                to_visit.append((old_child, child))
+    return keys
+
+
+def _add_component_key(keys: dict[int, Any], model_state: _ModelState) -> None:
+    if (
+        model_state.is_component_state
+        and model_state.life_cycle_state.component.key is not None
+    ):
+        keys[id(model_state.model)] = model_state.key
+
+
+def _tree_order_key(path: str) -> list[int | str]:
+    return [int(token) if token.isdigit() else token for token in path.split("/")]
+
+
+def _handling_event() -> bool:
+    """Whether the current task is the one running an event handler"""
+    task = _HANDLING_EVENT.get()
+    if task is None:
+        return False
+    try:
+        return current_task() is task
+    except RuntimeError:
+        # in another thread without an event loop
+        return False
+
+
+def _iter_component_ancestors(model_state: _ModelState) -> Iterator[_ModelState]:
+    while True:
+        try:
+            model_state = model_state.parent
+        except AttributeError:
+            return None
+        if model_state.is_component_state:
+            yield model_state
+
+
 def _new_root_model_state(
     component: Component, schedule_render: Callable[[_LifeCycleStateId], None]
 ) -> _ModelState:
@@ -606,12 +1052,7 @@ def _new_root_model_state(
         parent=None,
         index=-1,
         key=None,
-        model=Ref(),
-        patch_path="",
-        children_by_key={},
-        targets_by_event={},
         life_cycle_state=_make_life_cycle_state(component, schedule_render),
-        key_path="",
     )
 
 
@@ -626,12 +1067,7 @@ def _make_component_model_state(
         parent=parent,
         index=index,
         key=key,
-        model=Ref(),
-        patch_path=f"{parent.patch_path}/children/{index}" if parent else "",
-        children_by_key={},
-        targets_by_event={},
         life_cycle_state=_make_life_cycle_state(component, schedule_render),
-        key_path=f"{parent.key_path}/{key}" if parent else "",
     )
 
 
@@ -646,12 +1082,7 @@ def _copy_component_model_state(old_model_state: _ModelState) -> _ModelState:
         parent=parent,
         index=old_model_state.index,
         key=old_model_state.key,
-        model=Ref(),  # does not copy the model
-        patch_path=old_model_state.patch_path,
-        children_by_key={},
-        targets_by_event={},
         life_cycle_state=old_model_state.life_cycle_state,
-        key_path=old_model_state.key_path,
     )
 
 
@@ -666,16 +1097,23 @@ def _update_component_model_state(
         parent=new_parent,
         index=new_index,
         key=old_model_state.key,
-        model=Ref(),  # does not copy the model
-        patch_path=f"{new_parent.patch_path}/children/{new_index}",
-        children_by_key={},
-        targets_by_event={},
         life_cycle_state=(
             _update_life_cycle_state(old_model_state.life_cycle_state, new_component)
             if old_model_state.is_component_state
             else _make_life_cycle_state(new_component, schedule_render)
         ),
-        key_path=f"{new_parent.key_path}/{old_model_state.key}",
+    )
+
+
+def _can_reuse_memoized_state(
+    old_model_state: _ModelState,
+    new_component: Component,
+) -> bool:
+    old_life_cycle_state = old_model_state.life_cycle_state
+    return bool(
+        new_component.memo
+        and not old_life_cycle_state.hook.render_scheduled
+        and new_component.props_equal(old_life_cycle_state.component)
     )
 
 
@@ -684,16 +1122,7 @@ def _make_element_model_state(
     index: int,
     key: Any,
 ) -> _ModelState:
-    return _ModelState(
-        parent=parent,
-        index=index,
-        key=key,
-        model=Ref(),
-        patch_path=f"{parent.patch_path}/children/{index}",
-        children_by_key={},
-        targets_by_event={},
-        key_path=f"{parent.key_path}/{key}",
-    )
+    return _ModelState(parent=parent, index=index, key=key)
 
 
 def _update_element_model_state(
@@ -701,32 +1130,25 @@ def _update_element_model_state(
     new_parent: _ModelState,
     new_index: int,
 ) -> _ModelState:
-    return _ModelState(
-        parent=new_parent,
-        index=new_index,
-        key=old_model_state.key,
-        model=Ref(),  # does not copy the model
-        patch_path=f"{new_parent.patch_path}/children/{new_index}",
-        children_by_key={},
-        targets_by_event={},
-        key_path=f"{new_parent.key_path}/{old_model_state.key}",
-    )
+    return _ModelState(parent=new_parent, index=new_index, key=old_model_state.key)
 
 
 class _ModelState:
-    """State that is bound to a particular element within the layout"""
+    """State that is bound to a particular element within the layout
+
+    To keep large layouts small in memory, paths are not stored but computed from the
+    chain of parents when needed, and childless or handler-less elements share an
+    empty mapping until something is added to them.
+    """
 
     __slots__ = (
         "__weakref__",
         "_parent_ref",
-        "_render_semaphore",
         "children_by_key",
         "index",
         "key",
-        "key_path",
         "life_cycle_state",
         "model",
-        "patch_path",
         "targets_by_event",
     )
 
@@ -735,12 +1157,7 @@ class _ModelState:
         parent: _ModelState | None,
         index: int,
         key: Any,
-        model: Ref[VdomJson | dict[str, Any]],
-        patch_path: str,
-        children_by_key: dict[Key, _ModelState],
-        targets_by_event: dict[str, str],
         life_cycle_state: _LifeCycleState | None = None,
-        key_path: str = "",
     ):
         self.index = index
         """The index of the element amongst its siblings"""
@@ -748,21 +1165,15 @@ class _ModelState:
         self.key = key
         """A key that uniquely identifies the element amongst its siblings"""
 
-        self.model = model
+        self.model: VdomJson | dict[str, Any]
         """The actual model of the element"""
 
-        self.patch_path = patch_path
-        """A "/" delimited path to the element within the greater layout"""
-
-        self.children_by_key = children_by_key
+        self.children_by_key: Mapping[Key, _ModelState] = _EMPTY_MAPPING
         """Child model states indexed by their unique keys"""
 
-        self.targets_by_event = targets_by_event
+        self.targets_by_event: Mapping[str, str] = _EMPTY_MAPPING
         """The element's event handler target strings indexed by their event name"""
 
-        self.key_path = key_path
-        """A slash-delimited path using element keys"""
-
         # === Conditionally Available Attributes ===
         # It's easier to conditionally assign than to force a null check on every usage
 
@@ -785,18 +1196,59 @@ class _ModelState:
             raise RuntimeError("detached model state")  # nocov
         return parent
 
+    @property
+    def patch_path(self) -> str:
+        """A "/" delimited path to the element within the greater layout"""
+        return "".join(
+            f"/children/{state.index}" for state in reversed(self._path_states())
+        )
+
+    @property
+    def key_path(self) -> str:
+        """A slash-delimited path using element keys"""
+        return "".join(f"/{state.key}" for state in reversed(self._path_states()))
+
+    def set_parent(self, parent: _ModelState, index: int) -> None:
+        self._parent_ref = weakref(parent)
+        self.index = index
+
+    def set_child_state(self, key: Key, child: _ModelState) -> None:
+        if self.children_by_key is _EMPTY_MAPPING:
+            self.children_by_key = {}
+        cast(dict[Key, _ModelState], self.children_by_key)[key] = child
+
+    def set_event_target(self, event: str, target: str) -> None:
+        if self.targets_by_event is _EMPTY_MAPPING:
+            self.targets_by_event = {}
+        cast(dict[str, str], self.targets_by_event)[event] = target
+
     def append_child(self, child: Any) -> None:
-        self.model.current.setdefault("children", []).append(child)
+        self.model.setdefault("children", []).append(child)
+
+    def _path_states(self) -> list[_ModelState]:
+        # all states from this one up to, but excluding, the root
+        states: list[_ModelState] = []
+        state = self
+        while True:
+            try:
+                parent = state.parent
+            except AttributeError:
+                return states
+            states.append(state)
+            state = parent
 
     def __repr__(self) -> str:  # nocov
         return f"ModelState({ {s: getattr(self, s, None) for s in self.__slots__} })"
 
 
+_EMPTY_MAPPING: Mapping[Any, Any] = MappingProxyType({})
+
+
 def _make_life_cycle_state(
     component: Component,
     schedule_render: Callable[[_LifeCycleStateId], None],
 ) -> _LifeCycleState:
-    life_cycle_state_id = _LifeCycleStateId(uuid4().hex)
+    life_cycle_state_id = _LifeCycleStateId(next(_life_cycle_state_ids))
     return _LifeCycleState(
         life_cycle_state_id,
         LifeCycleHook(lambda: schedule_render(life_cycle_state_id)),
@@ -816,7 +1268,8 @@ def _update_life_cycle_state(
     )
 
 
-_LifeCycleStateId = NewType("_LifeCycleStateId", str)
+_LifeCycleStateId = NewType("_LifeCycleStateId", int)
+_life_cycle_state_ids = count()
 
 
 class _LifeCycleState(NamedTuple):
@@ -859,11 +1312,19 @@ class _ThreadSafeQueue(Generic[_Type]):
         finally:
             self._put_tasks.pop(value, None)
 
+    def __len__(self) -> int:
+        return len(self._pending)
+
     async def get(self) -> _Type:
         value = await self._queue.get()
         self._pending.remove(value)
         return value
 
+    def get_nowait(self) -> _Type:
+        value = self._queue.get_nowait()
+        self._pending.remove(value)
+        return value
+
     async def close(self) -> None:
         for task in list(self._put_tasks.values()):
             task.cancel()
@@ -874,6 +1335,60 @@ class _ThreadSafeQueue(Generic[_Type]):
         self._pending.clear()
 
 
+class _EventHandlers(dict[str, BaseEventHandler]):
+    """Event handlers indexed by their target, which events may wait to be registered
+
+    The targets of recently removed handlers are remembered. Events for them are dropped
+    straight away, unless a render is in progress which might add the handler back.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._waiters: dict[str, Future[BaseEventHandler | None]] = {}
+        # used as an ordered set, so the oldest targets can be forgotten first
+        self._removed: dict[str, None] = {}
+
+    def __setitem__(self, target: str, handler: BaseEventHandler) -> None:
+        super().__setitem__(target, handler)
+        self._removed.pop(target, None)
+        self._wake(target, handler)
+
+    def __delitem__(self, target: str) -> None:
+        super().__delitem__(target)
+        self._removed[target] = None
+        if len(self._removed) > _MAX_REMOVED_EVENT_TARGETS:
+            del self._removed[next(iter(self._removed))]
+
+    async def wait_for(
+        self, target: str, rendering: bool, timeout: float = 0.03
+    ) -> BaseEventHandler | None:
+        """Get the handler for the target, waiting up to the timeout for it to be added"""
+        handler = self.get(target)
+        if handler is not None or (target in self._removed and not rendering):
+            return handler
+        waiter = self._waiters[target] = get_running_loop().create_future()
+        try:
+            return await wait_for(waiter, timeout)
+        except TimeoutError:
+            return None
+        finally:
+            if self._waiters.get(target) is waiter:
+                del self._waiters[target]
+
+    def stop_waiting_for_removed(self) -> None:
+        """Drop events for handlers which the last render removed and did not add back"""
+        for target in [t for t in self._waiters if t in self._removed]:
+            self._wake(target, None)
+
+    def _wake(self, target: str, handler: BaseEventHandler | None) -> None:
+        waiter = self._waiters.pop(target, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(handler)
+
+
+_MAX_REMOVED_EVENT_TARGETS = 1000
+
+
 def _get_children_info(
     children: list[VdomChild],
 ) -> tuple[list[_ChildInfo], set[Key] | None]:
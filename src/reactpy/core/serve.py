@@ -1,14 +1,33 @@
 from __future__ import annotations
 
+import pickle
+from asyncio import Task, create_task, current_task, sleep, wait
 from collections.abc import Awaitable, Callable
+from functools import partial
 from logging import getLogger
-from typing import Any
+from pathlib import Path
+from secrets import token_bytes, token_urlsafe
+from time import monotonic
+from typing import Any, Protocol, cast
 
-from anyio import create_task_group
+from anyio import Event, create_task_group, to_thread
 from anyio.abc import TaskGroup
 
-from reactpy.config import REACTPY_DEBUG
-from reactpy.types import BaseLayout, LayoutEventMessage, LayoutUpdateMessage
+from reactpy.config import (
+    REACTPY_DEBUG,
+    REACTPY_SESSION_HIBERNATE_TIMEOUT,
+    REACTPY_SESSION_RESUME_TIMEOUT,
+)
+from reactpy.core._signing import SignedUnpickler, sign
+from reactpy.core.layout import Layout
+from reactpy.types import (
+    BaseLayout,
+    Connection,
+    LayoutBatchMessage,
+    LayoutEventMessage,
+    LayoutPatchMessage,
+    LayoutUpdateMessage,
+)
 
 logger = getLogger(__name__)
 
@@ -32,21 +51,49 @@ async def serve_layout(
 ) -> None:
     """Run a dispatch loop for a single view instance"""
     async with layout:
-        async with create_task_group() as task_group:
-            task_group.start_soon(_single_outgoing_loop, layout, send)
-            task_group.start_soon(_single_incoming_loop, task_group, layout, recv)
+        await _serve_entered_layout(layout, send, recv)
 
 
-async def _single_outgoing_loop(
+async def _serve_entered_layout(
     layout: BaseLayout[
         LayoutUpdateMessage | dict[str, Any], LayoutEventMessage | dict[str, Any]
     ],
     send: SendCoroutine,
+    recv: RecvCoroutine,
+    outbox: _Outbox | None = None,
 ) -> None:
+    outbox = outbox or _Outbox()
+    async with create_task_group() as task_group:
+        task_group.start_soon(_single_rendering_loop, layout, outbox)
+        task_group.start_soon(_single_outgoing_loop, outbox, send)
+        task_group.start_soon(_single_incoming_loop, task_group, layout, recv)
+
+
+async def _single_rendering_loop(
+    layout: BaseLayout[
+        LayoutUpdateMessage | dict[str, Any], LayoutEventMessage | dict[str, Any]
+    ],
+    outbox: _Outbox,
+) -> None:
+    resync = layout.resync if isinstance(layout, Layout) else None
+    while True:
+        outbox.put(await layout.render())
+        if not outbox.full:
+            continue
+        # The client has fallen so far behind that it is sent the whole model in place
+        # of the updates it has yet to receive.
+        if resync is not None and (update := await resync()) is not None:
+            outbox.replace(update)
+        else:
+            await outbox.wait_until_not_full()
+
+
+async def _single_outgoing_loop(outbox: _Outbox, send: SendCoroutine) -> None:
     while True:
-        update = await layout.render()
+        update = await outbox.get()
         try:
             await send(update)
+            outbox.sent()
         except Exception:  # nocov
             if not REACTPY_DEBUG.current:
                 msg = (
@@ -69,3 +116,380 @@ async def _single_incoming_loop(
         # We need to fire and forget here so that we avoid waiting on the completion
         # of this event handler before receiving and running the next one.
         task_group.start_soon(layout.deliver, await recv())
+
+
+class HibernationStore(Protocol):
+    """Somewhere to keep the saved state of hibernating sessions"""
+
+    async def save(self, key: str, data: bytes) -> None:
+        """Keep the given data under the given key"""
+
+    async def load(self, key: str) -> bytes | None:
+        """Get the data kept under the given key, if there is any"""
+
+    async def delete(self, key: str) -> None:
+        """Remove the data kept under the given key, if there is any"""
+
+
+class MemoryHibernationStore:
+    """Keeps the saved state of hibernating sessions in memory"""
+
+    def __init__(self) -> None:
+        self._data: dict[str, bytes] = {}
+
+    async def save(self, key: str, data: bytes) -> None:
+        self._data[key] = data
+
+    async def load(self, key: str) -> bytes | None:
+        return self._data.get(key)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class FileHibernationStore:
+    """Keeps the saved state of hibernating sessions in files within a directory"""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    async def save(self, key: str, data: bytes) -> None:
+        await to_thread.run_sync(self._path(key).write_bytes, data)
+
+    async def load(self, key: str) -> bytes | None:
+        try:
+            return await to_thread.run_sync(self._path(key).read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def delete(self, key: str) -> None:
+        await to_thread.run_sync(partial(self._path(key).unlink, missing_ok=True))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.session"
+
+
+class LayoutSessions:
+    """Layouts which outlive the connections they are served over, indexed by token
+
+    Parameters:
+        hibernation_store:
+            Where to keep the state of sessions while they hibernate. By default, this
+            is kept in memory, which is still far smaller than the layouts themselves.
+    """
+
+    def __init__(self, hibernation_store: HibernationStore | None = None) -> None:
+        self.hibernation_store = hibernation_store or MemoryHibernationStore()
+        self._sessions: dict[str, LayoutSession] = {}
+        # Saved state is signed with this so that only state saved by these sessions
+        # is ever unpickled.
+        self._signing_key = token_bytes(32)
+
+    async def open(
+        self,
+        layout: Layout,
+        connection: Connection[Any] | None = None,
+        root: Any = None,
+    ) -> LayoutSession:
+        """Start a new session for the given layout
+
+        The ``root`` identifies what the layout renders. A session may only be resumed
+        for the same root, so that a token cannot be used to serve one component in
+        place of another.
+        """
+        await layout.__aenter__()
+        session = LayoutSession(self, layout, connection, root)
+        self._sessions[session.token] = session
+        return session
+
+    def resume(self, token: str, root: Any = None) -> LayoutSession | None:
+        """Get the session with the given token, if it has not expired
+
+        Tokens are only good for one use. The session is given a new one which it will
+        send to the client once it is served again.
+        """
+        session = self._sessions.get(token)
+        if session is None or session.root is not root:
+            return None
+        del self._sessions[token]
+        session.token = token_urlsafe()
+        self._sessions[session.token] = session
+        return session
+
+    def discard(self, session: LayoutSession) -> None:
+        """Forget the given session, so that it can no longer be resumed"""
+        if self._sessions.get(session.token) is session:
+            del self._sessions[session.token]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class LayoutSession:
+    """A layout which may be served over several connections, one after another
+
+    When its connection closes, the layout is kept alive for
+    :data:`~reactpy.config.REACTPY_SESSION_RESUME_TIMEOUT` seconds. A client which
+    reconnects with the session's token in that time is sent the current model of the
+    layout, instead of it being mounted and rendered again from scratch.
+
+    If :data:`~reactpy.config.REACTPY_SESSION_HIBERNATE_TIMEOUT` is set, a session
+    which neither receives events nor sends updates for that long hibernates. Its state
+    is saved to the hibernation store and its layout is unmounted. The next event wakes
+    it, restoring its state into a new layout before the event is delivered.
+
+    A session may also be opened, and its first update rendered, before any client
+    connects to it. When first served, the client is assumed to already have that
+    update, so only the updates rendered since are sent.
+    """
+
+    def __init__(
+        self,
+        sessions: LayoutSessions,
+        layout: Layout,
+        connection: Connection[Any] | None,
+        root: Any = None,
+    ) -> None:
+        self.token = token_urlsafe()
+        self.layout = layout
+        self.connection = connection
+        self.root = root
+        self.hibernating = False
+        self._served = False
+        self._sessions = sessions
+        # unlike the token, this stays the same for the life of the session
+        self._hibernation_key = token_urlsafe()
+        self._serving_task: Task[Any] | None = None
+        self._expiry_task: Task[None] | None = None
+
+    async def serve(self, send: SendCoroutine, recv: RecvCoroutine) -> None:
+        """Run a dispatch loop for the session until its connection closes"""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            self._expiry_task = None
+        if self._serving_task is not None:
+            # the client reconnected before its last connection was known to be closed
+            self._serving_task.cancel()
+            await wait([self._serving_task])
+
+        self._serving_task = task = current_task()
+        try:
+            await send({"type": "session-token", "token": self.token})
+            if self.hibernating:
+                await send(await self._wake())
+            elif self._served and (update := await self.layout.resync()) is not None:
+                await send(update)
+            self._served = True
+            while True:
+                await self._serve_until_idle(send, recv)
+                if await self._hibernate():
+                    event = await recv()
+                    await send(await self._wake())
+                    await self.layout.deliver(event)
+        finally:
+            if self._serving_task is task:
+                self._serving_task = None
+                self.expire_after(REACTPY_SESSION_RESUME_TIMEOUT.current)
+
+    def expire_after(self, timeout: float) -> None:
+        """Close the session if it is not served again within the given time"""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+        self._expiry_task = create_task(self._expire(timeout))
+
+    async def close(self) -> None:
+        """End the session, unmounting its layout"""
+        self._sessions.discard(self)
+        if self.hibernating:
+            await self._sessions.hibernation_store.delete(self._hibernation_key)
+        else:
+            await self.layout.__aexit__(None, None, None)  # type: ignore[arg-type]
+
+    async def _serve_until_idle(self, send: SendCoroutine, recv: RecvCoroutine) -> None:
+        timeout = REACTPY_SESSION_HIBERNATE_TIMEOUT.current
+        if not timeout:
+            await _serve_entered_layout(self.layout, send, recv)
+            return
+
+        last_active = monotonic()
+
+        async def send_and_note_activity(
+            update: LayoutUpdateMessage | dict[str, Any],
+        ) -> None:
+            nonlocal last_active
+            await send(update)
+            last_active = monotonic()
+
+        async def recv_and_note_activity() -> LayoutEventMessage | dict[str, Any]:
+            nonlocal last_active
+            event = await recv()
+            last_active = monotonic()
+            return event
+
+        outbox = _Outbox()
+        async with create_task_group() as task_group:
+            task_group.start_soon(
+                _serve_entered_layout,
+                self.layout,
+                send_and_note_activity,
+                recv_and_note_activity,
+                outbox,
+            )
+            while True:
+                idle_time = monotonic() - last_active
+                if idle_time < timeout:
+                    await sleep(timeout - idle_time)
+                elif self.layout.handling_events:
+                    # let event handlers finish rather than cancelling them
+                    await self.layout.wait_for_events()
+                    last_active = monotonic()
+                elif self.layout.updates_pending or not outbox.empty:
+                    # Updates on their way to the client count as activity. They must
+                    # all be sent before serving stops, or the client would miss them.
+                    last_active = monotonic()
+                else:
+                    break
+            task_group.cancel_scope.cancel()
+
+    async def _hibernate(self) -> bool:
+        """Save the layout's state and unmount it, or keep it if that fails"""
+        try:
+            data = pickle.dumps(self.layout.save_state())
+        except Exception:
+            logger.debug(f"Did not hibernate {self.layout} - its state cannot be saved")
+            return False
+        try:
+            await self._sessions.hibernation_store.save(
+                self._hibernation_key, sign(self._sessions._signing_key, data)
+            )
+        except Exception:
+            logger.exception(f"Did not hibernate {self.layout} - failed to store state")
+            return False
+        self.hibernating = True
+        await self.layout.__aexit__(None, None, None)  # type: ignore[arg-type]
+        return True
+
+    async def _wake(self) -> LayoutUpdateMessage:
+        store = self._sessions.hibernation_store
+        data = await store.load(self._hibernation_key)
+        await store.delete(self._hibernation_key)
+        saved_state = None
+        if data is not None:
+            try:
+                saved_state = SignedUnpickler(self._sessions._signing_key, data).load()
+            except pickle.UnpicklingError:
+                logger.warning(f"Discarded invalid saved state of {self.layout}")
+        self.layout = Layout(self.layout.root, saved_state)
+        await self.layout.__aenter__()
+        self.hibernating = False
+        # the first render of a layout always describes its whole model
+        return cast(LayoutUpdateMessage, await self.layout.render())
+
+    async def _expire(self, timeout: float) -> None:
+        await sleep(timeout)
+        self._expiry_task = None
+        await self.close()
+
+
+class _Outbox:
+    """Updates which have been rendered but not yet sent
+
+    If the client cannot keep up, updates pile up here while the previous one is being
+    sent. Only the newest model of any part of the layout matters at that point, so a
+    ``layout-update`` replaces any pending update at, or beneath, its path. Everything
+    pending is then sent together as a single ``layout-batch``.
+
+    Patches cannot replace each other, so the outbox is full once
+    :data:`_MAX_PENDING_UPDATES` are pending. They should then be replaced by an update
+    of the whole model.
+    """
+
+    def __init__(self) -> None:
+        self._pending: list[dict[str, Any]] = []
+        self._ready = Event()
+        self._taken = Event()
+        self._sending = False
+
+    @property
+    def empty(self) -> bool:
+        """Whether every update put in the outbox has been sent"""
+        return not self._pending and not self._sending
+
+    @property
+    def full(self) -> bool:
+        return len(self._pending) >= _MAX_PENDING_UPDATES
+
+    def put(
+        self,
+        message: LayoutUpdateMessage
+        | LayoutPatchMessage
+        | LayoutBatchMessage
+        | dict[str, Any],
+    ) -> None:
+        # messages are only told apart by their type and path here
+        pending = cast(dict[str, Any], message)
+        if pending.get("type") == "layout-batch":
+            for update in pending["updates"]:
+                self._put_one(update)
+        else:
+            self._put_one(pending)
+        self._ready.set()
+
+    async def get(self) -> LayoutUpdateMessage | dict[str, Any]:
+        while not self._pending:
+            await self._ready.wait()
+            self._ready = Event()
+        pending, self._pending = self._pending, []
+        self._sending = True
+        self._taken.set()
+        if len(pending) == 1:
+            return pending[0]
+        return {"type": "layout-batch", "updates": pending}
+
+    def sent(self) -> None:
+        """Note that the update last taken from the outbox was sent"""
+        self._sending = False
+
+    def replace(self, message: LayoutUpdateMessage | dict[str, Any]) -> None:
+        """Discard every pending update in favor of the given one"""
+        self._pending.clear()
+        self.put(message)
+
+    async def wait_until_not_full(self) -> None:
+        while self.full:
+            await self._taken.wait()
+            self._taken = Event()
+
+    def _put_one(self, message: dict[str, Any]) -> None:
+        if message.get("type") == "layout-update":
+            self._discard_superseded(message["path"])
+        self._pending.append(message)
+
+    def _discard_superseded(self, path: str) -> None:
+        # Going from newest to oldest, drop updates at or beneath the given path until
+        # reaching one which the update being added may depend on. That is a patch to
+        # an ancestor, whose changes are relative to the model as it was after all the
+        # updates before it, or a message of some other kind.
+        for index in range(len(self._pending) - 1, -1, -1):
+            pending = self._pending[index]
+            pending_type = pending.get("type")
+            if pending_type not in _PATH_UPDATE_TYPES:
+                break
+            pending_path = pending["path"]
+            if _is_at_or_beneath(pending_path, path):
+                del self._pending[index]
+            elif pending_type == "layout-patch" and _is_at_or_beneath(
+                path, pending_path
+            ):
+                break
+
+
+_MAX_PENDING_UPDATES = 32
+"""The number of updates an outbox may hold before they are replaced by the whole model"""
+
+_PATH_UPDATE_TYPES = frozenset(("layout-update", "layout-patch"))
+
+
+def _is_at_or_beneath(path: str, ancestor_path: str) -> bool:
+    return path == ancestor_path or path.startswith(f"{ancestor_path}/")
@@ -25,10 +25,12 @@ from reactpy.types import (
     ImportSourceDict,
     InlineJavaScript,
     InlineJavaScriptDict,
+    StaticVdomDict,
     VdomAttributes,
     VdomChildren,
     VdomDict,
     VdomJson,
+    VdomTypeDict,
 )
 
 EVENT_ATTRIBUTE_PATTERN = re.compile(r"^on[A-Z]\w+")
@@ -206,6 +208,46 @@ class Vdom:
         return VdomDict(**result)  # type: ignore
 
 
+def static(element: VdomDict) -> StaticVdomDict:
+    """Mark an element's subtree as never changing.
+
+    The subtree is turned into its JSON model once, here, and layouts skip over it
+    entirely when the component returning it re-renders. So that this happens only
+    once, create static elements outside of your components, or with ``use_memo``.
+
+    Static subtrees cannot contain components or event handlers.
+    """
+    static_element = StaticVdomDict(**cast(VdomTypeDict, element))
+    static_element.model = _make_static_model(element)
+    return static_element
+
+
+def _make_static_model(value: Any) -> Any:
+    if isinstance(value, Component):
+        msg = f"Static elements cannot contain components, but found {value}"
+        raise TypeError(msg)
+    if not isinstance(value, Mapping):
+        return f"{value}"
+    if value.get("eventHandlers"):
+        msg = (
+            f"Static elements cannot have event handlers, but {value['tagName']!r} does"
+        )
+        raise TypeError(msg)
+
+    model: dict[str, Any] = {"tagName": value["tagName"]}
+    for field in ("attributes", "inlineJavaScript", "importSource"):
+        if field in value:
+            model[field] = dict(value[field])
+    children = value.get("children")
+    if children:
+        if isinstance(children, (str, Mapping)) or not isinstance(children, Sequence):
+            children = [children]
+        model["children"] = [
+            _make_static_model(child) for child in children if child is not None
+        ]
+    return model
+
+
 def separate_attributes_and_children(
     values: Sequence[Any],
 ) -> tuple[VdomAttributes, list[Any]]:
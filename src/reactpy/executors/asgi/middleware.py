@@ -6,12 +6,13 @@ import re
 import traceback
 import urllib.parse
 from collections.abc import Iterable
+from contextvars import ContextVar
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Unpack, cast
 
 import orjson
-from asgi_tools import ResponseText, ResponseWebSocket
+from asgi_tools import Request, ResponseText, ResponseWebSocket
 from asgiref import typing as asgi_types
 from asgiref.compatibility import guarantee_single_callable
 from servestatic import ServeStaticASGI
@@ -19,12 +20,15 @@ from servestatic import ServeStaticASGI
 from reactpy import config
 from reactpy.core.hooks import ConnectionContext
 from reactpy.core.layout import Layout
-from reactpy.core.serve import serve_layout
+from reactpy.core.serve import LayoutSession, LayoutSessions, serve_layout
 from reactpy.executors.asgi.types import (
     AsgiApp,
     AsgiHttpReceive,
     AsgiHttpScope,
     AsgiHttpSend,
+    AsgiLifespanReceive,
+    AsgiLifespanScope,
+    AsgiLifespanSend,
     AsgiReceive,
     AsgiScope,
     AsgiSend,
@@ -37,10 +41,22 @@ from reactpy.executors.asgi.types import (
     AsgiWebsocketSend,
 )
 from reactpy.executors.utils import check_path, import_components, process_settings
-from reactpy.types import Connection, Location, ReactPyConfig, RootComponentConstructor
+from reactpy.executors.workers import LayoutWorkerPool
+from reactpy.types import (
+    Connection,
+    LayoutUpdateMessage,
+    Location,
+    ReactPyConfig,
+    RootComponentConstructor,
+)
 
 _logger = logging.getLogger(__name__)
 
+_current_http_request: ContextVar[
+    tuple[ReactPyMiddleware, AsgiHttpScope, AsgiHttpReceive, AsgiHttpSend] | None
+] = ContextVar("_current_http_request", default=None)
+"""The middleware, and the HTTP request, which the user's application is responding to"""
+
 
 def _location_from_websocket_query_string(query_string: str) -> Location:
     ws_query_string = urllib.parse.parse_qs(query_string, strict_parsing=True)
@@ -50,6 +66,19 @@ def _location_from_websocket_query_string(query_string: str) -> Location:
     )
 
 
+def _location_from_http_scope(scope: AsgiHttpScope) -> Location:
+    query_string = scope["query_string"].decode()
+    return Location(
+        path=scope["path"],
+        query_string=f"?{query_string}" if query_string else "",
+    )
+
+
+def _session_token_from_websocket_query_string(query_string: str) -> str:
+    ws_query_string = urllib.parse.parse_qs(query_string)
+    return ws_query_string.get("session", [""])[0]
+
+
 class ReactPyMiddleware:
     root_component: RootComponentConstructor | None = None
     root_components: dict[str, RootComponentConstructor]
@@ -111,6 +140,17 @@ class ReactPyMiddleware:
         self.component_dispatch_app = ComponentDispatchApp(parent=self)
         self.static_file_app = StaticFileApp(parent=self)
         self.web_modules_app = WebModuleApp(parent=self)
+        self.layout_workers_lifespan_app = LayoutWorkersLifespanApp(parent=self)
+
+        # Sessions which may be resumed by a reconnecting client
+        self.sessions = LayoutSessions()
+
+        # Worker processes which host layouts, if there are any
+        self.layout_workers = (
+            LayoutWorkerPool(config.REACTPY_LAYOUT_PROCESSES.current, settings)
+            if config.REACTPY_LAYOUT_PROCESSES.current
+            else None
+        )
 
     async def __call__(
         self, scope: AsgiScope, receive: AsgiReceive, send: AsgiSend
@@ -129,13 +169,24 @@ class ReactPyMiddleware:
         if scope["type"] == "http" and self.match_web_modules_path(scope):
             return await self.web_modules_app(scope, receive, send)
 
+        # Start and stop the layout workers along with the webserver
+        if scope["type"] == "lifespan" and self.layout_workers is not None:
+            return await self.layout_workers_lifespan_app(scope, receive, send)
+
         # URL routing for user-defined routes
         matched_app = self.match_extra_paths(scope)
         if matched_app:
             return await matched_app(scope, receive, send)  # type: ignore
 
         # Serve the user's application
-        await self.asgi_app(scope, receive, send)
+        if scope["type"] != "http":
+            return await self.asgi_app(scope, receive, send)
+        # Allows the user's templates to start sessions for this request
+        token = _current_http_request.set((self, scope, receive, send))
+        try:
+            await self.asgi_app(scope, receive, send)
+        finally:
+            _current_http_request.reset(token)
 
     def match_dispatch_path(self, scope: AsgiWebsocketScope) -> bool:
         return bool(re.match(self.dispatcher_pattern, scope["path"]))
@@ -151,6 +202,32 @@ class ReactPyMiddleware:
         # routing within their ASGI framework of choice.
         return None
 
+    async def start_session(
+        self,
+        component: RootComponentConstructor,
+        scope: AsgiHttpScope,
+        receive: AsgiHttpReceive,
+        send: AsgiHttpSend,
+    ) -> tuple[LayoutSession, LayoutUpdateMessage]:
+        """Start a layout for an HTTP request, and render its first update.
+
+        The layout is handed to the websocket which connects with the session's token.
+        If none does within :data:`~reactpy.config.REACTPY_SESSION_HANDOFF_TIMEOUT`,
+        the layout is unmounted."""
+        connection = Connection(
+            scope=scope,  # type: ignore
+            location=_location_from_http_scope(scope),
+            carrier=Request(scope, receive, send),  # type: ignore
+        )
+        session = await self.sessions.open(
+            Layout(ConnectionContext(component(), value=connection)),
+            connection,
+            root=component,
+        )
+        session.expire_after(config.REACTPY_SESSION_HANDOFF_TIMEOUT.current)
+        update = await session.layout.render()
+        return session, update  # type: ignore[return-value]
+
 
 @dataclass
 class ComponentDispatchApp:
@@ -225,6 +302,7 @@ class ReactPyWebsocket(ResponseWebSocket):
                 component = self.parent.root_components[dotted_path]
             elif self.parent.root_component:
                 component = self.parent.root_component
+                dotted_path = f"{component.__module__}.{component.__qualname__}"
             else:  # nocov
                 raise RuntimeError("No root component provided.")
 
@@ -238,22 +316,102 @@ class ReactPyWebsocket(ResponseWebSocket):
             )
 
             # Start the ReactPy component rendering loop
-            await serve_layout(
-                Layout(ConnectionContext(component(), value=connection)),
-                self.send_json,
-                self.rendering_queue.get,
-            )
+            if self.parent.layout_workers is not None:
+                await self.parent.layout_workers.serve(
+                    dotted_path, connection, self.send_json, self.rendering_queue.get
+                )
+            elif (session := self.resume_session(component, connection)) is not None:
+                await session.serve(self.send_json, self.rendering_queue.get)
+            elif (
+                config.REACTPY_SESSION_RESUME_TIMEOUT.current
+                or config.REACTPY_SESSION_HIBERNATE_TIMEOUT.current
+            ):
+                session = await self.parent.sessions.open(
+                    Layout(ConnectionContext(component(), value=connection)),
+                    connection,
+                    root=component,
+                )
+                await session.serve(self.send_json, self.rendering_queue.get)
+            else:
+                await serve_layout(
+                    Layout(ConnectionContext(component(), value=connection)),
+                    self.send_json,
+                    self.rendering_queue.get,
+                )
 
         # Manually log exceptions since this function is running in a separate asyncio task.
         except Exception as error:
             await asyncio.to_thread(_logger.error, f"{error}\n{traceback.format_exc()}")
 
+    def resume_session(
+        self, component: RootComponentConstructor, connection: Connection[Any]
+    ) -> LayoutSession | None:
+        """Get the session the client asked for, unless it has expired or belongs to
+        another root component."""
+        token = _session_token_from_websocket_query_string(
+            self.scope["query_string"].decode()
+        )
+        session = self.parent.sessions.resume(token, component) if token else None
+        if session is not None and session.connection is not None:
+            # The layout keeps the connection it was created with, so point that at
+            # the new websocket.
+            session.connection.scope = connection.scope
+            session.connection.location = connection.location
+            session.connection.carrier = self
+        return session
+
     async def send_json(self, data: Any) -> None:
         return await self._send(
             {"type": "websocket.send", "text": orjson.dumps(data).decode()}
         )
 
 
+@dataclass
+class LayoutWorkersLifespanApp:
+    parent: ReactPyMiddleware
+
+    async def __call__(
+        self,
+        scope: AsgiLifespanScope,
+        receive: AsgiLifespanReceive,
+        send: AsgiLifespanSend,
+    ) -> None:
+        """ASGI app which starts the layout workers when the webserver starts up, and
+        stops them when it shuts down, around the user's own lifespan app."""
+        workers = self.parent.layout_workers
+        if workers is None:  # nocov
+            raise RuntimeError("No layout workers to start.")
+        # The lifespan events which the user's app has responded to
+        handled: set[str] = set()
+
+        async def receive_lifespan() -> Any:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                workers.start()
+            return message
+
+        async def send_lifespan(message: Any) -> None:
+            event = message["type"].rsplit(".", 1)[0]
+            handled.add(event)
+            if event == "lifespan.shutdown":
+                await workers.stop()
+            await send(message)
+
+        app = (
+            self.parent.match_extra_paths(cast(AsgiScope, scope))
+            or self.parent.asgi_app
+        )
+        try:
+            await app(scope, receive_lifespan, send_lifespan)  # type: ignore
+            # Apps which don't support lifespan events return without handling them.
+            while "lifespan.shutdown" not in handled:
+                message = await receive_lifespan()
+                if message["type"] not in handled:
+                    await send_lifespan({"type": f"{message['type']}.complete"})
+        finally:
+            await workers.stop()
+
+
 @dataclass
 class StaticFileApp:
     parent: ReactPyMiddleware
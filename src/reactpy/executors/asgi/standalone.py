@@ -9,12 +9,18 @@ from email.utils import formatdate
 from logging import getLogger
 from typing import Literal, Unpack, cast, overload
 
-from asgi_tools import ResponseHTML
+from asgi_tools import Request, ResponseHTML
 
 from reactpy import html
-from reactpy.executors.asgi.middleware import ReactPyMiddleware
+from reactpy.core.hooks import ConnectionContext
+from reactpy.core.layout import Layout
+from reactpy.executors.asgi.middleware import (
+    ReactPyMiddleware,
+    _location_from_http_scope,
+)
 from reactpy.executors.asgi.types import (
     AsgiApp,
+    AsgiHttpScope,
     AsgiReceive,
     AsgiScope,
     AsgiSend,
@@ -29,6 +35,8 @@ from reactpy.executors.utils import (
     vdom_head_to_html,
 )
 from reactpy.types import (
+    Connection,
+    LayoutUpdateMessage,
     PyScriptOptions,
     ReactPyConfig,
     RootComponentConstructor,
@@ -52,6 +60,8 @@ class ReactPy(ReactPyMiddleware):
         html_lang: str = "en",
         pyscript_setup: bool = False,
         pyscript_options: PyScriptOptions | None = None,
+        prerender: bool = False,
+        embed_first_render: bool = False,
         **settings: Unpack[ReactPyConfig],
     ) -> None:
         """ReactPy's standalone ASGI application.
@@ -66,6 +76,16 @@ class ReactPy(ReactPyMiddleware):
             html_lang: The language of the HTML document.
             pyscript_setup: Whether to automatically load PyScript within your HTML head.
             pyscript_options: Options to configure PyScript behavior.
+            prerender: Whether to render the root component into the HTML of each page, so that
+                its content is shown before the websocket connects. This embeds the first render
+                in the page too, and so starts a layout for each page in the same way as
+                ``embed_first_render``.
+            embed_first_render: Whether to start the root component's layout during each page
+                request, and embed its first render in the page. The client then shows it
+                without waiting for the websocket, and the layout is handed to the websocket
+                when it connects, rather than being rendered a second time. When layouts are
+                hosted by worker processes, the first render is not embedded, and ``prerender``
+                renders each page in a layout which is unmounted once the page is rendered.
             settings: Global ReactPy configuration settings that affect behavior and performance.
         """
         super().__init__(app=ReactPyApp(self), root_components=[], **settings)
@@ -78,6 +98,8 @@ class ReactPy(ReactPyMiddleware):
         else:
             self.prepend_body = html.noscript("Enable JavaScript to view this site.")
         self.html_lang = html_lang
+        self.prerender = prerender
+        self.embed_first_render = embed_first_render
 
         if pyscript_setup:
             self.html_head.setdefault("children", [])
@@ -204,6 +226,13 @@ class ReactPyApp:
                 raise NotImplementedError(msg)
             return
 
+        # Layout workers can't take over a layout started in this process, so the
+        # first render is only embedded when layouts are hosted here.
+        if self.parent.prerender or (
+            self.parent.embed_first_render and self.parent.layout_workers is None
+        ):
+            return await self.send_prerendered_html(scope, receive, send)
+
         # Store the HTTP response in memory for performance
         if not self._index_html:
             self.render_index_html()
@@ -238,21 +267,92 @@ class ReactPyApp:
         response = ResponseHTML(self._index_html, headers=response_headers)
         await response(scope, receive, send)  # type: ignore
 
+    async def send_prerendered_html(
+        self, scope: AsgiHttpScope, receive: AsgiReceive, send: AsgiSend
+    ) -> None:
+        """Render the root component for this request and send it within the index.html."""
+        response_headers: dict[str, str] = {
+            "access-control-allow-origin": "*",
+            "cache-control": "no-cache",
+            "content-type": "text/html; charset=utf-8",
+            **self.parent.extra_headers,
+        }
+
+        # Browser is asking for the headers
+        if scope["method"] == "HEAD":
+            response = ResponseHTML("", headers=response_headers)
+            return await response(scope, receive, send)  # type: ignore
+
+        root_component = self.parent.root_component
+        if root_component is None:  # nocov
+            raise RuntimeError("No root component provided.")
+
+        if self.parent.layout_workers is not None:
+            # The websocket will be served by a worker, so the page is rendered in a
+            # layout of its own rather than in a session.
+            update = await self.render_once(root_component, scope, receive, send)
+            index_html = self.index_html(
+                reactpy_to_string(cast(VdomDict, update["model"]))
+            )
+            response = ResponseHTML(index_html, headers=response_headers)
+            return await response(scope, receive, send)  # type: ignore
+
+        # The layout which renders the page is handed to the websocket when it connects,
+        # so that prerendering doesn't mount the root component twice for each page.
+        session, update = await self.parent.start_session(
+            root_component, scope, receive, send
+        )
+        component_html = (
+            reactpy_to_string(cast(VdomDict, update["model"]))
+            if self.parent.prerender
+            else ""
+        )
+        index_html = self.index_html(
+            component_html, first_render=update, session_token=session.token
+        )
+        response = ResponseHTML(index_html, headers=response_headers)
+        await response(scope, receive, send)  # type: ignore
+
+    async def render_once(
+        self,
+        component: RootComponentConstructor,
+        scope: AsgiHttpScope,
+        receive: AsgiReceive,
+        send: AsgiSend,
+    ) -> LayoutUpdateMessage:
+        """Render the component for this request in a layout which is then unmounted."""
+        connection = Connection(
+            scope=scope,  # type: ignore
+            location=_location_from_http_scope(scope),
+            carrier=Request(scope, receive, send),  # type: ignore
+        )
+        async with Layout(ConnectionContext(component(), value=connection)) as layout:
+            return cast(LayoutUpdateMessage, await layout.render())
+
     def render_index_html(self) -> None:
         """Process the index.html and store the results in this class."""
+        self._index_html = self.index_html()
+        self._etag = f'"{hashlib.md5(self._index_html.encode(), usedforsecurity=False).hexdigest()}"'
+        self._last_modified = formatdate(datetime.now(tz=UTC).timestamp(), usegmt=True)
+
+    def index_html(
+        self,
+        component_html: str = "",
+        first_render: LayoutUpdateMessage | None = None,
+        session_token: str = "",
+    ) -> str:
+        """Create the index.html, optionally with the prerendered root component."""
         if not self.parent.prepend_body or self.parent.prepend_body == ...:
             prepend_body = ""
         else:
             prepend_body = reactpy_to_string(self.parent.prepend_body)
-        self._index_html = (
+        return (
             "<!doctype html>"
             f'<html lang="{self.parent.html_lang}">'
             f"{vdom_head_to_html(self.parent.html_head)}"
             "<body>"
             f"{prepend_body}"
-            f"{server_side_component_html(element_id='app', class_='', component_path='')}"
+            f"{server_side_component_html(element_id='app', class_='', component_path='', component_html=component_html, first_render=first_render, session_token=session_token)}"
             "</body>"
             "</html>"
         )
-        self._etag = f'"{hashlib.md5(self._index_html.encode(), usedforsecurity=False).hexdigest()}"'
-        self._last_modified = formatdate(datetime.now(tz=UTC).timestamp(), usegmt=True)
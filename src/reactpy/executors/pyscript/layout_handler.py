@@ -7,6 +7,7 @@ from jsonpointer import set_pointer
 from pyodide.ffi.wrappers import add_event_listener
 from pyscript.js_modules import morphdom
 
+from reactpy.core._model_diff import apply_model_changes
 from reactpy.core.layout import Layout
 
 
@@ -25,7 +26,17 @@ class ReactPyLayoutHandler:
     @staticmethod
     def update_model(update, root_model):
         """Apply an update ReactPy's internal DOM model."""
-        if update["path"]:
+        if update["type"] == "layout-batch":
+            for sub_update in update["updates"]:
+                ReactPyLayoutHandler.update_model(sub_update, root_model)
+        elif update["type"] == "layout-patch":
+            new_model = apply_model_changes(
+                root_model, update["changes"], update["path"]
+            )
+            if new_model is not root_model:
+                root_model.clear()
+                root_model.update(new_model)
+        elif update["path"]:
             set_pointer(root_model, update["path"], update["model"])
         else:
             # clear old keys first, dict.update() alone would keep stale "children" around when the new model doesn't have any
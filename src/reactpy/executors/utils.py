@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import logging
 from collections.abc import Iterable
 from typing import Any
@@ -12,7 +13,7 @@ from reactpy.config import (
     REACTPY_RECONNECT_MAX_INTERVAL,
     REACTPY_RECONNECT_MAX_RETRIES,
 )
-from reactpy.types import ReactPyConfig, VdomDict
+from reactpy.types import LayoutUpdateMessage, ReactPyConfig, VdomDict
 from reactpy.utils import import_dotted_path, reactpy_to_string
 
 logger = logging.getLogger(__name__)
@@ -60,10 +61,22 @@ def process_settings(settings: ReactPyConfig) -> None:
 
 
 def server_side_component_html(
-    element_id: str, class_: str, component_path: str
+    element_id: str,
+    class_: str,
+    component_path: str,
+    component_html: str = "",
+    *,
+    first_render: LayoutUpdateMessage | None = None,
+    session_token: str = "",
 ) -> str:
+    first_render_options = ""
+    if first_render is not None:
+        first_render_options = (
+            f"  initialModel: {_json_for_script(first_render['model'])},"
+            f'  sessionToken: "{session_token}",'
+        )
     return (
-        f'<div id="{element_id}" class="{class_}"></div>'
+        f'<div id="{element_id}" class="{class_}">{component_html}</div>'
         "<script>"
         'if (!document.querySelector("#reactpy-importmap")) {'
         "   console.debug("
@@ -87,11 +100,17 @@ def server_side_component_html(
         f"  reconnectMaxInterval: {REACTPY_RECONNECT_MAX_INTERVAL.current},"
         f"  reconnectMaxRetries: {REACTPY_RECONNECT_MAX_RETRIES.current},"
         f"  reconnectBackoffMultiplier: {REACTPY_RECONNECT_BACKOFF_MULTIPLIER.current},"
+        f"{first_render_options}"
         "});"
         "</script>"
     )
 
 
+def _json_for_script(value: Any) -> str:
+    # Escaping "<" keeps the JSON from closing the script element it is embedded in.
+    return json.dumps(value).replace("<", "\\u003c")
+
+
 def default_import_map() -> str:
     path_prefix = REACTPY_PATH_PREFIX.current.strip("/")
     return f"""{{
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import pickle
+import socket
+from asyncio import IncompleteReadError, StreamReader, StreamWriter
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from secrets import token_bytes
+from tempfile import TemporaryDirectory
+from time import monotonic
+from typing import Any
+
+from anyio import create_task_group, sleep_forever
+
+from reactpy.core._signing import SignedUnpickler, sign
+from reactpy.core.hooks import ConnectionContext
+from reactpy.core.layout import Layout
+from reactpy.core.serve import RecvCoroutine, SendCoroutine, serve_layout
+from reactpy.executors.utils import process_settings
+from reactpy.types import Connection, Location, ReactPyConfig
+from reactpy.utils import import_dotted_path
+
+logger = logging.getLogger(__name__)
+
+_FORWARDED_SCOPE_KEYS = (
+    "type",
+    "asgi",
+    "http_version",
+    "scheme",
+    "server",
+    "client",
+    "root_path",
+    "path",
+    "raw_path",
+    "query_string",
+    "headers",
+    "subprotocols",
+)
+"""Parts of a connection's scope which are sent to the worker that serves it"""
+
+_CONNECT_TIMEOUT = 30
+"""Seconds to wait for a worker process to start accepting sessions"""
+
+_STOP_TIMEOUT = 5
+"""Seconds to wait for a worker process to exit before killing it"""
+
+
+class LayoutWorkerPool:
+    """Worker processes which each host the layouts of a share of the sessions
+
+    Every session is served by the worker with the fewest sessions at the time it
+    starts. The worker renders the session's layout, and messages to and from the client
+    are forwarded to it over a Unix socket. Messages are signed with a key which only
+    the pool and its workers know, and a worker which has died is restarted when the
+    next session starts.
+
+    Parameters:
+        processes: The number of worker processes to start.
+        settings: ReactPy settings to apply within each worker.
+    """
+
+    def __init__(self, processes: int, settings: ReactPyConfig | None = None) -> None:
+        if not hasattr(socket, "AF_UNIX"):  # nocov
+            msg = "Hosting layouts in worker processes requires Unix sockets."
+            raise RuntimeError(msg)
+        self.processes = processes
+        self.settings = settings or {}
+        self._workers: list[_Worker] = []
+        self._directory: TemporaryDirectory[str] | None = None
+        self._key = token_bytes(32)
+
+    def start(self) -> None:
+        """Start the worker processes, if they have not been started already"""
+        if self._workers:
+            return None
+        self._directory = TemporaryDirectory(prefix="reactpy-workers-")
+        for index in range(self.processes):
+            path = Path(self._directory.name) / f"worker-{index}.sock"
+            self._workers.append(_Worker(path, self._start_process(index, path)))
+        return None
+
+    async def stop(self) -> None:
+        """Stop the worker processes, ending every session they serve"""
+        for worker in self._workers:
+            worker.process.terminate()
+        await asyncio.gather(*(_join(worker.process) for worker in self._workers))
+        self._workers.clear()
+        if self._directory is not None:
+            self._directory.cleanup()
+            self._directory = None
+
+    async def restart_stopped(self) -> None:
+        """Restart any worker processes which have died"""
+        for index, worker in enumerate(self._workers):
+            if worker.process.is_alive():
+                continue
+            logger.warning(
+                "Layout worker %s exited with code %s, restarting it",
+                worker.process.name,
+                worker.process.exitcode,
+            )
+            await _join(worker.process)
+            worker.process = self._start_process(index, worker.path)
+
+    def session_counts(self) -> list[int]:
+        """The number of sessions each worker is serving"""
+        return [worker.sessions for worker in self._workers]
+
+    async def serve(
+        self,
+        component_path: str,
+        connection: Connection[Any],
+        send: SendCoroutine,
+        recv: RecvCoroutine,
+    ) -> None:
+        """Serve the component at the given dotted path in the least busy worker"""
+        self.start()
+        await self.restart_stopped()
+        worker = min(self._workers, key=lambda w: w.sessions)
+        worker.sessions += 1
+        try:
+            reader, writer = await _connect(worker.path)
+            try:
+                await _write_message(
+                    writer,
+                    self._key,
+                    {
+                        "component": component_path,
+                        "scope": {
+                            k: v
+                            for k, v in connection.scope.items()
+                            if k in _FORWARDED_SCOPE_KEYS
+                        },
+                        "location": connection.location,
+                    },
+                )
+                await _forward_messages(reader, writer, self._key, send, recv)
+            finally:
+                writer.close()
+        finally:
+            worker.sessions -= 1
+
+    def _start_process(self, index: int, path: Path) -> BaseProcess:
+        # The key is sent to the process through a pipe, rather than its arguments.
+        process = get_context("spawn").Process(
+            target=run_layout_worker,
+            args=(str(path), self._key, self.settings),
+            name=f"reactpy-layout-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+
+@dataclass
+class _Worker:
+    path: Path
+    process: BaseProcess
+    sessions: int = 0
+
+
+def run_layout_worker(path: str, key: bytes, settings: ReactPyConfig) -> None:
+    """Accept sessions on the given Unix socket and serve their layouts
+
+    Only messages signed with the given key are accepted.
+    """
+    process_settings(settings)
+    asyncio.run(_serve_sessions(path, key))
+
+
+async def _serve_sessions(path: str, key: bytes) -> None:
+    server = await asyncio.start_unix_server(partial(_serve_session, key=key), path)
+    async with server:
+        await server.serve_forever()
+
+
+async def _serve_session(
+    reader: StreamReader, writer: StreamWriter, key: bytes
+) -> None:
+    try:
+        request = await _read_message(reader, key)
+        if request is None:  # nocov
+            return None
+        component = import_dotted_path(request["component"])
+        location: Location = request["location"]
+        # The carrier (the websocket) stays behind in the server's process.
+        connection = Connection(scope=request["scope"], location=location, carrier=None)
+
+        async with create_task_group() as task_group:
+
+            async def send(message: Any) -> None:
+                await _write_message(writer, key, message)
+
+            async def recv() -> Any:
+                message = await _read_message(reader, key)
+                if message is None:
+                    # the client disconnected
+                    task_group.cancel_scope.cancel()
+                    await sleep_forever()
+                return message
+
+            task_group.start_soon(
+                serve_layout,
+                Layout(ConnectionContext(component(), value=connection)),
+                send,
+                recv,
+            )
+    except pickle.UnpicklingError:
+        logger.warning("Refused a session with an invalid signature")
+    except Exception:
+        logger.exception("Failed to serve session")
+    finally:
+        writer.close()
+
+
+async def _forward_messages(
+    reader: StreamReader,
+    writer: StreamWriter,
+    key: bytes,
+    send: SendCoroutine,
+    recv: RecvCoroutine,
+) -> None:
+    async with create_task_group() as task_group:
+
+        async def forward_events() -> None:
+            while True:
+                await _write_message(writer, key, await recv())
+
+        task_group.start_soon(forward_events)
+        while (message := await _read_message(reader, key)) is not None:
+            await send(message)
+        # the worker ended the session
+        task_group.cancel_scope.cancel()
+
+
+async def _join(process: BaseProcess) -> None:
+    """Wait for the process to exit without blocking the event loop, killing it if it
+    takes too long"""
+    await asyncio.to_thread(process.join, _STOP_TIMEOUT)
+    if process.is_alive():
+        logger.warning("Layout worker %s did not stop, killing it", process.name)
+        process.kill()
+        await asyncio.to_thread(process.join)
+
+
+async def _connect(path: Path) -> tuple[StreamReader, StreamWriter]:
+    # The worker may still be starting up.
+    deadline = monotonic() + _CONNECT_TIMEOUT
+    while True:
+        try:
+            return await asyncio.open_unix_connection(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def _read_message(reader: StreamReader, key: bytes) -> Any:
+    """Read a message, or return ``None`` once the other end has closed
+
+    Raises ``pickle.UnpicklingError`` if the message was not signed with the given key.
+    """
+    try:
+        size = int.from_bytes(await reader.readexactly(4))
+        data = await reader.readexactly(size)
+    except (IncompleteReadError, ConnectionError):
+        return None
+    return SignedUnpickler(key, data).load()
+
+
+async def _write_message(writer: StreamWriter, key: bytes, message: Any) -> None:
+    data = sign(key, pickle.dumps(message))
+    writer.write(len(data).to_bytes(4) + data)
+    await writer.drain()
@@ -1,3 +1,4 @@
+from collections.abc import Awaitable
 from typing import ClassVar
 from uuid import uuid4
 
@@ -14,8 +15,14 @@ class ReactPyJinja(StandaloneTag):  # type: ignore
     safe_output = True
     tags: ClassVar[set[str]] = {"component", "pyscript_component", "pyscript_setup"}
 
-    def render(self, *args: str, **kwargs: str) -> str:
+    def render(self, *args: str, **kwargs: str) -> str | Awaitable[str]:
         if self.tag_name == "component":
+            if kwargs.pop("embed_first_render", False):
+                if not self.environment.is_async:
+                    raise ValueError(
+                        "Embedding the first render of a component requires an async Jinja environment."
+                    )
+                return embedded_component(*args, **kwargs)
             return component(*args, **kwargs)
 
         if self.tag_name == "pyscript_component":
@@ -37,6 +44,45 @@ def component(dotted_path: str, **kwargs: str) -> str:
     )
 
 
+async def embedded_component(dotted_path: str, **kwargs: str) -> str:
+    """Start the component's layout for the current request, and embed its first render.
+
+    The layout is handed to the component's websocket once the page connects it. When
+    layouts are hosted by worker processes, the websocket is served by a worker which
+    can't take over a layout from here, so the first render is not embedded."""
+    from reactpy.executors.asgi.middleware import _current_http_request
+
+    class_ = kwargs.pop("class", "")
+    if kwargs:
+        raise ValueError(f"Unexpected keyword arguments: {', '.join(kwargs)}")
+    request = _current_http_request.get()
+    if request is None:
+        raise ValueError(
+            "Embedding the first render of a component requires the page to be served through `ReactPyMiddleware`."
+        )
+    middleware, scope, receive, send = request
+    if dotted_path not in middleware.root_components:
+        raise ValueError(
+            f"Attempting to use an unregistered root component {dotted_path}."
+        )
+
+    if middleware.layout_workers is not None:
+        return server_side_component_html(
+            element_id=uuid4().hex, class_=class_, component_path=f"{dotted_path}/"
+        )
+
+    session, update = await middleware.start_session(
+        middleware.root_components[dotted_path], scope, receive, send
+    )
+    return server_side_component_html(
+        element_id=uuid4().hex,
+        class_=class_,
+        component_path=f"{dotted_path}/",
+        first_render=update,
+        session_token=session.token,
+    )
+
+
 def pyscript_component(*file_paths: str, initial: str = "", root: str = "root") -> str:
     return pyscript_component_html(file_paths=file_paths, initial=initial, root=root)
 
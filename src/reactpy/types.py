@@ -39,10 +39,24 @@ RootComponentConstructor = Callable[[], "Component"]
 Key: TypeAlias = str | int
 
 
+PropsComparator = Callable[[dict[str, Any], dict[str, Any]], bool]
+"""Returns whether the old and new props of a memoized component are equal"""
+
+
 class Component:
     """An object for rending component models."""
 
-    __slots__ = "__weakref__", "_args", "_func", "_kwargs", "_sig", "key", "type"
+    __slots__ = (
+        "__weakref__",
+        "_args",
+        "_func",
+        "_kwargs",
+        "_sig",
+        "key",
+        "memo",
+        "offload",
+        "type",
+    )
 
     def __init__(
         self,
@@ -51,9 +65,14 @@ class Component:
         args: tuple[Any, ...],
         kwargs: dict[str, Any],
         sig: inspect.Signature,
+        *,
+        memo: bool | PropsComparator = False,
+        offload: Literal["thread"] | None = None,
     ) -> None:
         self.key = key
         self.type = function
+        self.memo = memo
+        self.offload = offload
         self._args = args
         self._kwargs = kwargs
         self._sig = sig
@@ -61,6 +80,25 @@ class Component:
     def render(self) -> Component | VdomDict | str | None:
         return self.type(*self._args, **self._kwargs)
 
+    def props_equal(self, other: Component) -> bool:
+        """Whether this component was given the same props as another one"""
+        if callable(self.memo):
+            return self.memo(
+                other._sig.bind(*other._args, **other._kwargs).arguments,
+                self._sig.bind(*self._args, **self._kwargs).arguments,
+            )
+
+        from reactpy.core.hooks import strictly_equal
+
+        return (
+            len(self._args) == len(other._args)
+            and self._kwargs.keys() == other._kwargs.keys()
+            and all(map(strictly_equal, self._args, other._args))
+            and all(
+                strictly_equal(v, other._kwargs[k]) for k, v in self._kwargs.items()
+            )
+        )
+
     def __repr__(self) -> str:
         try:
             args = self._sig.bind(*self._args, **self._kwargs).arguments
@@ -85,8 +123,6 @@ class BaseLayout(Protocol[_Render_co, _Event_contra]):
         "__weakref__",
         "_event_handlers",
         "_model_states_by_life_cycle_state_id",
-        "_render_tasks",
-        "_render_tasks_ready",
         "_rendering_queue",
         "_root_life_cycle_state_id",
         "root",
@@ -884,6 +920,17 @@ class VdomDict(dict):
         super().__setitem__(key, value)
 
 
+class StaticVdomDict(VdomDict):
+    """A :class:`VdomDict` whose subtree never changes - see :func:`reactpy.html.static`
+
+    Its JSON model is built once, when it is created. Layouts then use that model as is,
+    rather than rendering the subtree again whenever the component returning it renders.
+    """
+
+    model: VdomJson
+    """The JSON model of the subtree, shared by every layout which renders it"""
+
+
 VdomChild: TypeAlias = Component | VdomDict | str | None | Any
 """A single child element of a :class:`VdomDict`"""
 
@@ -1040,6 +1087,52 @@ class LayoutUpdateMessage(TypedDict):
     """The model to assign at the given JSON Pointer path"""
 
 
+# functional syntax since "from" is a keyword
+LayoutPatchOperation = TypedDict(
+    "LayoutPatchOperation",
+    {
+        # The kind of change
+        "op": Literal["add", "remove", "replace", "move"],
+        # JSON Pointer path to the changed location, relative to the patched model
+        "path": str,
+        # The value to add or replace at the given path
+        "value": NotRequired[Any],
+        # JSON Pointer path, relative to the patched model, of the value to move
+        "from": NotRequired[str],
+    },
+)
+"""A single JSON Patch style change to a model"""
+
+
+class LayoutPatchMessage(TypedDict):
+    """A message describing fine-grained changes to a layout"""
+
+    type: Literal["layout-patch"]
+    """The type of message"""
+    path: str
+    """JSON Pointer path to the model element being patched"""
+    changes: list[LayoutPatchOperation]
+    """The changes to apply, in order, to the model at the given path"""
+
+
+class LayoutBatchMessage(TypedDict):
+    """A message containing several updates to a layout which should be applied at once"""
+
+    type: Literal["layout-batch"]
+    """The type of message"""
+    updates: list[LayoutUpdateMessage | LayoutPatchMessage]
+    """The updates to apply, in order"""
+
+
+class SessionTokenMessage(TypedDict):
+    """A message giving the token with which a client may resume its session"""
+
+    type: Literal["session-token"]
+    """The type of message"""
+    token: str
+    """The token to reconnect with"""
+
+
 class LayoutEventMessage(TypedDict):
     """Message describing an event originating from an element in the layout"""
 
@@ -1074,6 +1167,8 @@ class ContextProvider(Component, Generic[_Type]):
         self.key = key
         self.type = type
         self.value = value
+        self.memo = False
+        self.offload = None
 
     def render(self) -> VdomDict:
         from reactpy.core.hooks import HOOK_STACK
@@ -1132,6 +1227,14 @@ class ReactPyConfig(TypedDict, total=False):
     debug: bool
     max_queue_size: int
     tests_default_timeout: int
+    diff_updates: bool
+    render_batch_window: int
+    render_slice_ms: int
+    max_concurrent_renders: int
+    session_resume_timeout: float
+    session_hibernate_timeout: float
+    session_handoff_timeout: float
+    layout_processes: int
 
 
 class PyScriptOptions(TypedDict, total=False):
@@ -1,18 +1,29 @@
 # ruff: noqa: S701
 import asyncio
+import json
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 from jinja2 import Environment as JinjaEnvironment
 from jinja2 import FileSystemLoader as JinjaFileSystemLoader
 from requests import request
 from starlette.applications import Starlette
+from starlette.responses import HTMLResponse
 from starlette.routing import Route
 from starlette.templating import Jinja2Templates
 
 import reactpy
-from reactpy.config import REACTPY_PATH_PREFIX, REACTPY_TESTS_DEFAULT_TIMEOUT
-from reactpy.executors.asgi.middleware import ReactPyMiddleware
+from reactpy.config import (
+    REACTPY_LAYOUT_PROCESSES,
+    REACTPY_PATH_PREFIX,
+    REACTPY_SESSION_RESUME_TIMEOUT,
+    REACTPY_TESTS_DEFAULT_TIMEOUT,
+)
+from reactpy.executors.asgi.middleware import (
+    ReactPyMiddleware,
+    _current_http_request,
+)
 from reactpy.testing import BackendFixture, DisplayFixture
 
 
@@ -174,3 +185,148 @@ async def test_templatetag_bad_kwargs(browser):
             # This test could be improved by actually checking if `bad kwargs` error message is shown in
             # `stderr`, but I was struggling to get that to work.
             assert "internal server error" in (await new_display.page.content()).lower()
+
+
+async def test_templatetag_embed_first_render():
+    env = JinjaEnvironment(
+        loader=JinjaFileSystemLoader("tests/templates"),
+        extensions=["reactpy.templatetags.ReactPyJinja"],
+        enable_async=True,
+    )
+
+    async def homepage(request):
+        content = await env.get_template("jinja_embedded.html").render_async()
+        return HTMLResponse(content)
+
+    app = Starlette(routes=[Route("/", homepage)])
+    app = ReactPyMiddleware(app, root_components=["tests.sample.SampleApp"])
+
+    async with BackendFixture(app) as server:
+        url = f"http://{server.host}:{server.port}"
+        response = await asyncio.to_thread(
+            request, "GET", url, timeout=REACTPY_TESTS_DEFAULT_TIMEOUT.current
+        )
+
+    assert response.status_code == 200
+    assert "initialModel: " in response.text
+    assert '"children": ["Sample Application"]' in response.text
+    assert 'sessionToken: "' in response.text
+    assert 'componentPath: "tests.sample.SampleApp/"' in response.text
+
+
+async def test_templatetag_embed_first_render_with_layout_processes():
+    env = JinjaEnvironment(
+        loader=JinjaFileSystemLoader("tests/templates"),
+        extensions=["reactpy.templatetags.ReactPyJinja"],
+        enable_async=True,
+    )
+
+    async def homepage(request):
+        content = await env.get_template("jinja_embedded.html").render_async()
+        return HTMLResponse(content)
+
+    app = Starlette(routes=[Route("/", homepage)])
+    with patch.object(REACTPY_LAYOUT_PROCESSES, "current", 1):
+        app = ReactPyMiddleware(app, root_components=["tests.sample.SampleApp"])
+
+    async with BackendFixture(app) as server:
+        url = f"http://{server.host}:{server.port}"
+        response = await asyncio.to_thread(
+            request, "GET", url, timeout=REACTPY_TESTS_DEFAULT_TIMEOUT.current
+        )
+
+    assert response.status_code == 200
+    # The websocket is served by a worker, which can't take over a layout from here.
+    assert "initialModel: " not in response.text
+    assert "sessionToken" not in response.text
+    assert 'componentPath: "tests.sample.SampleApp/"' in response.text
+    assert len(app.sessions) == 0
+
+
+async def _open_websocket(app, component_path, query_string):
+    """Connect to the app's websocket, returning its inbox, outbox, and task"""
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    inbox.put_nowait({"type": "websocket.connect"})
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "path": f"{REACTPY_PATH_PREFIX.current}{component_path}/",
+        "query_string": query_string.encode(),
+        "headers": [],
+        "subprotocols": [],
+    }
+    task = asyncio.create_task(app(scope, inbox.get, outbox.put))
+    assert (await outbox.get())["type"] == "websocket.accept"
+    return inbox, outbox, task
+
+
+async def _receive_json(outbox):
+    message = await asyncio.wait_for(
+        outbox.get(), REACTPY_TESTS_DEFAULT_TIMEOUT.current
+    )
+    return json.loads(message["text"])
+
+
+async def test_websocket_resumes_session_given_in_query_string():
+    async def app(scope, receive, send): ...
+
+    app = ReactPyMiddleware(app, root_components=["tests.sample.SampleApp"])
+
+    with patch.object(REACTPY_SESSION_RESUME_TIMEOUT, "current", 10):
+        inbox, outbox, task = await _open_websocket(
+            app, "tests.sample.SampleApp", "path=/&qs="
+        )
+        token_message = await _receive_json(outbox)
+        assert token_message["type"] == "session-token"
+        assert (await _receive_json(outbox))["type"] == "layout-update"
+        inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await task
+
+        inbox, outbox, task = await _open_websocket(
+            app,
+            "tests.sample.SampleApp",
+            f"path=/&qs=&session={token_message['token']}",
+        )
+        new_token_message = await _receive_json(outbox)
+        assert new_token_message["type"] == "session-token"
+        assert new_token_message["token"] != token_message["token"]
+        # the existing session was resumed rather than a new one being opened
+        assert len(app.sessions) == 1
+        inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await task
+
+
+async def test_websocket_with_unknown_session_serves_a_new_layout():
+    async def app(scope, receive, send): ...
+
+    app = ReactPyMiddleware(app, root_components=["tests.sample.SampleApp"])
+
+    inbox, outbox, task = await _open_websocket(
+        app, "tests.sample.SampleApp", "path=/&qs=&session=not-a-token"
+    )
+    # no session is opened, since resuming sessions is not enabled
+    assert (await _receive_json(outbox))["type"] == "layout-update"
+    assert len(app.sessions) == 0
+    inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+    await task
+
+
+async def test_current_http_request_is_reset_after_the_request():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(_current_http_request.get())
+
+    app = ReactPyMiddleware(app, root_components=[])
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "headers": [],
+    }
+    await app(scope, None, None)
+
+    assert seen == [(app, scope, None, None)]
+    assert _current_http_request.get() is None
@@ -1,6 +1,13 @@
 import asyncio
+import multiprocessing
+import pickle
+import re
+import signal
 from collections.abc import MutableMapping
+from secrets import token_bytes
+from unittest.mock import patch
 
+import orjson
 import pytest
 from asgi_tools import ResponseText
 from asgiref.testing import ApplicationCommunicator
@@ -8,11 +15,14 @@ from requests import request
 
 import reactpy
 from reactpy import html
-from reactpy.config import REACTPY_TESTS_DEFAULT_TIMEOUT
+from reactpy.config import REACTPY_LAYOUT_PROCESSES, REACTPY_TESTS_DEFAULT_TIMEOUT
+from reactpy.core._signing import sign
 from reactpy.executors.asgi.middleware import _location_from_websocket_query_string
 from reactpy.executors.asgi.standalone import ReactPy
+from reactpy.executors.workers import LayoutWorkerPool, _read_message
 from reactpy.testing import BackendFixture, DisplayFixture, poll
 from reactpy.types import Connection, Location
+from tests.sample import SampleApp
 
 
 async def test_display_simple_hello_world(display: DisplayFixture):
@@ -251,6 +261,274 @@ async def test_prepend_body_disabled():
         assert "<noscript>" not in response.text
 
 
+async def test_prerender():
+    @reactpy.component
+    def sample():
+        location = reactpy.use_location()
+        count, _ = reactpy.use_state(0)
+        return html.h1(f"{location.path}{location.query_string} {count}")
+
+    app = ReactPy(sample, prerender=True)
+
+    async with BackendFixture(app) as server:
+        url = f"http://{server.host}:{server.port}/some/path?a=1"
+        response = await asyncio.to_thread(
+            request, "GET", url, timeout=REACTPY_TESTS_DEFAULT_TIMEOUT.current
+        )
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache"
+        assert "etag" not in response.headers
+        assert '<div id="app" class=""><h1>/some/path?a=1 0</h1></div>' in response.text
+        # the layout which rendered the page waits to be handed to the websocket
+        assert 'sessionToken: "' in response.text
+        assert len(app.sessions) == 1
+
+
+async def test_embed_first_render():
+    render_count = reactpy.Ref(0)
+
+    @reactpy.component
+    def sample():
+        render_count.current += 1
+        return html.h1("Hello World")
+
+    app = ReactPy(sample, embed_first_render=True)
+
+    http_scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+    }
+    communicator = ApplicationCommunicator(app, http_scope)
+    await communicator.send_input({"type": "http.request"})
+    await communicator.receive_output()
+    body = (await communicator.receive_output())["body"].decode()
+
+    assert '<div id="app" class=""></div>' in body
+    initial_model = re.search(r"initialModel: (.*),  sessionToken", body)[1]
+    assert '{"tagName": "h1", "children": ["Hello World"]}' in initial_model
+    token = re.search(r'sessionToken: "([^"]+)"', body)[1]
+    assert render_count.current == 1
+
+    ws_scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "scheme": "ws",
+        "path": app.dispatcher_path,
+        "raw_path": app.dispatcher_path.encode(),
+        "query_string": f"path=/&session={token}".encode(),
+        "root_path": "",
+        "headers": [],
+        "subprotocols": [],
+    }
+    communicator = ApplicationCommunicator(app, ws_scope)
+    await communicator.send_input({"type": "websocket.connect"})
+    assert (await communicator.receive_output())["type"] == "websocket.accept"
+    message = orjson.loads((await communicator.receive_output())["text"])
+
+    # The layout that rendered the page was handed to the websocket, not remounted.
+    assert message["type"] == "session-token"
+    assert message["token"] != token
+    assert render_count.current == 1
+    assert len(app.sessions) == 1
+
+    await communicator.send_input({"type": "websocket.disconnect"})
+    await communicator.wait()
+
+
+async def test_layout_processes():
+    with patch.object(REACTPY_LAYOUT_PROCESSES, "current", 2):
+        app = ReactPy(SampleApp)
+    assert app.layout_workers is not None
+
+    ws_scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "scheme": "ws",
+        "path": app.dispatcher_path,
+        "raw_path": app.dispatcher_path.encode(),
+        "query_string": b"path=/",
+        "root_path": "",
+        "headers": [],
+        "subprotocols": [],
+    }
+    timeout = REACTPY_TESTS_DEFAULT_TIMEOUT.current * 5
+    communicators = [ApplicationCommunicator(app, ws_scope) for _ in range(2)]
+    try:
+        for communicator in communicators:
+            await communicator.send_input({"type": "websocket.connect"})
+            assert (await communicator.receive_output())["type"] == "websocket.accept"
+            output = await communicator.receive_output(timeout)
+            message = orjson.loads(output["text"])
+            assert message["type"] == "layout-update"
+            assert "Sample Application" in output["text"]
+
+        # Each session is served by a different worker.
+        assert app.layout_workers.session_counts() == [1, 1]
+
+        for communicator in communicators:
+            await communicator.send_input({"type": "websocket.disconnect"})
+            await communicator.wait()
+        await poll(app.layout_workers.session_counts).until_equals([0, 0])
+    finally:
+        await app.layout_workers.stop()
+
+
+async def test_layout_processes_are_restarted_after_exiting():
+    with patch.object(REACTPY_LAYOUT_PROCESSES, "current", 1):
+        app = ReactPy(SampleApp)
+    assert app.layout_workers is not None
+
+    ws_scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "path": app.dispatcher_path,
+        "query_string": b"path=/",
+        "headers": [],
+    }
+    timeout = REACTPY_TESTS_DEFAULT_TIMEOUT.current * 5
+    try:
+        app.layout_workers.start()
+        (worker,) = _layout_worker_processes()
+        worker.kill()
+        worker.join()
+
+        communicator = ApplicationCommunicator(app, ws_scope)
+        await communicator.send_input({"type": "websocket.connect"})
+        assert (await communicator.receive_output())["type"] == "websocket.accept"
+        output = await communicator.receive_output(timeout)
+        assert "Sample Application" in output["text"]
+        (restarted_worker,) = _layout_worker_processes()
+        assert restarted_worker.pid != worker.pid
+
+        await communicator.send_input({"type": "websocket.disconnect"})
+        await communicator.wait()
+    finally:
+        await app.layout_workers.stop()
+
+
+async def test_layout_processes_run_during_lifespan():
+    with patch.object(REACTPY_LAYOUT_PROCESSES, "current", 2):
+        app = ReactPy(SampleApp)
+
+    communicator = ApplicationCommunicator(app, {"type": "lifespan"})
+    await communicator.send_input({"type": "lifespan.startup"})
+    assert (await communicator.receive_output())["type"] == "lifespan.startup.complete"
+    assert len(_layout_worker_processes()) == 2
+
+    await communicator.send_input({"type": "lifespan.shutdown"})
+    assert (await communicator.receive_output())["type"] == "lifespan.shutdown.complete"
+    await communicator.wait()
+    assert _layout_worker_processes() == []
+
+
+async def test_layout_processes_stop_with_custom_lifespan_app():
+    with patch.object(REACTPY_LAYOUT_PROCESSES, "current", 1):
+        app = ReactPy(SampleApp)
+    events = []
+
+    @app.lifespan
+    async def custom_lifespan_app(scope, receive, send) -> None:
+        while True:
+            message = await receive()
+            events.append((message["type"], len(_layout_worker_processes())))
+            await send({"type": f"{message['type']}.complete"})
+            if message["type"] == "lifespan.shutdown":
+                return None
+
+    communicator = ApplicationCommunicator(app, {"type": "lifespan"})
+    await communicator.send_input({"type": "lifespan.startup"})
+    assert (await communicator.receive_output())["type"] == "lifespan.startup.complete"
+    await communicator.send_input({"type": "lifespan.shutdown"})
+    assert (await communicator.receive_output())["type"] == "lifespan.shutdown.complete"
+    await communicator.wait()
+
+    # The workers run while the user's app starts up and shuts down.
+    assert events == [("lifespan.startup", 1), ("lifespan.shutdown", 1)]
+    assert _layout_worker_processes() == []
+
+
+async def test_prerender_with_layout_processes_does_not_start_a_session():
+    @reactpy.component
+    def sample():
+        return html.h1("Hello World")
+
+    with patch.object(REACTPY_LAYOUT_PROCESSES, "current", 1):
+        app = ReactPy(sample, prerender=True, embed_first_render=True)
+
+    http_scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+    }
+    communicator = ApplicationCommunicator(app, http_scope)
+    await communicator.send_input({"type": "http.request"})
+    await communicator.receive_output()
+    body = (await communicator.receive_output())["body"].decode()
+    await communicator.wait()
+
+    assert '<div id="app" class=""><h1>Hello World</h1></div>' in body
+    # The websocket is served by a worker, which can't take over a layout from here.
+    assert "sessionToken" not in body
+    assert len(app.sessions) == 0
+
+
+async def test_layout_processes_refuse_messages_signed_with_another_key():
+    pool = LayoutWorkerPool(1)
+    reader = asyncio.StreamReader()
+    reader.feed_data(_signed_message(pool._key, {"type": "layout-event"}))
+    reader.feed_data(_signed_message(token_bytes(32), {"type": "layout-event"}))
+    reader.feed_eof()
+
+    assert await _read_message(reader, pool._key) == {"type": "layout-event"}
+    with pytest.raises(pickle.UnpicklingError):
+        await _read_message(reader, pool._key)
+
+
+async def test_layout_processes_are_killed_if_they_do_not_stop():
+    pool = LayoutWorkerPool(1)
+    pool.start()
+    (worker,) = pool._workers
+    process = worker.process
+    # a worker stuck somewhere that doesn't respond to being terminated
+    process.terminate = lambda: None
+
+    with patch("reactpy.executors.workers._STOP_TIMEOUT", 0.1):
+        await pool.stop()
+
+    assert process.exitcode == -signal.SIGKILL
+    assert not pool._workers
+
+
+def _signed_message(key, message):
+    data = sign(key, pickle.dumps(message))
+    return len(data).to_bytes(4) + data
+
+
+def _layout_worker_processes():
+    return [
+        process
+        for process in multiprocessing.active_children()
+        if process.name.startswith("reactpy-layout-worker-")
+    ]
+
+
 async def test_head_request():
     @reactpy.component
     def sample():
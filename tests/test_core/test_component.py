@@ -1,4 +1,9 @@
+import threading
+
+import pytest
+
 import reactpy
+from reactpy.core.layout import Layout
 from reactpy.testing import DisplayFixture
 
 
@@ -71,3 +76,55 @@ async def test_pre_tags_are_rendered_correctly(display: DisplayFixture):
     assert (
         await pre.evaluate("node => node.innerHTML")
     ) == "<span>this<span>is</span>some</span>pre-formatted text"
+
+
+def test_memo_component_props_equal():
+    @reactpy.component(memo=True)
+    def MyComponent(a, b=None): ...
+
+    assert MyComponent(1, b=[1]).props_equal(MyComponent(1, b=[1]))
+    assert not MyComponent(1, b=[1]).props_equal(MyComponent(1, b=[2]))
+    assert not MyComponent(1).props_equal(MyComponent(1, b=None))
+    assert not MyComponent(1).props_equal(MyComponent(1, 2))
+
+
+def test_memo_component_custom_props_comparator():
+    @reactpy.component(memo=lambda old, new: old["a"]["id"] == new["a"]["id"])
+    def MyComponent(a, b=None): ...
+
+    assert MyComponent({"id": 1}).props_equal(MyComponent({"id": 1}, b=2))
+    assert not MyComponent({"id": 1}).props_equal(MyComponent({"id": 2}))
+
+
+def test_component_key_is_reserved_with_options():
+    def MyComponent(key): ...
+
+    with pytest.raises(TypeError, match=r"uses reserved parameter 'key'"):
+        reactpy.component(memo=True)(MyComponent)
+
+
+def test_component_offload_must_be_supported():
+    with pytest.raises(ValueError, match=r"Unsupported offload 'process'"):
+        reactpy.component(offload="process")
+
+
+async def test_component_offloaded_to_thread():
+    render_threads = []
+    set_count = reactpy.Ref()
+
+    @reactpy.component(offload="thread")
+    def Counter():
+        render_threads.append(threading.current_thread())
+        count, set_count.current = reactpy.use_state(0)
+        return reactpy.html.p(count)
+
+    async with Layout(Counter()) as layout:
+        update = await layout.render()
+        assert update["model"]["children"][0]["children"] == ["0"]
+
+        set_count.current(1)
+        update = await layout.render()
+        assert update["model"]["children"][0]["children"] == ["1"]
+
+    assert len(render_threads) == 2
+    assert threading.main_thread() not in render_threads
@@ -5,8 +5,12 @@ import pytest
 import reactpy
 from reactpy import html
 from reactpy.config import REACTPY_DEBUG
-from reactpy.core._life_cycle_hook import LifeCycleHook
-from reactpy.core.hooks import strictly_equal, use_effect
+from reactpy.core._life_cycle_hook import HOOK_STACK, LifeCycleHook
+from reactpy.core.hooks import (
+    _try_to_infer_closure_values,
+    strictly_equal,
+    use_effect,
+)
 from reactpy.core.layout import Layout
 from reactpy.testing import (
     DEFAULT_TYPE_DELAY,
@@ -1106,6 +1110,154 @@ async def test_use_context_updates_components_even_if_memoized():
         assert value.current == 2
 
 
+async def test_context_change_only_renders_subscribed_components():
+    Context = reactpy.create_context(None)
+
+    value = reactpy.Ref(None)
+    render_counts = {"memoized": 0, "consumer": 0, "other": 0}
+    set_state = reactpy.Ref()
+
+    @reactpy.component
+    def ComponentProvidesContext():
+        state, set_state.current = reactpy.use_state(0)
+        return Context(MemoizedComponent(), OtherComponent(), value=state)
+
+    @reactpy.component(memo=True)
+    def MemoizedComponent():
+        render_counts["memoized"] += 1
+        return html.div(ComponentUsesContext())
+
+    @reactpy.component
+    def ComponentUsesContext():
+        value.current = reactpy.use_context(Context)
+        render_counts["consumer"] += 1
+        return html.div()
+
+    @reactpy.component(memo=True)
+    def OtherComponent():
+        render_counts["other"] += 1
+        return html.div()
+
+    async with Layout(ComponentProvidesContext()) as layout:
+        await layout.render()
+        assert value.current == 0
+
+        set_state.current(1)
+        # the subscribed component renders in the same batch as the provider
+        await layout.render()
+        assert value.current == 1
+        assert render_counts == {"memoized": 1, "consumer": 2, "other": 1}
+
+
+async def test_context_subscription_ends_when_consumer_uses_another_context():
+    ContextA = reactpy.create_context(0)
+    ContextB = reactpy.create_context(0)
+
+    consumer_hook = reactpy.Ref()
+    set_use_b = reactpy.Ref()
+
+    @reactpy.component
+    def ComponentProvidesContext():
+        return ContextA(ContextB(ComponentUsesContext(), value=0), value=0)
+
+    @reactpy.component
+    def ComponentUsesContext():
+        use_b, set_use_b.current = reactpy.use_state(False)
+        reactpy.use_context(ContextB if use_b else ContextA)
+        consumer_hook.current = HOOK_STACK.current_hook()
+        return html.div()
+
+    def subscribers(context):
+        hook = consumer_hook.current._find_context_provider_hook(context)
+        return hook._context_subscribers[context]
+
+    async with Layout(ComponentProvidesContext()) as layout:
+        await layout.render()
+        assert consumer_hook.current in subscribers(ContextA)
+
+        set_use_b.current(True)
+        await layout.render()
+        assert consumer_hook.current not in subscribers(ContextA)
+        assert consumer_hook.current in subscribers(ContextB)
+
+
+async def test_context_subscription_ends_when_consumer_unmounts():
+    Context = reactpy.create_context(0)
+
+    provider_hook = reactpy.Ref()
+    consumer_hook = reactpy.Ref()
+    set_show = reactpy.Ref()
+
+    @reactpy.component
+    def ComponentProvidesContext():
+        show, set_show.current = reactpy.use_state(True)
+        return Context(ComponentUsesContext() if show else html.div(), value=0)
+
+    @reactpy.component
+    def ComponentUsesContext():
+        reactpy.use_context(Context)
+        # keep the hook alive so its subscription can't just be garbage collected
+        consumer_hook.current = HOOK_STACK.current_hook()
+        provider_hook.current = consumer_hook.current._find_context_provider_hook(
+            Context
+        )
+        return html.div()
+
+    async with Layout(ComponentProvidesContext()) as layout:
+        await layout.render()
+        assert len(provider_hook.current._context_subscribers[Context]) == 1
+
+        set_show.current(False)
+        await layout.render()
+        assert len(provider_hook.current._context_subscribers[Context]) == 0
+
+
+async def test_use_context_selector_only_renders_when_selection_changes():
+    Context = reactpy.create_context({"a": 0, "b": 0})
+
+    selected = {"a": None, "b": None}
+    render_counts = {"a": 0, "b": 0}
+    set_state = reactpy.Ref()
+
+    @reactpy.component
+    def ComponentProvidesContext():
+        state, set_state.current = reactpy.use_state({"a": 0, "b": 0})
+        return Context(MemoizedComponent(), value=state)
+
+    @reactpy.component(memo=True)
+    def MemoizedComponent():
+        return html.div(ComponentSelects("a"), ComponentSelects("b"))
+
+    @reactpy.component
+    def ComponentSelects(field):
+        selected[field] = reactpy.use_context_selector(Context, lambda v: v[field])
+        render_counts[field] += 1
+        return html.div()
+
+    async with Layout(ComponentProvidesContext()) as layout:
+        await layout.render()
+        assert selected == {"a": 0, "b": 0}
+
+        set_state.current({"a": 1, "b": 0})
+        await layout.render()
+        assert selected == {"a": 1, "b": 0}
+        assert render_counts == {"a": 2, "b": 1}
+
+
+async def test_use_context_selector_without_provider():
+    Context = reactpy.create_context({"a": 1})
+    value = reactpy.Ref(None)
+
+    @reactpy.component
+    def ComponentSelects():
+        value.current = reactpy.use_context_selector(Context, lambda v: v["a"])
+        return html.div()
+
+    async with Layout(ComponentSelects()) as layout:
+        await layout.render()
+        assert value.current == 1
+
+
 async def test_context_values_are_scoped():
     Context = reactpy.create_context(None)
 
@@ -1302,6 +1454,17 @@ def test_strictly_equal(x, y, result):
     assert strictly_equal(x, y) is result
 
 
+def test_strictly_equal_nan_is_not_equal_to_itself():
+    nan = float("nan")
+    assert strictly_equal(nan, nan) is False
+    assert strictly_equal(complex(nan, 0), complex(nan, 0)) is False
+    nan_complex = complex(0, nan)
+    assert strictly_equal(nan_complex, nan_complex) is False
+    # containers compare their items by identity first
+    values = [nan]
+    assert strictly_equal(values, values) is True
+
+
 def test_strictly_equal_named_closures():
     assert strictly_equal(lambda: "text", lambda: "text") is True
     assert strictly_equal(lambda: "text", lambda: "not-text") is False
@@ -1324,6 +1487,40 @@ def test_strictly_equal_named_closures():
     assert strictly_equal(generator(), generator()) is True
 
 
+def test_strictly_equal_does_not_compare_closure_values():
+    def make_callback(value):
+        def callback():
+            return value
+
+        return callback
+
+    assert strictly_equal(make_callback(1), make_callback(2)) is True
+
+
+def test_inferred_dependencies_are_the_closure_values_at_render_time():
+    def render():
+        value = 1
+
+        def callback():
+            return value
+
+        dependencies = _try_to_infer_closure_values(callback, ...)
+        value = 2
+        return dependencies
+
+    assert render() == [1]
+
+
+def test_strictly_equal_compares_code_of_separately_compiled_functions():
+    source = "def make():\n    return lambda: 'text'\n"
+    namespaces = [{}, {}]
+    for namespace in namespaces:
+        exec(compile(source, "<test>", "exec"), namespace)  # noqa: S102
+    x, y = (namespace["make"]() for namespace in namespaces)
+    assert x.__code__ is not y.__code__
+    assert strictly_equal(x, y) is True
+
+
 STRICT_EQUALITY_VALUE_CONSTRUCTORS = [
     lambda: "string-text",
     lambda: b"byte-text",
@@ -1472,3 +1669,48 @@ async def test_async_effect_cancelled_on_dependency_change():
 
         # Verify the previous effect was cancelled
         await asyncio.wait_for(effect_was_cancelled.wait(), 1)
+
+
+async def test_effects_re_run_on_every_render_do_not_accumulate_tasks():
+    component_hook = HookCatcher()
+    sync_runs = Ref(0)
+    sync_cleanups = Ref(0)
+    async_runs = Ref(0)
+    async_cleanups = Ref(0)
+
+    @reactpy.component
+    @component_hook.capture
+    def ComponentWithEffects():
+        @reactpy.hooks.use_effect(dependencies=None)
+        def sync_effect():
+            sync_runs.current += 1
+            return lambda: setattr(sync_cleanups, "current", sync_cleanups.current + 1)
+
+        @reactpy.hooks.use_async_effect(dependencies=None)
+        async def async_effect():
+            async_runs.current += 1
+            return lambda: setattr(
+                async_cleanups, "current", async_cleanups.current + 1
+            )
+
+        return reactpy.html.div()
+
+    async with Layout(ComponentWithEffects()) as layout:
+        await layout.render()
+        await poll(lambda: async_runs.current).until_equals(1)
+        baseline_tasks = len(asyncio.all_tasks())
+
+        for _ in range(10):
+            component_hook.latest.schedule_render()
+            await layout.render()
+        await poll(lambda: async_runs.current).until_equals(11)
+
+        assert sync_runs.current == 11
+        assert sync_cleanups.current == 10
+        assert async_cleanups.current == 10
+        assert len(asyncio.all_tasks()) <= baseline_tasks
+        assert not component_hook.latest._effect_tasks
+        assert not component_hook.latest._effect_stops
+
+    assert sync_cleanups.current == 11
+    assert async_cleanups.current == 11
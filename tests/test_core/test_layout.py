@@ -1,6 +1,7 @@
 import asyncio
 import contextlib
 import gc
+import itertools
 import random
 import re
 import warnings
@@ -15,12 +16,16 @@ from reactpy import html
 from reactpy.config import (
     REACTPY_ASYNC_RENDERING,
     REACTPY_DEBUG,
+    REACTPY_DIFF_UPDATES,
+    REACTPY_MAX_CONCURRENT_RENDERS,
     REACTPY_MAX_QUEUE_SIZE,
+    REACTPY_RENDER_BATCH_WINDOW,
+    REACTPY_RENDER_SLICE_MS,
 )
 from reactpy.core.component import component
 from reactpy.core.events import EventHandler
 from reactpy.core.hooks import use_async_effect, use_effect, use_state
-from reactpy.core.layout import Layout, _ThreadSafeQueue
+from reactpy.core.layout import _MAX_URGENT_BATCHES, Layout, _ThreadSafeQueue
 from reactpy.testing import (
     HookCatcher,
     StaticEventHandler,
@@ -1497,20 +1502,12 @@ async def test_deduplicate_async_renders():
             set_parent_state.current(1)
             set_child_state.current(1)
 
-            # Drain all renders — the child's standalone update task
-            # runs as well, so we loop until all are consumed.
-            with contextlib.suppress(asyncio.TimeoutError):
-                await asyncio.wait_for(layout.render(), timeout=1.0)
-                while layout._render_tasks:
-                    await asyncio.wait_for(layout.render(), timeout=1.0)
+            await layout.render()
 
-            # Check render counts
             # Parent should render twice (Initial + Update)
             # Child should render twice (Initial + Parent Update)
-            # The separate Child standalone update may also render
-            # (harmless extra work; the final state is correct)
             assert parent_render_count == 2
-            assert child_render_count in {2, 3}
+            assert child_render_count == 2
 
 
 async def test_deduplicate_async_renders_nested():
@@ -1555,57 +1552,35 @@ async def test_deduplicate_async_renders_nested():
             # Scenario 1: Parent then Child
             set_parent_state.current(1)
             set_child_state.current(1)
-
-            # Drain all renders
-            # We loop because multiple tasks might be scheduled.
-            # We use a timeout to prevent infinite loops if logic is broken.
-            with contextlib.suppress(asyncio.TimeoutError):
-                await asyncio.wait_for(layout.render(), timeout=1.0)
-                # If there are more tasks, keep rendering
-                while layout._render_tasks:
-                    await asyncio.wait_for(layout.render(), timeout=1.0)
-            # Parent should render (2)
-            # Child should render (2) - triggered by Parent
-            # Child's own update should be deduplicated (cancelled by Parent render)
+            await layout.render()
+            # Child's own render is covered by the Parent render
             assert parent_render_count.current == 2
             assert child_render_count.current == 2
 
             # Scenario 2: Child then Parent
             set_child_state.current(2)
             set_parent_state.current(2)
-
-            # Drain all renders
-            with contextlib.suppress(asyncio.TimeoutError):
-                await asyncio.wait_for(layout.render(), timeout=1.0)
-                while layout._render_tasks:
-                    await asyncio.wait_for(layout.render(), timeout=1.0)
+            await layout.render()
+            # The order renders were scheduled in does not matter
             assert parent_render_count.current == 3
-            # Child: 1 (init) + 1 (scen1) + 2 (scen2: Child task + Parent task) = 4
-            # We expect 4 because Child task runs first and isn't cancelled.
-            assert child_render_count.current == 4
+            assert child_render_count.current == 3
 
             # Scenario 3: Root, Parent, Child all update
             set_root_state.current(1)
             set_parent_state.current(3)
             set_child_state.current(3)
-
-            # Drain all renders
-            with contextlib.suppress(asyncio.TimeoutError):
-                await asyncio.wait_for(layout.render(), timeout=1.0)
-                while layout._render_tasks:
-                    await asyncio.wait_for(layout.render(), timeout=1.0)
+            await layout.render()
             assert root_render_count.current == 2
             assert parent_render_count.current == 4
-            # Child: 4 (prev) + 1 (Root->Parent->Child) = 5
-            # Root update triggers Parent update.
-            # Parent update triggers Child update.
-            # The explicit Parent and Child updates should be cancelled/deduplicated.
-            # NOTE: In some cases, if the Child update is processed before the Parent update
-            # (which is triggered by Root), it might not be cancelled in time.
-            # However, with proper deduplication, we aim for 5.
-            # If it is 6, it means one of the updates slipped through.
-            # Given the current implementation, let's assert <= 6 and ideally 5.
-            assert child_render_count.current <= 6
+            assert child_render_count.current == 4
+
+            # Nothing else was left to render
+            render_task = asyncio.create_task(layout.render())
+            await asyncio.sleep(0.1)
+            assert not render_task.done()
+            render_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await render_task
 
 
 async def test_deduplicate_async_renders_rapid():
@@ -1718,10 +1693,8 @@ async def test_event_handler_retry_logic():
         await layout.deliver(event_message)
 
         # The processing task should pick this up and fail to find the handler immediately.
-        # It will enter the retry loop.
-        # We wait a very short time (e.g. 10ms) to ensure it's entered the loop/sleeping
-        # The loop sleeps for 10ms (0.01s) each time, 3 times.
-        # We assume the layout's loop has started processing.
+        # It will then wait (for up to 30ms) for the handler to be registered.
+        # We wait a very short time to ensure it has started waiting.
         await asyncio.sleep(0.015)
 
         # Now we register the handler manually, simulating a late render update
@@ -1732,3 +1705,1147 @@ async def test_event_handler_retry_logic():
             await asyncio.wait_for(event_handled.wait(), timeout=1.0)
         except TimeoutError:
             pytest.fail("Event handler was not called after retry")
+
+
+async def test_diff_updates_only_send_changes():
+    set_count = Ref()
+
+    @component
+    def Counter():
+        count, set_count.current = use_state(0)
+        return html.div(
+            {"className": "counter", "data-count": count},
+            html.span("static"),
+            html.span(f"count: {count}"),
+        )
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", True):
+        async with layout_runner(Layout(Counter())) as runner:
+            first_update = await runner.layout.render()
+            assert first_update["type"] == "layout-update"
+
+            set_count.current(1)
+            update = await runner.layout.render()
+            assert update == {
+                "type": "layout-patch",
+                "path": "",
+                "changes": [
+                    {
+                        "op": "replace",
+                        "path": "/children/0/attributes/data-count",
+                        "value": 1,
+                    },
+                    {
+                        "op": "replace",
+                        "path": "/children/0/children/1/children/0",
+                        "value": "count: 1",
+                    },
+                ],
+            }
+
+
+async def test_diff_updates_insert_and_remove_children():
+    set_items = Ref()
+
+    @component
+    def Items():
+        items, set_items.current = use_state(["a", "b"])
+        return html.ul([html.li({"key": item}, item) for item in items])
+
+    @component
+    def Root():
+        return html.div(Items())
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", True):
+        async with layout_runner(Layout(Root())) as runner:
+            await runner.render()
+
+            set_items.current(["a", "b", "c"])
+            model = await runner.render()
+            assert model == {
+                "tagName": "",
+                "children": [
+                    {
+                        "tagName": "div",
+                        "children": [
+                            {
+                                "tagName": "",
+                                "children": [
+                                    {
+                                        "tagName": "ul",
+                                        "children": [
+                                            {
+                                                "tagName": "li",
+                                                "attributes": {"key": "a"},
+                                                "children": ["a"],
+                                            },
+                                            {
+                                                "tagName": "li",
+                                                "attributes": {"key": "b"},
+                                                "children": ["b"],
+                                            },
+                                            {
+                                                "tagName": "li",
+                                                "attributes": {"key": "c"},
+                                                "children": ["c"],
+                                            },
+                                        ],
+                                    }
+                                ],
+                            }
+                        ],
+                    }
+                ],
+            }
+
+            set_items.current(["a"])
+            model = await runner.render()
+            items = model["children"][0]["children"][0]["children"][0]["children"]
+            assert items == [
+                {
+                    "tagName": "li",
+                    "attributes": {"key": "a"},
+                    "children": ["a"],
+                }
+            ]
+
+
+async def test_diff_updates_skip_renders_without_changes():
+    set_count = Ref()
+    render_count = Ref(0)
+
+    @component
+    def Child():
+        count, set_count.current = use_state(0)
+        render_count.current += 1
+        return html.div(f"{count // 2}")
+
+    @component
+    def Root():
+        return html.div(Child())
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", True):
+        async with layout_runner(Layout(Root())) as runner:
+            await runner.render()
+
+            render_task = asyncio.create_task(runner.layout.render())
+
+            # renders to the same model, so nothing should be sent
+            set_count.current(1)
+            await poll(lambda: render_count.current).until_equals(2)
+            assert not render_task.done()
+
+            set_count.current(2)
+            update = await render_task
+            assert render_count.current == 3
+            assert update == {
+                "type": "layout-patch",
+                "path": "/children/0/children/0",
+                "changes": [
+                    {"op": "replace", "path": "/children/0/children/0", "value": "1"}
+                ],
+            }
+
+
+async def test_memo_component_skips_render_when_props_are_unchanged():
+    set_parent_state = Ref()
+    set_child_state = Ref()
+    child_render_count = Ref(0)
+
+    @component(memo=True)
+    def Child(label):
+        child_render_count.current += 1
+        count, set_child_state.current = use_state(0)
+        return html.div(f"{label} {count}")
+
+    @component
+    def Parent():
+        state, set_parent_state.current = use_state(0)
+        return html.div(html.span(state), Child("constant" if state < 2 else "changed"))
+
+    async with layout_runner(Layout(Parent())) as runner:
+        await runner.render()
+        assert child_render_count.current == 1
+
+        set_parent_state.current(1)
+        model = await runner.render()
+        assert child_render_count.current == 1
+        assert model["children"][0]["children"][1] == {
+            "tagName": "",
+            "children": [{"tagName": "div", "children": ["constant 0"]}],
+        }
+
+        # the child still renders on its own state changes
+        set_child_state.current(1)
+        model = await runner.render()
+        assert child_render_count.current == 2
+        assert model["children"][0]["children"][1]["children"][0] == {
+            "tagName": "div",
+            "children": ["constant 1"],
+        }
+
+        # and when its props change
+        set_parent_state.current(2)
+        model = await runner.render()
+        assert child_render_count.current == 3
+        assert model["children"][0]["children"][1]["children"][0] == {
+            "tagName": "div",
+            "children": ["changed 1"],
+        }
+
+
+async def test_memo_component_renders_when_context_changes():
+    Context = reactpy.create_context("a")
+    set_value = Ref()
+    child_render_count = Ref(0)
+
+    @component(memo=True)
+    def Child():
+        child_render_count.current += 1
+        return html.div(reactpy.use_context(Context))
+
+    @component
+    def Parent():
+        value, set_value.current = use_state("a")
+        return Context(html.div(Child()), value=value)
+
+    async with layout_runner(Layout(Parent())) as runner:
+        await runner.render()
+        assert child_render_count.current == 1
+
+        set_value.current("b")
+        model = await runner.render()
+        assert child_render_count.current == 2
+        assert element_exists(model, select.text_equals("b"))
+
+
+async def test_renders_scheduled_together_are_sent_in_one_batch():
+    set_counts = {}
+
+    @component
+    def Counter(index):
+        count, set_counts[index] = use_state(0)
+        return html.p(f"{index}:{count}")
+
+    @component
+    def Root():
+        return html.div(Counter(0), Counter(1), Counter(2))
+
+    async with Layout(Root()) as layout:
+        await layout.render()
+
+        for set_count in set_counts.values():
+            set_count(1)
+
+        message = await layout.render()
+        assert message == {
+            "type": "layout-batch",
+            "updates": [
+                update_message(
+                    path=f"/children/0/children/{index}",
+                    model={
+                        "tagName": "",
+                        "children": [{"tagName": "p", "children": [f"{index}:1"]}],
+                    },
+                )
+                for index in range(3)
+            ],
+        }
+
+
+async def test_render_batch_window():
+    set_counts = {}
+
+    @component
+    def Counter(index):
+        count, set_counts[index] = use_state(0)
+        return html.p(f"{index}:{count}")
+
+    @component
+    def Root():
+        return html.div(Counter(0), Counter(1))
+
+    with patch.object(REACTPY_RENDER_BATCH_WINDOW, "current", 100):
+        async with Layout(Root()) as layout:
+            await layout.render()
+
+            async def set_counts_later():
+                set_counts[0](1)
+                await asyncio.sleep(0.01)
+                set_counts[1](1)
+
+            task = asyncio.create_task(set_counts_later())
+            message = await layout.render()
+            await task
+            assert message["type"] == "layout-batch"
+            assert [u["path"] for u in message["updates"]] == [
+                "/children/0/children/0",
+                "/children/0/children/1",
+            ]
+
+
+async def test_scheduled_render_below_memo_component_is_not_skipped():
+    set_parent_count = Ref()
+    set_child_count = Ref()
+
+    @component
+    def Child():
+        count, set_child_count.current = use_state(0)
+        return html.p(f"child:{count}")
+
+    @component(memo=True)
+    def Memo():
+        return html.div(Child())
+
+    @component
+    def Parent():
+        count, set_parent_count.current = use_state(0)
+        return html.div(html.p(f"parent:{count}"), Memo())
+
+    async with layout_runner(Layout(Parent())) as runner:
+        await runner.render()
+
+        set_child_count.current(1)
+        set_parent_count.current(1)
+
+        model = await runner.render()
+        assert element_exists(model, select.text_equals("parent:1"))
+        assert element_exists(model, select.text_equals("child:1"))
+
+
+async def test_memo_component_update_path_follows_its_new_position():
+    set_items = Ref()
+    set_counts = {}
+
+    @component(memo=True)
+    def Item(name):
+        count, set_counts[name] = use_state(0)
+        return html.li(f"{name}:{count}")
+
+    @component
+    def Root():
+        items, set_items.current = use_state(["a", "b"])
+        return html.ul([Item(name, key=name) for name in items])
+
+    async with layout_runner(Layout(Root())) as runner:
+        await runner.render()
+
+        set_items.current(["b", "a"])
+        await runner.render()
+
+        set_counts["a"](1)
+        update = await runner.layout.render()
+        assert update["path"] == "/children/0/children/1"
+
+
+async def test_child_update_is_kept_when_memo_ancestor_is_reused():
+    set_root_count = Ref()
+    set_child_count = Ref()
+
+    @component
+    def Child():
+        count, set_child_count.current = use_state(0)
+        return html.p(f"child:{count}")
+
+    @component(memo=True)
+    def Memo():
+        return html.div(Child())
+
+    @component
+    def Root():
+        count, set_root_count.current = use_state(0)
+        return html.div(html.p(f"root:{count}"), Memo())
+
+    async with layout_runner(Layout(Root())) as runner:
+        await runner.render()
+
+        set_child_count.current(1)
+        await runner.render()
+
+        set_root_count.current(1)
+        model = await runner.render()
+        assert element_exists(model, select.text_equals("root:1"))
+        assert element_exists(model, select.text_equals("child:1"))
+
+
+async def test_child_update_does_not_copy_parent_children():
+    set_counts = {}
+
+    @component
+    def Item(index):
+        count, set_counts[index] = use_state(0)
+        return html.li(f"{index}:{count}")
+
+    @component
+    def Root():
+        return html.ul([Item(index, key=index) for index in range(3)])
+
+    async with Layout(Root()) as layout:
+        await layout.render()
+        root_state = layout._model_states_by_life_cycle_state_id[
+            layout._root_life_cycle_state_id
+        ]
+        ul_children = root_state.model["children"][0]["children"]
+
+        set_counts[1](1)
+        update = await layout.render()
+
+        assert update["path"] == "/children/0/children/1"
+        assert root_state.model["children"][0]["children"] is ul_children
+        # the item's model has no components in it so later renders never change it
+        # in place and it is sent without being copied
+        assert ul_children[1] is update["model"]
+
+
+async def test_diff_updates_move_reordered_keyed_components():
+    set_items = Ref()
+
+    @component
+    def Item(name):
+        return html.li(name)
+
+    @component
+    def Root():
+        items, set_items.current = use_state(["a", "b", "c"])
+        return html.ul([Item(name, key=name) for name in items])
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", True):
+        async with Layout(Root()) as layout:
+            update = await layout.render()
+            assert update["model"]["children"][0]["children"][0] == {
+                "tagName": "",
+                "children": [{"tagName": "li", "children": ["a"]}],
+            }
+
+            set_items.current(["c", "b", "a"])
+            update = await layout.render()
+            assert update == {
+                "type": "layout-patch",
+                "path": "",
+                "changes": [
+                    {
+                        "op": "move",
+                        "from": "/children/0/children/1",
+                        "path": "/children/0/children/0",
+                    },
+                    {
+                        "op": "move",
+                        "from": "/children/0/children/2",
+                        "path": "/children/0/children/0",
+                    },
+                ],
+            }
+
+
+async def test_diff_updates_only_look_for_keys_where_models_changed():
+    set_count = Ref()
+
+    @component
+    def Item(name):
+        return html.li(name)
+
+    @component(memo=True)
+    def List():
+        return html.ul([Item(str(i), key=str(i)) for i in range(50)])
+
+    @component
+    def Root():
+        count, set_count.current = use_state(0)
+        return html.div(html.p(count), List())
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", True):
+        async with Layout(Root()) as layout:
+            await layout.render()
+
+            searched = []
+            original = reactpy.core.layout._add_component_key
+
+            def add_component_key(keys, model_state):
+                searched.append(model_state)
+                original(keys, model_state)
+
+            with patch("reactpy.core.layout._add_component_key", add_component_key):
+                set_count.current(1)
+                await layout.render()
+
+    # the memoized list's 50 keyed items were not searched
+    assert 0 < len(searched) < 10
+
+
+async def test_render_slice_yields_to_event_loop():
+    loop_iterations = Ref(0)
+
+    @component
+    def Root():
+        return html.ul([html.li({"key": i}, str(i)) for i in range(100)])
+
+    async def count_loop_iterations():
+        while True:
+            loop_iterations.current += 1
+            await asyncio.sleep(0)
+
+    # make each render slice expire immediately
+    clock = itertools.count()
+    with (
+        patch.object(REACTPY_RENDER_SLICE_MS, "current", 1),
+        patch("reactpy.core.layout.monotonic", lambda: next(clock)),
+    ):
+        async with Layout(Root()) as layout:
+            counter = asyncio.create_task(count_loop_iterations())
+            update = await layout.render()
+            counter.cancel()
+
+    assert len(update["model"]["children"][0]["children"]) == 100
+    assert loop_iterations.current >= 100
+
+
+async def test_renders_scheduled_by_events_are_rendered_first():
+    set_background_count = Ref()
+    on_click = StaticEventHandler()
+
+    @component
+    def Background():
+        count, set_background_count.current = use_state(0)
+        return html.p(f"background:{count}")
+
+    @component
+    def Button():
+        count, set_count = use_state(0)
+        return html.button(
+            {"onClick": on_click.use(lambda event: set_count(count + 1))},
+            f"button:{count}",
+        )
+
+    @component
+    def Root():
+        return html.div(Background(), Button())
+
+    with patch.object(REACTPY_RENDER_BATCH_WINDOW, "current", 50):
+        async with Layout(Root()) as layout:
+            await layout.render()
+
+            set_background_count.current(1)
+            await layout.deliver(event_message(on_click.target, {}))
+
+            first = await layout.render()
+            second = await layout.render()
+
+    assert first["path"] == "/children/0/children/1"
+    assert second["path"] == "/children/0/children/0"
+
+
+async def test_renders_scheduled_by_tasks_an_event_spawned_are_not_urgent():
+    set_background_count = Ref()
+    set_button_count = Ref()
+    on_click = StaticEventHandler()
+    spawned = Ref()
+    clicked = asyncio.Event()
+
+    @component
+    def Background():
+        count, set_background_count.current = use_state(0)
+        return html.p(f"background:{count}")
+
+    @component
+    def Button():
+        count, set_button_count.current = use_state(0)
+
+        async def handle_click(event):
+            async def later():
+                set_background_count.current(1)
+
+            spawned.current = asyncio.create_task(later())
+            clicked.set()
+
+        return html.button({"onClick": on_click.use(handle_click)}, f"button:{count}")
+
+    @component
+    def Root():
+        return html.div(Background(), Button())
+
+    with patch.object(REACTPY_RENDER_BATCH_WINDOW, "current", 50):
+        async with Layout(Root()) as layout:
+            await layout.render()
+
+            await layout.deliver(event_message(on_click.target, {}))
+            await clicked.wait()
+            await spawned.current
+            set_button_count.current(1)
+
+            update = await layout.render()
+
+    # neither render was urgent, so both were performed together
+    assert update["type"] == "layout-batch"
+
+
+async def test_renders_deferred_by_events_are_not_deferred_forever():
+    set_background_count = Ref()
+    on_click = StaticEventHandler()
+    background_renders = Ref(0)
+
+    @component
+    def Background():
+        count, set_background_count.current = use_state(0)
+        background_renders.current += 1
+        return html.p(f"background:{count}")
+
+    @component
+    def Button():
+        count, set_count = use_state(0)
+        return html.button(
+            {"onClick": on_click.use(lambda event: set_count(count + 1))},
+            f"button:{count}",
+        )
+
+    @component
+    def Root():
+        return html.div(Background(), Button())
+
+    with patch.object(REACTPY_RENDER_BATCH_WINDOW, "current", 50):
+        async with Layout(Root()) as layout:
+            await layout.render()
+
+            set_background_count.current(1)
+            batches = 0
+            while background_renders.current == 1 and batches < _MAX_URGENT_BATCHES * 2:
+                # a new event arrives before each batch
+                await layout.deliver(event_message(on_click.target, {}))
+                await layout.render()
+                batches += 1
+
+    assert batches == _MAX_URGENT_BATCHES + 1
+
+
+async def test_resync_replaces_updates_not_yet_rendered_with_the_current_model():
+    set_count = Ref()
+
+    @component
+    def Counter():
+        count, set_count.current = use_state(0)
+        return html.div({"data-count": count})
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", True):
+        async with Layout(Counter()) as layout:
+            await layout.render()
+
+            for i in range(1, 4):
+                set_count.current(i)
+                await poll(lambda: layout._render_count).until_equals(i + 1)
+
+            assert await layout.resync() == update_message(
+                path="",
+                model={
+                    "tagName": "",
+                    "children": [{"tagName": "div", "attributes": {"data-count": 3}}],
+                },
+            )
+
+            set_count.current(4)
+            assert await layout.render() == {
+                "type": "layout-patch",
+                "path": "",
+                "changes": [
+                    {
+                        "op": "replace",
+                        "path": "/children/0/attributes/data-count",
+                        "value": 4,
+                    }
+                ],
+            }
+
+
+async def test_layout_restores_saved_state():
+    set_outer = Ref()
+    set_inner = Ref()
+    inner_ref = Ref()
+
+    @component
+    def Inner():
+        value, set_inner.current = use_state("a")
+        inner_ref.current = reactpy.use_ref(0)
+        use_effect(lambda: lambda: None)
+        return html.p(value)
+
+    @component
+    def Outer():
+        count, set_outer.current = use_state(0)
+        return html.div(html.span(count), Inner(key="inner"))
+
+    root = Outer()
+    async with layout_runner(Layout(root)) as runner:
+        await runner.render()
+        set_outer.current(1)
+        set_inner.current("b")
+        inner_ref.current.current = 2
+        await runner.render()
+        saved_state = runner.layout.save_state()
+
+    async with layout_runner(Layout(root, saved_state)) as runner:
+        assert await runner.render() == {
+            "tagName": "",
+            "children": [
+                {
+                    "tagName": "div",
+                    "children": [
+                        {"tagName": "span", "children": ["1"]},
+                        {
+                            "tagName": "",
+                            "children": [{"tagName": "p", "children": ["b"]}],
+                        },
+                    ],
+                }
+            ],
+        }
+        assert inner_ref.current.current == 2
+
+
+async def test_layout_restores_saved_state_of_components_mounted_later():
+    show_inner = Ref()
+
+    @component
+    def Inner():
+        value, _ = use_state("a")
+        return html.p(value)
+
+    @component
+    def Outer():
+        show, show_inner.current = use_state(False)
+        return html.div(Inner(key="inner") if show else None)
+
+    saved_state = {"/0/inner": {0: "b"}}
+    async with layout_runner(Layout(Outer(), saved_state)) as runner:
+        await runner.render()
+        # state which has yet to be restored is saved again
+        assert runner.layout.save_state()["/0/inner"] == {0: "b"}
+
+        show_inner.current(True)
+        await runner.render()
+        assert runner.model["children"][0]["children"][0]["children"] == [
+            {"tagName": "p", "children": ["b"]}
+        ]
+        assert runner.layout._saved_state == {}
+
+
+async def test_static_subtree_is_shared_and_skipped_by_diffs():
+    set_count = Ref()
+    footer = html.static(
+        html.footer({"className": "footer"}, html.p("Made with ", html.b("ReactPy")))
+    )
+
+    @component
+    def Page():
+        count, set_count.current = use_state(0)
+        return html.div(html.span(f"count: {count}"), footer)
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", True):
+        async with layout_runner(Layout(Page())) as runner:
+            first_update = await runner.layout.render()
+            assert first_update["model"]["children"][0]["children"][1] == {
+                "tagName": "footer",
+                "attributes": {"className": "footer"},
+                "children": [
+                    {
+                        "tagName": "p",
+                        "children": [
+                            "Made with ",
+                            {"tagName": "b", "children": ["ReactPy"]},
+                        ],
+                    }
+                ],
+            }
+
+            set_count.current(1)
+            update = await runner.layout.render()
+            assert update["changes"] == [
+                {
+                    "op": "replace",
+                    "path": "/children/0/children/0/children/0",
+                    "value": "count: 1",
+                }
+            ]
+
+            layout = runner.layout
+            root_state = layout._model_states_by_life_cycle_state_id[
+                layout._root_life_cycle_state_id
+            ]
+            assert root_state.model["children"][0]["children"][1] is footer.model
+
+
+@pytest.mark.parametrize("diff_updates", [True, False])
+async def test_sent_updates_share_static_subtrees(diff_updates):
+    set_count = Ref()
+    footer = html.static(html.footer("static"))
+
+    @component
+    def Page():
+        count, set_count.current = use_state(0)
+        return html.div(html.span(count), footer)
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", diff_updates):
+        async with Layout(Page()) as layout:
+            first_update = await layout.render()
+            first_div = first_update["model"]["children"][0]
+            assert first_div["children"][1] is footer.model
+
+            set_count.current(1)
+            update = await layout.render()
+            if diff_updates:
+                assert update["changes"] == [
+                    {
+                        "op": "replace",
+                        "path": "/children/0/children/0/children/0",
+                        "value": "1",
+                    }
+                ]
+            else:
+                assert update["model"]["children"][0]["children"][1] is footer.model
+
+            # what was sent before is not changed by later renders
+            assert first_div["children"][0] == {"tagName": "span", "children": ["0"]}
+
+
+async def test_sent_updates_only_copy_children_which_later_renders_change():
+    set_count = Ref()
+
+    @component
+    def Counter():
+        count, set_count.current = use_state(0)
+        return html.span(count)
+
+    @component
+    def Page():
+        return html.div(html.ul(html.li("a"), html.li("b")), Counter())
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", False):
+        async with Layout(Page()) as layout:
+            first_update = await layout.render()
+            root_state = layout._model_states_by_life_cycle_state_id[
+                layout._root_life_cycle_state_id
+            ]
+            (div_state,) = root_state.children_by_key.values()
+            ul_state = next(iter(div_state.children_by_key.values()))
+            first_div = first_update["model"]["children"][0]
+            # the list has no components in it so it is never changed in place
+            assert first_div["children"][0] is ul_state.model
+            # but the div's children change when the counter renders again
+            assert first_div is not div_state.model
+
+            set_count.current(1)
+            await layout.render()
+            assert first_div["children"][1] == {
+                "tagName": "",
+                "children": [{"tagName": "span", "children": ["0"]}],
+            }
+
+
+async def test_static_subtree_replaces_stateful_element():
+    toggle = Ref()
+    unmounted = Event()
+    footer = html.static(html.footer("static"))
+
+    @component
+    def Child():
+        @use_effect(dependencies=[])
+        def effect():
+            return unmounted.set
+
+        return html.p("child")
+
+    @component
+    def Page():
+        is_static, toggle.current = use_toggle(False)
+        return footer if is_static else html.footer(Child())
+
+    async with layout_runner(Layout(Page())) as runner:
+        await runner.render()
+        toggle.current()
+        model = await runner.render()
+        assert model["children"][0] == {
+            "tagName": "footer",
+            "children": ["static"],
+        }
+        await asyncio.wait_for(unmounted.wait(), 1)
+
+
+async def test_event_queues_and_sequence_numbers_are_not_kept_for_unused_targets():
+    set_items = Ref()
+    clicked = []
+
+    @component
+    def Items():
+        items, set_items.current = use_state(["a", "b"])
+        return html.div(
+            [
+                html.input(
+                    {
+                        "key": item,
+                        "onChange": lambda event, item=item: clicked.append(item),
+                    }
+                )
+                for item in items
+            ]
+        )
+
+    async with layout_runner(Layout(Items())) as runner:
+        model = await runner.render()
+        for _, element in zip("ab", model["children"][0]["children"], strict=True):
+            target = element["eventHandlers"]["onChange"]["target"]
+            await runner.layout.deliver({**event_message(target, {}), "seq": 1})
+
+        layout = runner.layout
+        await poll(lambda: clicked).until_equals(["a", "b"])
+        await poll(lambda: len(layout._event_processing_tasks)).until_equals(0)
+        assert not layout._event_queues
+        assert len(layout._last_event_seq_by_target) == 2
+
+        set_items.current(["b"])
+        await runner.render()
+        assert len(layout._last_event_seq_by_target) == 1
+
+
+async def test_sequence_numbers_are_kept_for_inputs_which_remount_in_place():
+    set_toggle = Ref()
+    changed = []
+
+    def handle_change(event):
+        changed.append(event)
+
+    @component
+    def FirstInput():
+        return html.input({"onChange": handle_change})
+
+    @component
+    def SecondInput():
+        return html.input({"onChange": handle_change, "class": "second"})
+
+    @component
+    def Root():
+        toggle, set_toggle.current = use_state(False)
+        return html.div(SecondInput() if toggle else FirstInput())
+
+    async with layout_runner(Layout(Root())) as runner:
+        model = await runner.render()
+        element = model["children"][0]["children"][0]["children"][0]
+        target = element["eventHandlers"]["onChange"]["target"]
+        await runner.layout.deliver({**event_message(target, {}), "seq": 3})
+        await poll(lambda: changed).until(lambda changed: len(changed) == 1)
+
+        set_toggle.current(True)
+        model = await runner.render()
+        element = model["children"][0]["children"][0]["children"][0]
+        assert element["eventHandlers"]["onChange"]["target"] == target
+        assert element["attributes"]["_reactpy_ack_seq"] == 3
+
+
+async def test_events_for_removed_handlers_are_dropped_without_waiting():
+    set_show = Ref()
+    handled = []
+
+    def handle_click(event):
+        handled.append(event)
+
+    @component
+    def Root():
+        show, set_show.current = use_state(True)
+        if not show:
+            return html.div()
+        return html.div(html.button({"onClick": handle_click}))
+
+    async with layout_runner(Layout(Root())) as runner:
+        model = await runner.render()
+        button = model["children"][0]["children"][0]
+        target = button["eventHandlers"]["onClick"]["target"]
+
+        set_show.current(False)
+        await runner.render()
+
+        handlers = runner.layout._event_handlers
+        assert await asyncio.wait_for(handlers.wait_for(target, False, 10), 1) is None
+
+        # during a render the handler could still be added back
+        waiting = asyncio.create_task(handlers.wait_for(target, True, 10))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        handlers.stop_waiting_for_removed()
+        assert await asyncio.wait_for(waiting, 1) is None
+
+        await runner.layout.deliver(event_message(target, {}))
+        await poll(lambda: runner.layout._event_processing_tasks).until_equals({})
+        assert handled == []
+
+
+async def test_max_concurrent_renders():
+    setters = []
+
+    @component
+    def Child(index):
+        value, set_value = use_state(0)
+        if len(setters) <= index:
+            setters.append(set_value)
+        return html.p(value)
+
+    @component
+    def Root():
+        return html.div([Child(i, key=i) for i in range(5)])
+
+    active = max_active = 0
+
+    with (
+        patch.object(REACTPY_ASYNC_RENDERING, "current", True),
+        patch.object(REACTPY_MAX_CONCURRENT_RENDERS, "current", 2),
+    ):
+        async with layout_runner(Layout(Root())) as runner:
+            create_layout_update = runner.layout._create_layout_update
+
+            async def counting_create_layout_update(state):
+                nonlocal active, max_active
+                active += 1
+                max_active = max(max_active, active)
+                try:
+                    await asyncio.sleep(0.01)
+                    return await create_layout_update(state)
+                finally:
+                    active -= 1
+
+            runner.layout._create_layout_update = counting_create_layout_update
+
+            await runner.render()
+            for set_value in setters:
+                set_value(1)
+            assert runner.layout.scheduled_renders == 5
+            model = await runner.render()
+            assert runner.layout.scheduled_renders == 0
+
+    assert max_active == 2
+    assert [p["children"] for p in model["children"][0]["children"]] == [
+        [{"tagName": "p", "children": ["1"]}]
+    ] * 5
+
+
+async def test_removed_subtree_effects_are_cleaned_up_together():
+    set_show_rows = Ref()
+    cleaned_up = Ref(0)
+
+    @component
+    def Row(index):
+        @use_async_effect(dependencies=[])
+        async def effect():
+            try:
+                await asyncio.sleep(1000)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.1)
+                cleaned_up.current += 1
+                if index == 3:
+                    raise ValueError("error from row 3") from None
+                raise
+
+        return html.div()
+
+    @component
+    def Table():
+        show_rows, set_show_rows.current = use_state(True)
+        if not show_rows:
+            return html.div()
+        return html.div([Row(i, key=i) for i in range(50)])
+
+    async with layout_runner(Layout(Table())) as runner:
+        await runner.render()
+        await asyncio.sleep(0)
+
+        set_show_rows.current(False)
+        with assert_reactpy_did_log(
+            match_message=r"Error in effect",
+            match_error="error from row 3",
+        ):
+            start = asyncio.get_running_loop().time()
+            await runner.render()
+            elapsed = asyncio.get_running_loop().time() - start
+
+    assert cleaned_up.current == 50
+    # one at a time, this would take 5 seconds
+    assert elapsed < 2
+
+
+async def test_exiting_while_unmounting_stops_remaining_effects():
+    set_names = Ref()
+    release = asyncio.Event()
+    stopped = []
+
+    @component
+    def Item(name):
+        @use_async_effect(shield=True)
+        async def effect():
+            await release.wait()
+            return lambda: stopped.append(name)
+
+        return html.li(name)
+
+    @component
+    def List():
+        names, set_names.current = use_state(["a", "b"])
+        return html.ul([Item(name, key=name) for name in names])
+
+    @component
+    def Root():
+        return html.div(List())
+
+    async with Layout(Root()) as layout:
+        await layout.render()
+        set_names.current(["b"])
+        # the render unmounts "a" and waits on its effect, which hasn't finished yet
+        while len(layout._model_states_by_life_cycle_state_id) > 3:
+            await asyncio.sleep(0)
+        release.set()
+
+    assert "b" in stopped
+
+
+async def _render_until_idle(runner):
+    layout = runner.layout
+    while True:
+        # give the render loop a chance to pick up newly scheduled renders
+        await asyncio.sleep(0.001)
+        if not layout._rendered_updates.empty():
+            await runner.render()
+        elif not (layout._render_lock.locked() or len(layout._rendering_queue)):
+            return
+
+
+@pytest.mark.parametrize("diff_updates", [True, False])
+@pytest.mark.parametrize("seed", range(8))
+async def test_client_model_matches_layout_after_random_updates(seed, diff_updates):
+    rng = random.Random(seed)
+    setters = {}
+
+    def node(node_id, depth):
+        value, setters[node_id] = use_state(0)
+        shape = random.Random(f"{node_id}-{value}")
+        keys = shape.sample(range(5), shape.randint(0, 4 if depth < 3 else 0))
+        children = [
+            (MemoNode if key % 2 else Node)(f"{node_id}.{key}", depth + 1, key=key)
+            for key in keys
+        ]
+        if shape.random() < 0.3:
+            children.insert(
+                0, html.span({"key": "label", "title": str(value)}, str(value))
+            )
+        attributes = {"id": node_id}
+        if value % 2:
+            attributes["className"] = f"odd-{value}"
+        return html.div(attributes, *children)
+
+    Node = component(node)
+    MemoNode = component(memo=True)(node)
+
+    with patch.object(REACTPY_DIFF_UPDATES, "current", diff_updates):
+        async with layout_runner(Layout(Node("root", 0))) as runner:
+            await runner.render()
+            for _ in range(20):
+                for node_id in rng.sample(sorted(setters), min(3, len(setters))):
+                    setters[node_id](rng.randint(0, 9))
+                await _render_until_idle(runner)
+                layout = runner.layout
+                root_state = layout._model_states_by_life_cycle_state_id[
+                    layout._root_life_cycle_state_id
+                ]
+                assert runner.model == root_state.model
@@ -0,0 +1,172 @@
+from copy import deepcopy
+
+import pytest
+
+from reactpy.core._model_diff import (
+    _longest_increasing_subsequence,
+    apply_model_changes,
+    diff_models,
+)
+
+
+def _element(tag, *children, **attributes):
+    model = {"tagName": tag}
+    if attributes:
+        model["attributes"] = attributes
+    if children:
+        model["children"] = list(children)
+    return model
+
+
+@pytest.mark.parametrize(
+    "old, new, expected",
+    [
+        (
+            _element("div", "hello"),
+            _element("div", "world"),
+            [{"op": "replace", "path": "/children/0", "value": "world"}],
+        ),
+        (
+            _element("div", id="a"),
+            _element("div", id="b", title="c"),
+            [
+                {"op": "replace", "path": "/attributes/id", "value": "b"},
+                {"op": "add", "path": "/attributes/title", "value": "c"},
+            ],
+        ),
+        (
+            _element("div", id="a", title="c"),
+            _element("div", id="a"),
+            [{"op": "remove", "path": "/attributes/title"}],
+        ),
+        (
+            _element("div", **{"a/b~c": 1}),
+            _element("div", **{"a/b~c": 2}),
+            [{"op": "replace", "path": "/attributes/a~1b~0c", "value": 2}],
+        ),
+        (
+            _element("div", "a"),
+            _element("div", "a", _element("span")),
+            [{"op": "add", "path": "/children/1", "value": {"tagName": "span"}}],
+        ),
+        (
+            _element("div", "a", "b", "c"),
+            _element("div", "a"),
+            [
+                {"op": "remove", "path": "/children/2"},
+                {"op": "remove", "path": "/children/1"},
+            ],
+        ),
+        (
+            _element("div", _element("span")),
+            _element("div", _element("p")),
+            [{"op": "replace", "path": "/children/0", "value": {"tagName": "p"}}],
+        ),
+        (
+            _element("div", _element("span", key="a")),
+            _element("div", _element("span", key="b")),
+            [
+                {
+                    "op": "replace",
+                    "path": "/children/0",
+                    "value": _element("span", key="b"),
+                }
+            ],
+        ),
+        (
+            _element("div", "a"),
+            _element("div"),
+            [{"op": "remove", "path": "/children"}],
+        ),
+        (
+            {"tagName": "", "error": "a"},
+            {"tagName": "", "error": "b"},
+            [{"op": "replace", "path": "/error", "value": "b"}],
+        ),
+        (
+            _element("div", _element("span", "a")),
+            _element("div", _element("span", "a")),
+            [],
+        ),
+        (
+            _element("ul", *(_element("li", key=k) for k in "abcd")),
+            _element("ul", *(_element("li", key=k) for k in "bcda")),
+            [{"op": "move", "from": "/children/0", "path": "/children/3"}],
+        ),
+        (
+            _element("ul", *(_element("li", key=k) for k in "abc")),
+            _element("ul", *(_element("li", key=k) for k in "ac")),
+            [{"op": "remove", "path": "/children/1"}],
+        ),
+        (
+            _element("ul", *(_element("li", key=k) for k in "ac")),
+            _element("ul", *(_element("li", key=k) for k in "abc")),
+            [{"op": "add", "path": "/children/1", "value": _element("li", key="b")}],
+        ),
+        (
+            _element("ul", _element("li", "1", key="a"), _element("li", key="b")),
+            _element("ul", _element("li", key="b"), _element("li", "2", key="a")),
+            [
+                {"op": "move", "from": "/children/1", "path": "/children/0"},
+                {"op": "replace", "path": "/children/1/children/0", "value": "2"},
+            ],
+        ),
+    ],
+)
+def test_diff_models(old, new, expected):
+    changes = diff_models(old, new)
+    assert changes == expected
+    assert apply_model_changes(deepcopy(old), changes) == new
+
+
+def test_apply_model_changes_relative_to_base_path():
+    model = _element("", _element("div", "a"))
+    changes = diff_models(model["children"][0], _element("div", "b", "c"))
+    assert apply_model_changes(model, changes, "/children/0") == _element(
+        "", _element("div", "b", "c")
+    )
+
+
+def test_apply_model_changes_replacing_the_root():
+    model = _element("div")
+    new_model = apply_model_changes(
+        model, [{"op": "replace", "path": "", "value": _element("span")}]
+    )
+    assert new_model == _element("span")
+    assert model == _element("div")
+
+
+def test_keyed_children_reversed_are_only_moved():
+    old = _element("ul", *(_element("li", str(i), key=i) for i in range(100)))
+    new = _element("ul", *reversed(old["children"]))
+    changes = diff_models(old, new)
+    assert len(changes) == 99
+    assert {change["op"] for change in changes} == {"move"}
+    assert apply_model_changes(deepcopy(old), changes) == new
+
+
+def test_keys_given_separately_are_used_to_match_children():
+    fragments = {name: {"tagName": "", "children": [name]} for name in "abc"}
+    keys = {id(model): name for name, model in fragments.items()}
+    old = _element("ul", *fragments.values())
+    new = _element("ul", *reversed(old["children"]))
+
+    changes = diff_models(old, new, keys)
+    assert [change["op"] for change in changes] == ["move", "move"]
+    assert apply_model_changes(deepcopy(old), changes) == new
+    # without them, the children are compared by index
+    assert {change["op"] for change in diff_models(old, new)} == {"replace"}
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ([], []),
+        ([3, 1, 2], [1, 2]),
+        ([0, 1, 2], [0, 1, 2]),
+        ([2, 1, 0], [0]),
+        ([1, 4, 2, 5, 3], [1, 2, 3]),
+    ],
+)
+def test_longest_increasing_subsequence(values, expected):
+    assert _longest_increasing_subsequence(values) == expected
@@ -1,17 +1,30 @@
 import asyncio
+import pickle
 import sys
+import threading
 from collections.abc import Sequence
 from typing import Any
+from unittest.mock import patch
 
 import pytest
 from jsonpointer import set_pointer
 
 import reactpy
-from reactpy.config import REACTPY_MAX_QUEUE_SIZE
+from reactpy.config import (
+    REACTPY_DIFF_UPDATES,
+    REACTPY_MAX_QUEUE_SIZE,
+    REACTPY_SESSION_HIBERNATE_TIMEOUT,
+    REACTPY_SESSION_RESUME_TIMEOUT,
+)
 from reactpy.core.hooks import use_effect
 from reactpy.core.layout import Layout
-from reactpy.core.serve import serve_layout
-from reactpy.testing import StaticEventHandler
+from reactpy.core.serve import (
+    FileHibernationStore,
+    LayoutSessions,
+    _Outbox,
+    serve_layout,
+)
+from reactpy.testing import StaticEventHandler, poll
 from reactpy.types import LayoutUpdateMessage
 from tests.tooling.aio import Event
 from tests.tooling.common import event_message
@@ -150,3 +163,445 @@ async def test_dispatcher_handles_more_than_one_event_at_a_time():
         await second_event_did_execute.wait()
     finally:
         task.cancel()
+
+
+async def test_slow_client_only_receives_latest_update():
+    set_count = reactpy.Ref()
+    first_sent = asyncio.Event()
+    release_send = asyncio.Event()
+    sent = []
+
+    @reactpy.component
+    def Ticker():
+        count, set_count.current = reactpy.hooks.use_state(0)
+        return reactpy.html.div({"count": count})
+
+    async def send(update):
+        sent.append(update)
+        first_sent.set()
+        await release_send.wait()
+
+    async def recv():
+        await asyncio.Event().wait()
+
+    task = asyncio.create_task(serve_layout(Layout(Ticker()), send, recv))
+    try:
+        await first_sent.wait()
+        for i in range(1, 20):
+            set_count.current(i)
+            await asyncio.sleep(0.01)
+        release_send.set()
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+    assert len(sent) == 2
+    assert sent[1]["type"] == "layout-update"
+    assert sent[1]["model"]["children"][0]["attributes"] == {"count": 19}
+
+
+async def test_slow_client_is_sent_whole_model_once_patches_fill_outbox():
+    set_count = reactpy.Ref()
+    first_sent = asyncio.Event()
+    release_send = asyncio.Event()
+    sent = []
+    pending_sizes = []
+
+    @reactpy.component
+    def Ticker():
+        count, set_count.current = reactpy.hooks.use_state(0)
+        return reactpy.html.div({"count": count})
+
+    async def send(update):
+        sent.append(update)
+        first_sent.set()
+        await release_send.wait()
+
+    async def recv():
+        await asyncio.Event().wait()
+
+    original_put = _Outbox.put
+
+    def put(self, message):
+        original_put(self, message)
+        pending_sizes.append(len(self._pending))
+
+    with (
+        patch.object(REACTPY_DIFF_UPDATES, "current", True),
+        patch("reactpy.core.serve._MAX_PENDING_UPDATES", 4),
+        patch.object(_Outbox, "put", put),
+    ):
+        task = asyncio.create_task(serve_layout(Layout(Ticker()), send, recv))
+        try:
+            await first_sent.wait()
+            for i in range(1, 20):
+                set_count.current(i)
+                await asyncio.sleep(0.01)
+            release_send.set()
+            await poll(lambda: str(sent[-1])).until(lambda text: "19" in text)
+        finally:
+            task.cancel()
+
+    assert max(pending_sizes) <= 4
+    # patches were replaced by the whole model once there were too many to send
+    updates = [
+        update for message in sent[1:] for update in message.get("updates", [message])
+    ]
+    assert any(
+        update["type"] == "layout-update" and update["path"] == "" for update in updates
+    )
+
+
+async def test_outbox_replaces_pending_updates_beneath_newer_update():
+    outbox = _Outbox()
+    outbox.put({"type": "layout-update", "path": "/children/0", "model": {"n": 1}})
+    outbox.put({"type": "layout-update", "path": "/children/1", "model": {"n": 1}})
+    outbox.put(
+        {
+            "type": "layout-batch",
+            "updates": [
+                {
+                    "type": "layout-update",
+                    "path": "/children/0/children/0",
+                    "model": {},
+                },
+                {"type": "layout-patch", "path": "/children/1", "changes": []},
+            ],
+        }
+    )
+    outbox.put({"type": "layout-update", "path": "/children/0", "model": {"n": 2}})
+
+    assert await outbox.get() == {
+        "type": "layout-batch",
+        "updates": [
+            {"type": "layout-update", "path": "/children/1", "model": {"n": 1}},
+            {"type": "layout-patch", "path": "/children/1", "changes": []},
+            {"type": "layout-update", "path": "/children/0", "model": {"n": 2}},
+        ],
+    }
+
+    outbox.put({"type": "layout-update", "path": "/children/1", "model": {"n": 2}})
+    outbox.put({"type": "layout-update", "path": "", "model": {"n": 3}})
+    assert await outbox.get() == {
+        "type": "layout-update",
+        "path": "",
+        "model": {"n": 3},
+    }
+
+
+async def test_outbox_keeps_updates_which_an_ancestor_patch_depends_on():
+    outbox = _Outbox()
+    child_update = {"type": "layout-update", "path": "/children/0", "model": {"n": 1}}
+    parent_patch = {"type": "layout-patch", "path": "", "changes": []}
+    outbox.put(child_update)
+    outbox.put(parent_patch)
+    outbox.put({"type": "layout-patch", "path": "/children/0", "changes": []})
+    outbox.put({"type": "layout-update", "path": "/children/0", "model": {"n": 2}})
+
+    assert await outbox.get() == {
+        "type": "layout-batch",
+        "updates": [
+            child_update,
+            parent_patch,
+            {"type": "layout-update", "path": "/children/0", "model": {"n": 2}},
+        ],
+    }
+
+
+async def test_resumed_session_is_sent_current_model_without_remounting():
+    set_count = reactpy.Ref()
+    mount_count = reactpy.Ref(0)
+    unmounted = Event()
+
+    @reactpy.component
+    def Counter():
+        count, set_count.current = reactpy.hooks.use_state(0)
+
+        @use_effect(dependencies=[])
+        def mount():
+            mount_count.current += 1
+            return unmounted.set
+
+        return reactpy.html.div({"count": count})
+
+    async def recv():
+        await asyncio.Event().wait()
+
+    sessions = LayoutSessions()
+    with patch.object(REACTPY_SESSION_RESUME_TIMEOUT, "current", 0.1):
+        session = await sessions.open(Layout(Counter()))
+        first_token = session.token
+
+        sent = asyncio.Queue()
+        task = asyncio.create_task(session.serve(sent.put, recv))
+        assert (await sent.get()) == {"type": "session-token", "token": first_token}
+        await sent.get()  # the first render
+        task.cancel()
+        await asyncio.wait([task])
+
+        # renders while disconnected are not sent
+        set_count.current(1)
+        await asyncio.sleep(0.01)
+
+        assert sessions.resume("not-a-token") is None
+        assert sessions.resume(first_token) is session
+        assert sessions.resume(first_token) is None
+
+        sent = asyncio.Queue()
+        task = asyncio.create_task(session.serve(sent.put, recv))
+        assert (await sent.get()) == {"type": "session-token", "token": session.token}
+        assert (await sent.get()) == {
+            "type": "layout-update",
+            "path": "",
+            "model": {
+                "tagName": "",
+                "children": [{"tagName": "div", "attributes": {"count": 1}}],
+            },
+        }
+        assert mount_count.current == 1
+
+        task.cancel()
+        await asyncio.wait([task])
+        await unmounted.wait()
+        assert len(sessions) == 0
+
+
+async def test_session_rendered_before_being_served_is_handed_off():
+    set_count = reactpy.Ref()
+    unmounted = Event()
+
+    @reactpy.component
+    def Counter():
+        count, set_count.current = reactpy.hooks.use_state(0)
+
+        @use_effect(dependencies=[])
+        def mount():
+            return unmounted.set
+
+        return reactpy.html.div({"count": count})
+
+    async def recv():
+        await asyncio.Event().wait()
+
+    sessions = LayoutSessions()
+    session = await sessions.open(Layout(Counter()), root=Counter)
+    session.expire_after(10)
+    await session.layout.render()  # sent to the client some other way
+
+    assert sessions.resume(session.token, root=object()) is None
+    assert sessions.resume(session.token, root=Counter) is session
+
+    sent = asyncio.Queue()
+    task = asyncio.create_task(session.serve(sent.put, recv))
+    assert (await sent.get()) == {"type": "session-token", "token": session.token}
+    # the client already has the first update, so it is not sent again
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(sent.get(), 0.05)
+    set_count.current(1)
+    assert (await sent.get())["model"]["children"][0]["attributes"] == {"count": 1}
+    task.cancel()
+    await asyncio.wait([task])
+    await unmounted.wait()
+
+    # a session which is never served expires
+    session = await sessions.open(Layout(Counter()), root=Counter)
+    await session.layout.render()
+    unmounted.clear()
+    session.expire_after(0.01)
+    await unmounted.wait()
+    assert len(sessions) == 0
+
+
+@pytest.mark.parametrize("store_type", ["memory", "file"])
+async def test_idle_session_hibernates_and_wakes_on_next_event(store_type, tmp_path):
+    handler = StaticEventHandler()
+    unmounted = Event()
+
+    @reactpy.component
+    def Counter():
+        count, set_count = reactpy.hooks.use_state(0)
+
+        @use_effect(dependencies=[])
+        def mount():
+            return unmounted.set
+
+        return reactpy.html.button(
+            {"onClick": handler.use(lambda: set_count(count + 1))}, count
+        )
+
+    sessions = LayoutSessions(
+        FileHibernationStore(tmp_path) if store_type == "file" else None
+    )
+    sent = asyncio.Queue()
+    received = asyncio.Queue()
+
+    with patch.object(REACTPY_SESSION_HIBERNATE_TIMEOUT, "current", 0.05):
+        session = await sessions.open(Layout(Counter()))
+        task = asyncio.create_task(session.serve(sent.put, received.get))
+        try:
+            assert (await sent.get())["type"] == "session-token"
+            await sent.get()  # the first render
+
+            await received.put(event_message(handler.target))
+            await sent.get()
+
+            await unmounted.wait()
+            await poll(lambda: session.hibernating).until_is(True)
+
+            await received.put(event_message(handler.target))
+            woken = await sent.get()
+            assert woken["model"]["children"][0]["children"] == ["1"]
+            assert not session.hibernating
+
+            updated = await sent.get()
+            assert updated["model"]["children"][0]["children"] == ["2"]
+        finally:
+            task.cancel()
+            await asyncio.wait([task])
+
+        # the session expires immediately after disconnecting
+        await poll(lambda: len(sessions)).until_equals(0)
+
+
+async def test_session_lets_event_handlers_finish_before_hibernating():
+    handler = StaticEventHandler()
+    release = asyncio.Event()
+    handled = []
+
+    @reactpy.component
+    def Slow():
+        async def on_click():
+            await release.wait()
+            handled.append(True)
+
+        return reactpy.html.button({"onClick": handler.use(on_click)})
+
+    sessions = LayoutSessions()
+    sent = asyncio.Queue()
+    received = asyncio.Queue()
+
+    with patch.object(REACTPY_SESSION_HIBERNATE_TIMEOUT, "current", 0.05):
+        session = await sessions.open(Layout(Slow()))
+        task = asyncio.create_task(session.serve(sent.put, received.get))
+        try:
+            assert (await sent.get())["type"] == "session-token"
+            await sent.get()  # the first render
+
+            await received.put(event_message(handler.target))
+            await asyncio.sleep(0.2)
+            assert not session.hibernating
+
+            release.set()
+            await poll(lambda: session.hibernating).until_is(True)
+            assert handled == [True]
+        finally:
+            task.cancel()
+            await asyncio.wait([task])
+
+
+async def test_session_sends_pending_updates_before_hibernating():
+    handler = StaticEventHandler()
+
+    @reactpy.component
+    def Counter():
+        count, set_count = reactpy.hooks.use_state(0)
+        return reactpy.html.button(
+            {"onClick": handler.use(lambda: set_count(count + 1))}, count
+        )
+
+    sessions = LayoutSessions()
+    sent = asyncio.Queue()
+    received = asyncio.Queue()
+
+    async def send(message):
+        if message["type"] == "layout-update" and "1" in str(message["model"]):
+            # takes longer than the session may stay idle
+            await asyncio.sleep(0.2)
+        await sent.put(message)
+
+    with patch.object(REACTPY_SESSION_HIBERNATE_TIMEOUT, "current", 0.05):
+        session = await sessions.open(Layout(Counter()))
+        task = asyncio.create_task(session.serve(send, received.get))
+        try:
+            assert (await sent.get())["type"] == "session-token"
+            await sent.get()  # the first render
+
+            await received.put(event_message(handler.target))
+            await poll(lambda: session.hibernating).until_is(True)
+            updated = sent.get_nowait()
+            assert updated["model"]["children"][0]["children"] == ["1"]
+        finally:
+            task.cancel()
+            await asyncio.wait([task])
+
+
+async def test_session_keeps_serving_if_its_state_cannot_be_saved():
+    handler = StaticEventHandler()
+
+    @reactpy.component
+    def Counter():
+        count, set_count = reactpy.hooks.use_state(0)
+        reactpy.hooks.use_state(threading.Lock)  # which cannot be pickled
+        return reactpy.html.button(
+            {"onClick": handler.use(lambda: set_count(count + 1))}, count
+        )
+
+    sessions = LayoutSessions()
+    sent = asyncio.Queue()
+    received = asyncio.Queue()
+
+    with patch.object(REACTPY_SESSION_HIBERNATE_TIMEOUT, "current", 0.05):
+        session = await sessions.open(Layout(Counter()))
+        task = asyncio.create_task(session.serve(sent.put, received.get))
+        try:
+            assert (await sent.get())["type"] == "session-token"
+            await sent.get()  # the first render
+
+            # idle for long enough to have tried hibernating a few times
+            await asyncio.sleep(0.2)
+            assert not session.hibernating
+
+            await received.put(event_message(handler.target))
+            updated = await sent.get()
+            assert updated["model"]["children"][0]["children"] == ["1"]
+        finally:
+            task.cancel()
+            await asyncio.wait([task])
+
+
+async def test_session_does_not_restore_state_it_did_not_save(tmp_path):
+    handler = StaticEventHandler()
+
+    @reactpy.component
+    def Counter():
+        count, set_count = reactpy.hooks.use_state(0)
+        return reactpy.html.button(
+            {"onClick": handler.use(lambda: set_count(count + 1))}, count
+        )
+
+    store = FileHibernationStore(tmp_path)
+    sessions = LayoutSessions(store)
+    sent = asyncio.Queue()
+    received = asyncio.Queue()
+
+    with patch.object(REACTPY_SESSION_HIBERNATE_TIMEOUT, "current", 0.05):
+        session = await sessions.open(Layout(Counter()))
+        task = asyncio.create_task(session.serve(sent.put, received.get))
+        try:
+            assert (await sent.get())["type"] == "session-token"
+            await sent.get()  # the first render
+            await received.put(event_message(handler.target))
+            await sent.get()
+            await poll(lambda: session.hibernating).until_is(True)
+
+            # replace the saved state with some that was pickled elsewhere
+            (saved_file,) = tmp_path.iterdir()
+            saved_file.write_bytes(pickle.dumps({"": {0: 10}}))
+
+            await received.put(event_message(handler.target))
+            woken = await sent.get()
+            assert woken["model"]["children"][0]["children"] == ["0"]
+        finally:
+            task.cancel()
+            await asyncio.wait([task])
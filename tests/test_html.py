@@ -143,3 +143,25 @@ async def test_svg(display: DisplayFixture):
     assert await circle.get_attribute("cy") == "50"
     assert await circle.get_attribute("r") == "40"
     assert await circle.get_attribute("fill") == "red"
+
+
+def test_static_element_model():
+    element = html.static(html.div({"className": "a"}, html.p("b"), 1, None))
+    assert element == html.div({"className": "a"}, html.p("b"), 1, None)
+    assert element.model == {
+        "tagName": "div",
+        "attributes": {"className": "a"},
+        "children": [{"tagName": "p", "children": ["b"]}, "1"],
+    }
+
+
+def test_static_element_cannot_contain_components_or_event_handlers():
+    @component
+    def Child():
+        return html.p("child")
+
+    with pytest.raises(TypeError, match=r"cannot contain components"):
+        html.static(html.div(Child()))
+
+    with pytest.raises(TypeError, match=r"cannot have event handlers"):
+        html.static(html.div(html.button({"onClick": lambda event: None})))
@@ -3,10 +3,12 @@ from __future__ import annotations
 import logging
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from copy import deepcopy
 from typing import Any
 
 from jsonpointer import set_pointer
 
+from reactpy.core._model_diff import apply_model_changes
 from reactpy.core.layout import Layout
 from reactpy.types import VdomJson
 from tests.tooling.common import event_message
@@ -26,14 +28,22 @@ class LayoutRunner:
         self.model = {}
 
     async def render(self) -> VdomJson:
-        update = await self.layout.render()
-        logger.info(f"Rendering element at {update['path'] or '/'!r}")
-        if not update["path"]:
-            self.model = update["model"]
-        else:
-            self.model = set_pointer(
-                self.model, update["path"], update["model"], inplace=False
-            )
+        # copy the update (as sending it would) so the layout's later changes to its
+        # own models can't leak into ours
+        message = deepcopy(await self.layout.render())
+        updates = message["updates"] if message["type"] == "layout-batch" else [message]
+        for update in updates:
+            logger.info(f"Rendering element at {update['path'] or '/'!r}")
+            if update["type"] == "layout-patch":
+                self.model = apply_model_changes(
+                    self.model, update["changes"], update["path"]
+                )
+            elif not update["path"]:
+                self.model = update["model"]
+            else:
+                self.model = set_pointer(
+                    self.model, update["path"], update["model"], inplace=False
+                )
         return self.model
 
     async def trigger(self, element: VdomJson, event_name: str, *data: Any) -> None: